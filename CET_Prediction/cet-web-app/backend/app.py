@@ -6,9 +6,12 @@ from dotenv import load_dotenv
 from flask_jwt_extended import JWTManager
 from routes.predict_route import predict_bp
 from routes.college_directory import college_directory_bp
-from routes.college_comparison_routes import college_comparison_bp
+from routes.college_comparison_routes import college_comparison_bp, init_cache
 from routes.chatbot_route import chatbot_bp
 from routes.resource_vault_route import resource_vault_bp  # ✅ NEW: Resource Vault import
+from routes.optionform_route import optionform_bp
+from utils.data_repository import DataRepository, data_repository
+from utils.cache_warmup import cache_warmer
 import pandas as pd
 import os
 
@@ -34,19 +37,21 @@ print("\n" + "="*60)
 print("🚀 Initializing CET Predictor Backend...")
 print("="*60)
 
-# Load comparison data globally for backwards compatibility
-comparison_df = None
-try:
-    comparison_csv_path = 'data/merged_cutoff_2021_2025.csv'
-    if os.path.exists(comparison_csv_path):
-        print(f"📂 Loading comparison data...")
-        comparison_df = pd.read_csv(comparison_csv_path)
-        comparison_df['year'] = comparison_df['year'].astype(str)
-        print(f"✅ Loaded comparison data: {len(comparison_df):,} records")
-    else:
-        print(f"⚠️  Comparison data not found at: {comparison_csv_path}")
-except Exception as e:
-    print(f"❌ Error loading comparison data: {str(e)}")
+# Comparison data for backwards compatibility (the shared cutoff store)
+def load_comparison_df():
+    """Shared cutoff store, or None when it is empty or failed to load"""
+    try:
+        df = data_repository.get_cutoff_data()
+        if df.empty:
+            print(f"⚠️  Comparison data not available")
+            return None
+        print(f"✅ Comparison data: {len(df):,} records (shared cutoff store)")
+        return df
+    except Exception as e:
+        print(f"❌ Error loading comparison data: {str(e)}")
+        return None
+
+comparison_df = load_comparison_df()
 
 print("="*60 + "\n")
 
@@ -57,14 +62,30 @@ app.register_blueprint(college_directory_bp, url_prefix='/api')
 app.register_blueprint(college_comparison_bp, url_prefix='/api')
 app.register_blueprint(chatbot_bp, url_prefix='/api/chatbot')
 app.register_blueprint(resource_vault_bp)  # ✅ NEW: Register Resource Vault blueprint
+app.register_blueprint(optionform_bp)
 print("✅ All blueprints registered (including chatbot & resource vault)")
 
+# Memoized comparator reads (compare, branches, categories, trends)
+init_cache(app)
+
+@app.before_request
+def check_data_updates():
+    """Start a new data generation when the pipeline rewrites an input file"""
+    global comparison_df
+    if data_repository.check_for_updates():
+        comparison_df = load_comparison_df()
+
+# Replay popular requests in the background; /api/ready flips when done
+cache_warmer.start(app)
+
 @app.route('/', methods=['GET'])
 def home():
     endpoints = {
         'health': 'GET /api/health',
+        'ready': 'GET /api/ready',
         'model_info': 'GET /api/model-info',
         'predict': 'POST /api/predict',
+        'predict_export': 'POST /api/predict/export?format=csv|xlsx',
         
         # Dataset endpoints
         'colleges_dataset': 'GET /api/colleges/dataset',
@@ -87,6 +108,7 @@ def home():
         'get_college_cutoffs': 'GET /api/colleges/<code>/cutoffs',
         'get_cutoff_trends': 'GET /api/colleges/<code>/trends',
         'get_college_stats': 'GET /api/colleges/<code>/stats',
+        'get_college_stats_bulk': 'GET /api/colleges/stats?codes=<code1>,<code2>',
         'get_trend_analysis': 'GET /api/colleges/<code>/trend-analysis',
         'get_category_info': 'GET /api/categories/<code>/info',
         
@@ -95,8 +117,18 @@ def home():
         'chatbot_greeting': 'GET /api/chatbot/greeting',
         'chatbot_quick_replies': 'GET /api/chatbot/quick-replies',
         'chatbot_chat': 'POST /api/chatbot/chat',
+        'chatbot_chat_stream': 'POST /api/chatbot/chat/stream',
         'chatbot_clear': 'POST /api/chatbot/clear',
         
+        # Option form endpoints
+        'optionform_save': 'POST /api/optionform/save',
+        'optionform_load': 'GET /api/optionform/load/<user_id>',
+        'optionform_export': 'GET /api/optionform/export/<user_id>',
+        'optionform_download': 'GET /api/optionform/export/<user_id>/download?format=csv|xlsx',
+        'optionform_simulate': 'POST /api/optionform/simulate',
+        'optionform_optimize': 'POST /api/optionform/optimize',
+        'optionform_health': 'GET /api/optionform/health',
+        
         # ✅ NEW: Resource Vault endpoints
         'resources_health': 'GET /api/resources/health',
         'resources_summary': 'GET /api/resources/summary',
@@ -138,6 +170,12 @@ def health():
         }
     })
 
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 503 until the cache warmup completes or its budget expires"""
+    status = cache_warmer.get_status()
+    return jsonify(status), (200 if status['ready'] else 503)
+
 @app.route('/api/test-blueprint', methods=['GET'])
 def test_blueprint():
     return jsonify({
@@ -158,27 +196,17 @@ def test_blueprint():
 @app.route('/api/colleges/dataset', methods=['GET'])
 def get_college_dataset():
     try:
-        file_path = 'backend/data/flattened_CAP_data done.xlsx'
-        
-        print(f"📂 Looking for file at: {file_path}")
-        print(f"📁 Current working directory: {os.getcwd()}")
-        print(f"🔍 File exists: {os.path.exists(file_path)}")
+        file_path = data_repository.paths['cap_data']
         
         if not os.path.exists(file_path):
-            absolute_path = 'D:/CET_Prediction/cet-web-app/backend/data/flattened_CAP_data done.xlsx'
-            if os.path.exists(absolute_path):
-                file_path = absolute_path
-                print(f"✅ Found file at absolute path: {file_path}")
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': f'Excel file not found at: {file_path}',
-                    'current_directory': os.getcwd(),
-                    'files_in_data_dir': os.listdir('backend/data') if os.path.exists('backend/data') else 'Directory not found'
-                }), 404
-        
-        print("📊 Reading Excel file...")
-        df = pd.read_excel(file_path)
+            return jsonify({
+                'success': False,
+                'error': f'Excel file not found at: {file_path}',
+                'current_directory': os.getcwd(),
+                'files_in_data_dir': os.listdir(data_repository.data_dir) if os.path.exists(data_repository.data_dir) else 'Directory not found'
+            }), 404
+        
+        df = data_repository.get_cap_data()
         
         df = df.where(pd.notna(df), None)
         
@@ -209,30 +237,24 @@ def get_college_dataset():
 def directory_stats():
     """Quick endpoint to check college directory status"""
     try:
-        dir_path = 'backend/data/Colleges_URL.xlsx'
+        dir_path = data_repository.paths['college_directory']
         
         if not os.path.exists(dir_path):
-            dir_path = 'D:/CET_Prediction/cet-web-app/backend/data/Colleges_URL.xlsx'
-            
-            if not os.path.exists(dir_path):
-                return jsonify({
-                    'success': False,
-                    'message': 'College directory file not found',
-                    'expected_paths': [
-                        'backend/data/Colleges_URL.xlsx',
-                        'D:/CET_Prediction/cet-web-app/backend/data/Colleges_URL.xlsx'
-                    ],
-                    'files_in_data_dir': os.listdir('backend/data') if os.path.exists('backend/data') else []
-                }), 404
-        
-        df = pd.read_excel(dir_path, nrows=5)
+            return jsonify({
+                'success': False,
+                'message': 'College directory file not found',
+                'expected_paths': [dir_path],
+                'files_in_data_dir': os.listdir(data_repository.data_dir) if os.path.exists(data_repository.data_dir) else []
+            }), 404
+        
+        df = data_repository.get_college_directory()
         
         return jsonify({
             'success': True,
             'message': 'College directory file is accessible',
             'file_path': dir_path,
             'columns': list(df.columns),
-            'sample_count': len(df),
+            'sample_count': min(5, len(df)),
             'sample_data': df.head(3).to_dict('records')
         })
         
@@ -348,10 +370,8 @@ def get_college_options():
                 'available_columns': list(comparison_df.columns)
             }), 500
         
-        try:
-            college_codes = [int(code) for code in college_codes]
-        except:
-            pass
+        # Store keeps canonical college codes ('01002' and 1002 both match '1002')
+        college_codes = DataRepository.canonical_codes(pd.Series(college_codes, dtype=str)).tolist()
         
         filtered_df = comparison_df[comparison_df[college_code_col].isin(college_codes)]
         
@@ -418,6 +438,7 @@ if __name__ == '__main__':
     print("  👋 Greeting: GET /api/chatbot/greeting")
     print("  ⚡ Quick Replies: GET /api/chatbot/quick-replies")
     print("  💬 Chat: POST /api/chatbot/chat")
+    print("  📡 Chat (streaming): POST /api/chatbot/chat/stream")
     print("  🔄 Clear: POST /api/chatbot/clear")
     print("\n  📚 Resource Vault Endpoints:")
     print("  ✅ Health: GET /api/resources/health")
@@ -461,46 +482,17 @@ if __name__ == '__main__':
         print(f"  ⚠️  Resource Service: Error loading - {str(e)}")
     
     # Test data files
-    dir_path = 'backend/data/Colleges_URL.xlsx'
-    abs_path = 'D:/CET_Prediction/cet-web-app/backend/data/Colleges_URL.xlsx'
-    
     print("\n🔍 Data Files Status:")
-    if os.path.exists(dir_path):
-        print(f"  ✅ College directory: {dir_path}")
-    elif os.path.exists(abs_path):
-        print(f"  ✅ College directory: {abs_path}")
-    else:
-        print(f"  ⚠️  College directory not found")
+    for name, exists in data_repository.get_status()['files'].items():
+        print(f"  {'✅' if exists else '⚠️ '} {name}: {data_repository.paths[name]}")
     
-    comparison_csv = 'data/merged_cutoff_2021_2025.csv'
-    if os.path.exists(comparison_csv):
-        print(f"  ✅ Comparison data: {comparison_csv}")
-        try:
-            test_df = pd.read_csv(comparison_csv)
-            print(f"     📊 Records: {len(test_df):,}")
-            
-            branch_col = None
-            for col in ['branch_name', 'Branch', 'branch']:
-                if col in test_df.columns:
-                    branch_col = col
-                    break
-            if branch_col:
-                print(f"     🌿 Branches: {test_df[branch_col].nunique()}")
-            
-            cat_col = None
-            for col in ['category', 'Category']:
-                if col in test_df.columns:
-                    cat_col = col
-                    break
-            if cat_col:
-                print(f"     📋 Categories: {test_df[cat_col].nunique()}")
-            
-            if 'year' in test_df.columns:
-                years = sorted(test_df['year'].unique())
-                print(f"     📅 Years: {', '.join(map(str, years))}")
-                
-        except Exception as e:
-            print(f"     ⚠️  Error reading: {str(e)}")
+    if comparison_df is not None:
+        print(f"  ✅ Comparison data (shared cutoff store)")
+        print(f"     📊 Records: {len(comparison_df):,}")
+        print(f"     🌿 Branches: {comparison_df['branch_name'].nunique()}")
+        print(f"     📋 Categories: {comparison_df['category'].nunique()}")
+        years = sorted(comparison_df['year'].unique())
+        print(f"     📅 Years: {', '.join(map(str, years))}")
     else:
         print(f"  ⚠️  Comparison data not found")
     
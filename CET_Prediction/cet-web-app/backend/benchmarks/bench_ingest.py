@@ -0,0 +1,56 @@
+"""
+Cutoff CSV ingestion benchmark
+
+Reads data/cutoff_trends/*.csv through DataRepository.load_yearly_cutoffs
+sequentially and with the thread pool, and prints rows/sec for each.
+
+Usage (from backend/):
+    python benchmarks/bench_ingest.py [--repeat 5] [--chunk-rows 50000]
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_repository import DataRepository
+
+
+def run(workers: int, repeat: int, chunk_rows: int) -> dict:
+    rates = []
+    rows = 0
+    for _ in range(repeat):
+        repository = DataRepository()
+        repository.CUTOFF_CHUNK_ROWS = chunk_rows
+        df = repository.load_yearly_cutoffs(workers=workers)
+        rows = len(df)
+        rates.append(repository.ingest_report['rows_per_sec'])
+    return {
+        'workers': workers,
+        'rows': rows,
+        'median_rows_per_sec': statistics.median(rates),
+        'best_rows_per_sec': max(rates),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cutoff CSV ingestion throughput')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--chunk-rows', type=int, default=DataRepository.CUTOFF_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    results = [
+        run(workers, args.repeat, args.chunk_rows)
+        for workers in (1, DataRepository.CUTOFF_INGEST_WORKERS)
+    ]
+
+    print("\n📊 Cutoff ingestion throughput")
+    for result in results:
+        print(f"   workers={result['workers']}: {result['rows']} rows, "
+              f"median {result['median_rows_per_sec']:,.0f} rows/sec, "
+              f"best {result['best_rows_per_sec']:,.0f} rows/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Option form store benchmark
+
+Starts several processes (like gunicorn workers), each with a pool of request
+threads, against one temporary SQLite database. Every simulated editor loads
+its form and saves it back with the version it read, so the run exercises
+WAL reads, batched commits and optimistic version checks together.
+
+Usage (from backend/):
+    python benchmarks/bench_optionform.py [--processes 4] [--threads 32] [--users 2000] [--rounds 5]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.option_form_store import OptionFormStore, VersionConflict
+
+
+def _form(user_id: str, size: int, round_no: int) -> list:
+    return [
+        {'college_code': str(1000 + i), 'college_name': f'College {i}', 'branch': 'Computer Engineering',
+         'city': 'Pune', 'quota_category': 'GOPENS', 'note': f'{user_id}/{round_no}'}
+        for i in range(size)
+    ]
+
+
+def _worker(path: str, users: list, threads: int, rounds: int, form_size: int, start, results):
+    store = OptionFormStore(path)
+    start.wait()  # every worker is up before the clock starts
+
+    def edit(user_id: str) -> tuple:
+        loads = saves = conflicts = 0
+        for round_no in range(rounds):
+            form = store.load(user_id)
+            loads += 1
+            version = form['version'] if form else 0
+            try:
+                store.save(user_id, _form(user_id, form_size, round_no), version)
+                saves += 1
+            except VersionConflict:
+                conflicts += 1
+        return loads, saves, conflicts
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        totals = [sum(column) for column in zip(*pool.map(edit, users))]
+    results.put(totals + [store.get_stats()['batches']])
+
+
+def run(processes: int, threads: int, users: int, rounds: int, form_size: int) -> dict:
+    directory = tempfile.mkdtemp(prefix='optionform-bench-')
+    path = os.path.join(directory, 'option_forms.sqlite3')
+    try:
+        OptionFormStore(path)  # create the schema once
+
+        user_ids = [f'user-{i}' for i in range(users)]
+        # Fresh interpreters, like separately started workers
+        context = multiprocessing.get_context('spawn')
+        start = context.Barrier(processes + 1)
+        results = context.Queue()
+        workers = [
+            context.Process(target=_worker, args=(
+                path, user_ids[i::processes], threads, rounds, form_size, start, results))
+            for i in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        start.wait()
+        started = time.perf_counter()
+        totals = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        loads, saves, conflicts, batches = (sum(column) for column in zip(*totals))
+        return {
+            'processes': processes,
+            'threads': threads,
+            'editors': processes * threads,
+            'loads': loads,
+            'saves': saves,
+            'conflicts': conflicts,
+            'batches': batches,
+            'seconds': elapsed,
+            'loads_per_sec': loads / elapsed,
+            'saves_per_sec': saves / elapsed,
+            'forms': OptionFormStore(path).get_stats()['forms'],
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Option form save/load throughput')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--form-size', type=int, default=50)
+    args = parser.parse_args()
+
+    result = run(args.processes, args.threads, args.users, args.rounds, args.form_size)
+
+    print("\n📊 Option form store throughput")
+    print(f"   {result['processes']} processes x {result['threads']} threads "
+          f"({result['editors']} concurrent editors), {args.form_size} colleges per form")
+    print(f"   loads: {result['loads']:,} ({result['loads_per_sec']:,.0f}/sec)")
+    print(f"   saves: {result['saves']:,} ({result['saves_per_sec']:,.0f}/sec) "
+          f"in {result['batches']:,} batches, {result['conflicts']} conflicts")
+    print(f"   {result['forms']:,} forms stored, {result['seconds']:.2f}s total")
+
+
+if __name__ == '__main__':
+    main()
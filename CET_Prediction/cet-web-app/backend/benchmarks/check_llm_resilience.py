@@ -0,0 +1,153 @@
+"""
+Chatbot resilience check against the fake LLM server
+
+Starts benchmarks/fake_llm_server.py in-process with injected latency, points
+ChatbotService at it over REST and checks the bounded executor:
+
+1. Rejection: a burst larger than workers + queue gets answers for what fits
+   and the busy reply at once for the rest; the upstream never sees more
+   than max_in_flight concurrent calls
+2. Queue timeout: a call still queued when its timeout passes gets the busy
+   reply and is not counted against the circuit breaker
+3. Breaker: consecutive upstream timeouts open it, the next call falls back
+   without reaching the upstream, and after the reset interval one trial
+   closes it again
+
+Exits non-zero if any check fails.
+
+Usage (from backend/):
+    python benchmarks/check_llm_resilience.py [--port 8089]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm_server import FakeLLMState, serve
+
+
+def _service(port: int, max_in_flight: int, max_queue: int, timeout: float,
+             breaker_failures: int = 100, breaker_reset: float = 30.0):
+    """ChatbotService on the fake server with the given executor limits"""
+    os.environ.update({
+        'GEMINI_API_ENDPOINT': f'http://127.0.0.1:{port}',
+        'GEMINI_API_KEY': 'fake-key-for-local-server',
+        'CHATBOT_STANDIN': '0',
+        'LLM_MAX_IN_FLIGHT': str(max_in_flight),
+        'LLM_MAX_QUEUE': str(max_queue),
+        'LLM_TIMEOUT_SECONDS': str(timeout),
+        'LLM_BREAKER_FAILURES': str(breaker_failures),
+        'LLM_BREAKER_RESET_SECONDS': str(breaker_reset),
+    })
+    from services.chatbot_service import ChatbotService
+    return ChatbotService()
+
+
+def _ask(service, question: str):
+    """(reply, seconds)"""
+    start = time.perf_counter()
+    reply = service.get_response(question, [])
+    return reply, time.perf_counter() - start
+
+
+def _drain(state: FakeLLMState, limit: float = 30.0):
+    """Wait for calls abandoned by earlier checks to finish upstream"""
+    deadline = time.monotonic() + limit
+    while state.snapshot()['in_flight'] and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def expect(self, name: str, ok: bool, detail: str):
+        print(f"   {'✅' if ok else '❌'} {name}: {detail}")
+        if not ok:
+            self.failed += 1
+
+
+def check_rejection(state: FakeLLMState, port: int, checks: Checks):
+    print("\n1. Burst of 6 against 2 workers + 1 queue slot (latency 1s, timeout 3s)")
+    state.latency, state.jitter, state.max_in_flight = 1.0, 0.0, 0
+    service = _service(port, max_in_flight=2, max_queue=1, timeout=3)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda i: _ask(service, f'burst question {i}'), range(6)))
+
+    busy = [seconds for reply, seconds in results if reply == service._busy_response()]
+    answered = [seconds for reply, seconds in results if 'fake LLM' in reply]
+    stats = service.executor.get_stats()
+    checks.expect('answered', len(answered) == 3, f"{len(answered)} of 6 (2 running + 1 queued)")
+    checks.expect('rejected at once', len(busy) == 3 and max(busy) < 0.2,
+                  f"{len(busy)} busy replies, slowest {max(busy, default=0):.3f}s")
+    checks.expect('upstream concurrency', state.snapshot()['max_in_flight'] <= 2,
+                  f"max {state.snapshot()['max_in_flight']} concurrent upstream calls")
+    checks.expect('breaker untouched', stats['breaker']['state'] == 'closed', stats['breaker']['state'])
+
+
+def check_queue_timeout(state: FakeLLMState, port: int, checks: Checks):
+    print("\n2. Queued call times out behind slow calls (latency 4s, timeout 2s)")
+    state.latency = 4.0
+    service = _service(port, max_in_flight=2, max_queue=1, timeout=2)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        running = [pool.submit(_ask, service, f'slow question {i}') for i in range(2)]
+        time.sleep(0.2)  # both workers are busy before the third call queues
+        queued = pool.submit(_ask, service, 'queued question')
+        results = [future.result() for future in running]
+        queued_reply, _ = queued.result()
+
+    stats = service.executor.get_stats()
+    checks.expect('running calls time out', all(reply == service._fallback_response() for reply, _ in results),
+                  f"{stats['timeouts']} upstream timeouts")
+    checks.expect('queued call is busy', queued_reply == service._busy_response() and stats['queue_timeouts'] == 1,
+                  f"{stats['queue_timeouts']} queue timeout")
+    checks.expect('breaker charged for upstream only', stats['breaker']['consecutive_failures'] == 2,
+                  f"{stats['breaker']['consecutive_failures']} consecutive failures")
+    _drain(state)
+
+
+def check_breaker(state: FakeLLMState, port: int, checks: Checks):
+    print("\n3. Breaker opens after 3 upstream timeouts and closes after the reset (latency 2s, timeout 0.5s)")
+    state.latency = 2.0
+    service = _service(port, max_in_flight=4, max_queue=0, timeout=0.5, breaker_failures=3, breaker_reset=2)
+    for i in range(3):
+        _ask(service, f'timeout question {i}')
+    checks.expect('opened', service.executor.breaker.state == 'open', service.executor.breaker.state)
+
+    sent = state.snapshot()['requests']
+    reply, seconds = _ask(service, 'while open')
+    checks.expect('short-circuited', reply == service._fallback_response() and seconds < 0.05
+                  and state.snapshot()['requests'] == sent, f"fallback in {seconds * 1000:.1f}ms, nothing sent")
+
+    state.latency = 0.1
+    _drain(state)
+    time.sleep(2)
+    reply, seconds = _ask(service, 'after reset')
+    checks.expect('closed after trial', 'fake LLM' in reply and service.executor.breaker.state == 'closed',
+                  f"answered in {seconds:.2f}s, breaker {service.executor.breaker.state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chatbot executor checks against the fake LLM server')
+    parser.add_argument('--port', type=int, default=8089)
+    args = parser.parse_args()
+
+    state = FakeLLMState(latency=1.0, jitter=0.0, error_rate=0.0, chunks=4, chunk_delay=0.0)
+    server = serve(args.port, state)
+    checks = Checks()
+    try:
+        check_rejection(state, args.port, checks)
+        check_queue_timeout(state, args.port, checks)
+        check_breaker(state, args.port, checks)
+    finally:
+        server.shutdown()
+
+    print(f"\n{'✅ All checks passed' if not checks.failed else f'❌ {checks.failed} check(s) failed'}")
+    sys.exit(1 if checks.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Local stand-in for the Gemini REST API with injected latency and errors
+
+Answers generateContent (and streamGenerateContent, one JSON array element
+per chunk) for any model after a configurable delay. Point the backend at
+it with:
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8089 GEMINI_API_KEY=fake python app.py
+
+The REST transport of google-generativeai 0.3.2 reads a streamed response
+whole before iterating it, so through GEMINI_API_ENDPOINT /api/chatbot/chat/stream
+delivers the reply in one burst (the default gRPC transport streams chunk by
+chunk). Use CHATBOT_STANDIN=1 (services/standin_llm.py) to test streaming
+timing in-process.
+
+Latency and error rate can be changed while it runs:
+    curl 'http://127.0.0.1:8089/control?latency=5&error_rate=0.5'
+
+Usage (from backend/):
+    python benchmarks/fake_llm_server.py [--port 8089] [--latency 0.5] [--jitter 0.1]
+        [--error-rate 0] [--chunks 8] [--chunk-delay 0.05]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeLLMState:
+    """Knobs shared by every request thread"""
+
+    def __init__(self, latency: float, jitter: float, error_rate: float, chunks: int, chunk_delay: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                'latency': self.latency, 'jitter': self.jitter, 'error_rate': self.error_rate,
+                'chunks': self.chunks, 'chunk_delay': self.chunk_delay,
+                'requests': self.requests, 'in_flight': self.in_flight, 'max_in_flight': self.max_in_flight,
+            }
+
+
+def _candidate(text: str, finished: bool) -> dict:
+    candidate = {'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}
+    if finished:
+        candidate['finishReason'] = 'STOP'
+    return {'candidates': [candidate]}
+
+
+def make_handler(state: FakeLLMState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _json(self, status: int, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/control':
+                return self._json(404, {'error': {'code': 404, 'message': 'Not found'}})
+            params = parse_qs(url.query)
+            with state.lock:
+                for name in ('latency', 'jitter', 'error_rate', 'chunk_delay'):
+                    if name in params:
+                        setattr(state, name, float(params[name][0]))
+                if 'chunks' in params:
+                    state.chunks = int(params['chunks'][0])
+            self._json(200, state.snapshot())
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            path = urlparse(self.path).path
+            if not path.endswith((':generateContent', ':streamGenerateContent')):
+                return self._json(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+            with state.lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                latency = max(0.0, state.latency + random.uniform(-state.jitter, state.jitter))
+                fail = random.random() < state.error_rate
+                chunks, chunk_delay = max(1, state.chunks), state.chunk_delay
+            try:
+                time.sleep(latency)
+                if fail:
+                    return self._json(503, {'error': {'code': 503, 'message': 'Injected upstream failure',
+                                                      'status': 'UNAVAILABLE'}})
+
+                prompt = ''.join(part.get('text', '') for content in request.get('contents', [])
+                                 for part in content.get('parts', []))
+                question = prompt.rsplit('Student:', 1)[-1].split('\n')[0].strip()[:80]
+                words = f"(fake LLM) You asked: {question}. Here is a reply in {chunks} parts.".split()
+                size = -(-len(words) // chunks)
+                parts = [' '.join(words[i:i + size]) for i in range(0, len(words), size)]
+
+                if path.endswith(':generateContent'):
+                    return self._json(200, _candidate(' '.join(parts), True))
+
+                # Streamed JSON array, one element per chunk
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for i, text in enumerate(parts):
+                    element = ('[' if i == 0 else ',\r\n') + json.dumps(_candidate(text + ' ', i == len(parts) - 1))
+                    if i == len(parts) - 1:
+                        element += ']'
+                    data = element.encode('utf-8')
+                    self.wfile.write(f'{len(data):X}\r\n'.encode() + data + b'\r\n')
+                    self.wfile.flush()
+                    if i < len(parts) - 1:
+                        time.sleep(chunk_delay)
+                self.wfile.write(b'0\r\n\r\n')
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+    return Handler
+
+
+def serve(port: int, state: FakeLLMState) -> ThreadingHTTPServer:
+    """Start the server on a daemon thread and return it"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-llm', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Gemini REST server with injected latency')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds before the first byte')
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--chunks', type=int, default=8, help='stream chunks per reply')
+    parser.add_argument('--chunk-delay', type=float, default=0.05, help='seconds between stream chunks')
+    args = parser.parse_args()
+
+    state = FakeLLMState(args.latency, args.jitter, args.error_rate, args.chunks, args.chunk_delay)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(state))
+    server.daemon_threads = True
+    print(f"🚀 Fake LLM on http://127.0.0.1:{args.port} (latency {args.latency}s, error rate {args.error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,10 @@
 # backend/routes/chatbot_route.py
 
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, Response, request, jsonify
 from services.chatbot_service import ChatbotService
-from typing import Dict, List
+from services.conversation_store import create_conversation_store
 
 chatbot_bp = Blueprint('chatbot', __name__)
 
@@ -23,8 +25,58 @@ except Exception as e:
     traceback.print_exc()
     chatbot_service = None
 
-# In-memory conversation storage (session-based)
-conversations: Dict[str, List[Dict]] = {}
+# Bounded conversation storage (session-based; see services/conversation_store.py)
+conversations = create_conversation_store()
+
+MAX_SESSION_ID_LENGTH = 128
+
+
+def _parse_chat_request():
+    """
+    Validated (message, session_id) from the request body
+
+    Returns:
+        ((message, session_id), None) or (None, (error response, status))
+    """
+    # Check if service is available
+    if not chatbot_service:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Chatbot service not initialized',
+            'response': 'Sorry, the chatbot service is currently unavailable.'
+        }), 503)
+
+    # Get request data
+    data = request.get_json()
+
+    if not data:
+        return None, (jsonify({
+            'success': False,
+            'error': 'No data provided'
+        }), 400)
+
+    message = data.get('message', '').strip()
+    session_id = str(data.get('sessionId') or 'default')
+    if len(session_id) > MAX_SESSION_ID_LENGTH:
+        return None, (jsonify({
+            'success': False,
+            'error': f'sessionId must be at most {MAX_SESSION_ID_LENGTH} characters'
+        }), 400)
+
+    # Validate message
+    is_valid, error_msg = chatbot_service.validate_message(message)
+    if not is_valid:
+        return None, (jsonify({
+            'success': False,
+            'error': error_msg
+        }), 400)
+
+    return (message, session_id), None
+
+
+def _sse(event: str, payload: dict) -> str:
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
 
 
 @chatbot_bp.route('/health', methods=['GET'])
@@ -34,14 +86,18 @@ def health():
         return jsonify({
             'status': 'healthy',
             'service': 'operational',
-            'message': 'Chatbot service is running'
+            'message': 'Chatbot service is running',
+            'conversations': conversations.get_stats(),
+            'llm': chatbot_service.executor.get_stats()
         }), 200
     else:
         return jsonify({
             'status': 'unavailable',
             'service': 'not_configured',
             'message': 'Chatbot service requires GEMINI_API_KEY configuration',
-            'instruction': 'Add GEMINI_API_KEY to backend/.env file'
+            'instruction': 'Add GEMINI_API_KEY to backend/.env file',
+            'conversations': conversations.get_stats(),
+            'llm': chatbot_service.executor.get_stats() if chatbot_service else None
         }), 503
 
 
@@ -101,39 +157,13 @@ def get_quick_replies():
 def chat():
     """Main chat endpoint"""
     try:
-        # Check if service is available
-        if not chatbot_service:
-            return jsonify({
-                'success': False,
-                'error': 'Chatbot service not initialized',
-                'response': 'Sorry, the chatbot service is currently unavailable.'
-            }), 503
-
-        # Get request data
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No data provided'
-            }), 400
-
-        message = data.get('message', '').strip()
-        session_id = data.get('sessionId', 'default')
-
-        # Validate message
-        is_valid, error_msg = chatbot_service.validate_message(message)
-        if not is_valid:
-            return jsonify({
-                'success': False,
-                'error': error_msg
-            }), 400
-
-        # Get or create conversation history
-        if session_id not in conversations:
-            conversations[session_id] = []
+        parsed, error = _parse_chat_request()
+        if error:
+            return error
+        message, session_id = parsed
 
-        conversation_history = conversations[session_id]
+        # Conversation history (empty for new or expired sessions)
+        conversation_history = conversations.get_history(session_id)
 
         # Get AI response
         response = chatbot_service.get_response(
@@ -141,21 +171,10 @@ def chat():
             conversation_history=conversation_history
         )
 
-        # Update conversation history
-        conversation_history.append({
-            'role': 'user',
-            'content': message,
-            'timestamp': None
-        })
-        conversation_history.append({
-            'role': 'assistant',
-            'content': response,
-            'timestamp': None
-        })
-
-        # Keep only last 20 messages
-        if len(conversation_history) > 20:
-            conversations[session_id] = conversation_history[-20:]
+        # Update conversation history (the store keeps the last 20 messages);
+        # canned busy/fallback replies are not fed back to the model as context
+        if response.from_model:
+            conversations.append(session_id, [('user', message), ('assistant', response)])
 
         return jsonify({
             'success': True,
@@ -176,16 +195,71 @@ def chat():
         }), 500
 
 
+@chatbot_bp.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming chat endpoint (server-sent events)
+
+    Same body as /chat. The reply arrives as it is generated:
+        event: delta    data: {"text": "..."}         (one per chunk)
+        event: done     data: {"success": true, "response": "<full reply>", "sessionId": "...", "configured": true}
+        event: error    data: {"success": false, "error": "..."}
+    The conversation history is updated once the reply is complete and came
+    from the model; a client that disconnects early, or a busy/fallback
+    reply, leaves it unchanged.
+    """
+    try:
+        parsed, error = _parse_chat_request()
+        if error:
+            return error
+        message, session_id = parsed
+
+        conversation_history = conversations.get_history(session_id)
+
+        def events():
+            try:
+                pieces = []
+                for text in chatbot_service.stream_response(message, conversation_history):
+                    pieces.append(text)
+                    yield _sse('delta', {'text': text})
+
+                response = ''.join(pieces).strip()
+                # Only complete model replies go into the history (no canned or cut-off ones)
+                if pieces and all(piece.from_model for piece in pieces):
+                    conversations.append(session_id, [('user', message), ('assistant', response)])
+                yield _sse('done', {
+                    'success': True,
+                    'response': response,
+                    'sessionId': session_id,
+                    'configured': chatbot_service.is_configured
+                })
+            except Exception as e:
+                print(f"❌ Error in chat stream: {str(e)}")
+                yield _sse('error', {'success': False, 'error': 'Failed to process message'})
+
+        return Response(events(), content_type='text/event-stream; charset=utf-8', headers={
+            'Cache-Control': 'no-cache',
+            # Let nginx pass events through as they are written
+            'X-Accel-Buffering': 'no'
+        })
+
+    except Exception as e:
+        print(f"❌ Error in chat stream endpoint: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to process message'
+        }), 500
+
+
 @chatbot_bp.route('/clear', methods=['POST'])
 def clear_conversation():
     """Clear conversation history"""
     try:
         # ✅ FIX: Handle both JSON and no-body requests
         data = request.get_json(silent=True) or {}
-        session_id = data.get('sessionId', 'default')
+        session_id = str(data.get('sessionId') or 'default')
 
-        if session_id in conversations:
-            del conversations[session_id]
+        if conversations.clear(session_id):
             print(f"✅ Cleared conversation for session: {session_id}")
 
         return jsonify({
@@ -1,7 +1,6 @@
 # D:\CET_Prediction\cet-web-app\backend\routes\college_comparison_routes.py
 
-from flask import Blueprint, request, jsonify
-from flask_caching import Cache
+from flask import Blueprint, Response, request, jsonify
 import time
 import os
 import sys
@@ -9,28 +8,23 @@ import sys
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.college_comparator import CollegeComparator
+from utils.data_repository import data_repository
+from utils import comparator_cache
+from utils.comparator_cache import cache
+from utils.response_cache import response_cache
+from utils.cache_warmup import cache_warmer
+from utils.encoded_responses import encoded_responses
+from utils.pagination import PaginationError, page_metadata, parse_page_request, wants_page
 
 college_comparison_bp = Blueprint('college_comparison', __name__)
 
-# Initialize cache
-cache = Cache(config={
-    'CACHE_TYPE': 'simple',
-    'CACHE_DEFAULT_TIMEOUT': 300
-})
-
 # Initialize comparator globally
 print("\n" + "="*60)
 print("🔧 Initializing College Comparator...")
 print("="*60)
 
 try:
-    comparator = CollegeComparator(
-        merged_data_path='data/merged_cutoff_2021_2025.csv',
-        individual_data_dir='data/cutoff_trends',
-        colleges_url_path='data/Colleges_URL.xlsx',
-        main_data_path='data/flattened_CAP_data done.xlsx'
-    )
+    comparator = data_repository.get_comparator()
     print("✅ College Comparator initialized successfully")
 except Exception as e:
     print(f"❌ Failed to initialize College Comparator: {e}")
@@ -38,19 +32,35 @@ except Exception as e:
     traceback.print_exc()
     comparator = None
 
+comparator_generation = data_repository.generation
+
 print("="*60 + "\n")
 
+
+@college_comparison_bp.before_request
+def sync_comparator():
+    """Pick up the rebuilt comparator after a data reload"""
+    global comparator, comparator_generation
+    if comparator_generation != data_repository.generation:
+        comparator = data_repository.get_comparator()
+        comparator_generation = data_repository.generation
+
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
 @college_comparison_bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (includes cache warmup progress)"""
     return jsonify({
-        'status': 'ok',
+        'status': 'ok' if cache_warmer.ready else 'warming_up',
+        'ready': cache_warmer.ready,
+        'warmup': cache_warmer.get_status(),
         'timestamp': time.time(),
         'message': 'College comparison service is running',
-        'comparator_loaded': comparator is not None
+        'comparator_loaded': comparator is not None,
+        'cache': comparator_cache.get_cache_stats(),
+        'response_cache': response_cache.get_stats(),
+        'encoded_responses': encoded_responses.get_stats()
     }), 200
 
 # ============================================================================
@@ -58,7 +68,12 @@ def health_check():
 # ============================================================================
 @college_comparison_bp.route('/colleges', methods=['GET'])
 def get_colleges():
-    """Get all colleges with optional city/type filters"""
+    """
+    Get all colleges with optional city/type filters
+    
+    With limit/offset/cursor/fields (or a name filter) a page is returned:
+    {colleges, total, offset, limit, next_cursor}; fields= projects columns.
+    """
     try:
         if comparator is None:
             return jsonify({'error': 'Comparator not initialized'}), 500
@@ -67,19 +82,38 @@ def get_colleges():
         
         filters = {
             'city': request.args.get('city'),
-            'type': request.args.get('type')
+            'type': request.args.get('type'),
+            'name': request.args.get('name')
         }
         # Remove None values
         filters = {k: v for k, v in filters.items() if v}
         
+        if filters.get('name') or wants_page(request.args):
+            # Totals and pages come from the catalog indexes
+            version = data_repository.generation
+            page = parse_page_request(request.args, version, comparator.college_catalog.columns.tolist(),
+                                      filters)
+            colleges, total = comparator.query_catalog(page['filters'], page['offset'], page['limit'],
+                                                       page['fields'])
+            return jsonify({
+                'colleges': colleges,
+                **page_metadata(total, page, version)
+            }), 200
+        
         print(f"📡 Getting colleges with filters: {filters}")
-        colleges = comparator.get_all_colleges(filters)
+        colleges_json = comparator.get_all_colleges_json(filters)
         
         elapsed = time.time() - start_time
-        print(f"✅ Returned {len(colleges)} colleges in {elapsed:.2f}s")
+        print(f"✅ Returned colleges in {elapsed:.4f}s")
         
-        return jsonify(colleges), 200
+        response = Response(colleges_json, status=200, mimetype='application/json')
+        if not filters:
+            # Unfiltered catalog only changes on data reload
+            response.headers['Cache-Control'] = 'public, max-age=300'
+        return response
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error in get_colleges: {e}")
         import traceback
@@ -100,6 +134,8 @@ def search_colleges():
         if not query:
             return jsonify([]), 200
         
+        limit = request.args.get('limit', type=int)
+        
         filters = {
             'city': request.args.get('city'),
             'type': request.args.get('type')
@@ -107,10 +143,9 @@ def search_colleges():
         filters = {k: v for k, v in filters.items() if v}
         
         print(f"🔍 Searching colleges: '{query}' with filters: {filters}")
-        colleges = comparator.search_colleges(query, filters)
+        colleges_json = comparator.search_colleges_json(query, filters, limit)
         
-        print(f"✅ Found {len(colleges)} colleges")
-        return jsonify(colleges), 200
+        return Response(colleges_json, status=200, mimetype='application/json')
         
     except Exception as e:
         print(f"❌ Error in search_colleges: {e}")
@@ -141,7 +176,7 @@ def get_branches():
             # Get branches for each college
             branches_by_college = []
             for code in college_codes:
-                college_branches = comparator.get_available_branches([code])
+                college_branches = comparator_cache.get_available_branches(code)
                 branches_by_college.append(set(college_branches))
                 print(f"   {code}: {len(college_branches)} branches")
             
@@ -153,10 +188,10 @@ def get_branches():
             else:
                 branches = []
         else:
-            # Get all available branches
-            print(f"🌿 Getting all available branches")
-            branches = comparator.get_available_branches()
-            print(f"✅ Found {len(branches)} branches")
+            # All branches: pre-encoded once per data generation
+            return encoded_responses.respond(
+                'branches', data_repository.generation, comparator_cache.get_available_branches
+            )
         
         elapsed = time.time() - start_time
         print(f"   Completed in {elapsed:.2f}s")
@@ -192,7 +227,7 @@ def get_categories():
             # Get categories for each college
             categories_by_college = []
             for code in college_codes:
-                college_categories = comparator.get_available_categories([code], branch)
+                college_categories = comparator_cache.get_available_categories(code, branch)
                 categories_by_college.append(set(college_categories))
                 print(f"   {code}: {len(college_categories)} categories")
             
@@ -204,10 +239,10 @@ def get_categories():
             else:
                 categories = []
         else:
-            # Get all available categories
-            print(f"📋 Getting all available categories")
-            categories = comparator.get_available_categories()
-            print(f"✅ Found {len(categories)} categories")
+            # All categories: pre-encoded once per data generation
+            return encoded_responses.respond(
+                'categories', data_repository.generation, comparator_cache.get_available_categories
+            )
         
         elapsed = time.time() - start_time
         print(f"   Completed in {elapsed:.2f}s")
@@ -230,13 +265,9 @@ def get_cities():
         if comparator is None:
             return jsonify({'error': 'Comparator not initialized'}), 500
         
-        start_time = time.time()
-        cities = comparator.get_available_cities()
-        
-        elapsed = time.time() - start_time
-        print(f"✅ Returned {len(cities)} cities in {elapsed:.2f}s")
-        
-        return jsonify(cities), 200
+        return encoded_responses.respond(
+            'cities', data_repository.generation, comparator.get_available_cities
+        )
     except Exception as e:
         print(f"❌ Error in get_cities: {e}")
         import traceback
@@ -253,8 +284,9 @@ def get_types():
         if comparator is None:
             return jsonify({'error': 'Comparator not initialized'}), 500
         
-        types = comparator.get_college_types()
-        return jsonify(types), 200
+        return encoded_responses.respond(
+            'types', data_repository.generation, comparator.get_college_types
+        )
     except Exception as e:
         print(f"❌ Error in get_types: {e}")
         return jsonify({'error': str(e)}), 500
@@ -282,37 +314,60 @@ def compare_colleges():
                 'required': ['college_codes', 'branch', 'category']
             }), 400
         
-        print(f"\n📊 Comparing colleges:")
-        print(f"   Colleges: {college_codes}")
-        print(f"   Branch: {branch}")
-        print(f"   Category: {category}")
-        
-        comparison_data = comparator.compare_colleges(college_codes, branch, category)
+        college_codes = [str(code).strip() for code in college_codes]
+        branch = str(branch).strip()
+        category = str(category).strip().upper()
         
-        # Debug: Check what data we got
-        total_records = 0
-        for code, data_list in comparison_data.items():
-            if data_list:
-                years = [d['year'] for d in data_list]
-                print(f"   {code}: {len(data_list)} records, years: {years}")
-                total_records += len(data_list)
-            else:
-                print(f"   {code}: ⚠️ NO DATA FOUND")
-        
-        elapsed = time.time() - start_time
-        print(f"✅ Comparison completed in {elapsed:.2f}s")
-        print(f"   Total records: {total_records}\n")
-        
-        return jsonify({
-            'comparison_data': comparison_data,
-            'metadata': {
-                'branch': branch,
-                'category': category,
-                'colleges_compared': len(college_codes),
-                'total_records': total_records,
-                'timestamp': time.time()
-            }
-        }), 200
+        def build():
+            print(f"\n📊 Comparing colleges:")
+            print(f"   Colleges: {college_codes}")
+            print(f"   Branch: {branch}")
+            print(f"   Category: {category}")
+            
+            comparison_data = comparator_cache.compare_colleges(college_codes, branch, category)
+            
+            # Debug: Check what data we got
+            total_records = 0
+            for code, data_list in comparison_data.items():
+                if data_list:
+                    years = [d['year'] for d in data_list]
+                    print(f"   {code}: {len(data_list)} records, years: {years}")
+                    total_records += len(data_list)
+                else:
+                    print(f"   {code}: ⚠️ NO DATA FOUND")
+            
+            elapsed = time.time() - start_time
+            print(f"✅ Comparison completed in {elapsed:.2f}s")
+            print(f"   Total records: {total_records}\n")
+            
+            # Next-year forecast for each compared branch (O(1) lookups)
+            forecaster = data_repository.get_forecaster()
+            forecasts = {}
+            for code, data_list in comparison_data.items():
+                branch_codes = dict.fromkeys(d.get('branch_code') for d in data_list if d.get('branch_code'))
+                forecasts[code] = [
+                    forecast for forecast in (forecaster.get(code, b, category) for b in branch_codes)
+                    if forecast is not None
+                ]
+            
+            return jsonify({
+                'comparison_data': comparison_data,
+                'forecasts': forecasts,
+                'metadata': {
+                    'branch': branch,
+                    'category': category,
+                    'colleges_compared': len(college_codes),
+                    'total_records': total_records,
+                    'timestamp': time.time()
+                }
+            }), 200
+        
+        return response_cache.json_response(
+            'compare',
+            {'college_codes': college_codes, 'branch': branch, 'category': category},
+            build,
+            replay_fields=('college_codes', 'branch', 'category')
+        )
         
     except Exception as e:
         print(f"❌ Error in compare_colleges: {e}")
@@ -330,12 +385,12 @@ def get_college_by_code(college_code):
         if comparator is None:
             return jsonify({'error': 'Comparator not initialized'}), 500
         
-        stats = comparator.get_college_stats(college_code)
+        stats_json = comparator.get_college_stats_json(college_code)
         
-        if not stats:
+        if not stats_json:
             return jsonify({'error': 'College not found'}), 404
         
-        return jsonify(stats), 200
+        return Response(stats_json, status=200, mimetype='application/json')
         
     except Exception as e:
         print(f"❌ Error in get_college_by_code: {e}")
@@ -351,17 +406,58 @@ def get_college_stats(college_code):
         if comparator is None:
             return jsonify({'error': 'Comparator not initialized'}), 500
         
-        stats = comparator.get_college_stats(college_code)
+        stats_json = comparator.get_college_stats_json(college_code)
         
-        if not stats:
+        if not stats_json:
             return jsonify({'error': 'College not found'}), 404
         
-        return jsonify(stats), 200
+        return Response(stats_json, status=200, mimetype='application/json')
         
     except Exception as e:
         print(f"❌ Error in get_college_stats: {e}")
         return jsonify({'error': str(e)}), 500
 
+# ============================================================================
+# GET STATS FOR MULTIPLE COLLEGES
+# ============================================================================
+
+# Most distinct codes one bulk stats request may ask for
+MAX_BULK_STATS_CODES = 100
+
+def get_bulk_college_stats():
+    """
+    Get precomputed statistics for several colleges in one call
+    Query: ?codes=1002,3012,6006 (at most MAX_BULK_STATS_CODES distinct codes)
+    
+    NOTE: `/api/colleges/stats` is owned by the directory blueprint (registered
+    first); it delegates here when a `codes` parameter is supplied.
+    """
+    try:
+        if comparator is None:
+            return jsonify({'error': 'Comparator not initialized'}), 500
+        
+        codes_str = request.args.get('codes', '')
+        college_codes = list(dict.fromkeys(c.strip() for c in codes_str.split(',') if c.strip()))
+        
+        if not college_codes:
+            return jsonify({
+                'error': 'Missing required parameters',
+                'required': ['codes']
+            }), 400
+        
+        if len(college_codes) > MAX_BULK_STATS_CODES:
+            return jsonify({
+                'error': f'At most {MAX_BULK_STATS_CODES} college codes per request',
+                'requested': len(college_codes)
+            }), 400
+        
+        body = comparator.get_bulk_college_stats_json(college_codes)
+        return Response(body, status=200, mimetype='application/json')
+        
+    except Exception as e:
+        print(f"❌ Error in get_bulk_college_stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # ============================================================================
 # GET CUTOFF TRENDS
 # ============================================================================
@@ -381,24 +477,69 @@ def get_cutoff_trends(college_code):
                 'required': ['branch', 'category']
             }), 400
         
-        print(f"📈 Getting trends for {college_code}, {branch}, {category}")
+        def build():
+            print(f"📈 Getting trends for {college_code}, {branch}, {category}")
+            
+            data = comparator_cache.get_college_data(college_code, branch, category)
+            
+            if not data:
+                return jsonify({
+                    'error': 'No data found',
+                    'college_code': college_code,
+                    'branch': branch,
+                    'category': category
+                }), 404
+            
+            return jsonify(data), 200
+        
+        return response_cache.json_response(
+            'trends',
+            {'college_code': comparator_cache.canonical_code(college_code),
+             'branch': branch.strip(), 'category': category.strip().upper()},
+            build
+        )
         
-        data = comparator.get_college_data(college_code, branch, category)
+    except Exception as e:
+        print(f"❌ Error in get_cutoff_trends: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# GET CUTOFF FORECAST
+# ============================================================================
+@college_comparison_bp.route('/colleges/<college_code>/forecast', methods=['GET'])
+def get_cutoff_forecast(college_code):
+    """Next-year cutoff forecasts for a college (optionally one category / branch code)"""
+    try:
+        forecaster = data_repository.get_forecaster()
+        category = request.args.get('category')
+        branch_code = request.args.get('branch_code')
+        
+        if branch_code and category:
+            forecast = forecaster.get(college_code, branch_code, category)
+            forecasts = [forecast] if forecast else []
+        else:
+            forecasts = forecaster.get_for_college(college_code, category)
+            if branch_code:
+                forecasts = [f for f in forecasts if f['branch_code'] == data_repository.canonical_code(branch_code)]
         
-        if not data:
+        if not forecasts:
             return jsonify({
-                'error': 'No data found',
+                'error': 'No forecast found',
                 'college_code': college_code,
-                'branch': branch,
-                'category': category
+                'category': category,
+                'branch_code': branch_code
             }), 404
         
-        return jsonify(data), 200
+        return jsonify({
+            'college_code': college_code,
+            'forecast_year': forecaster.forecast_year,
+            'forecasts': forecasts
+        }), 200
         
     except Exception as e:
-        print(f"❌ Error in get_cutoff_trends: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"❌ Error in get_cutoff_forecast: {e}")
         return jsonify({'error': str(e)}), 500
 
 # ============================================================================
@@ -420,14 +561,70 @@ def get_trend_analysis(college_code):
                 'required': ['branch', 'category']
             }), 400
         
-        analysis = comparator.get_trend_analysis(college_code, branch, category)
-        
-        return jsonify(analysis), 200
+        return response_cache.json_response(
+            'trend_analysis',
+            {'college_code': comparator_cache.canonical_code(college_code),
+             'branch': branch.strip(), 'category': category.strip().upper()},
+            lambda: (jsonify(comparator_cache.get_trend_analysis(college_code, branch, category)), 200)
+        )
         
     except Exception as e:
         print(f"❌ Error in get_trend_analysis: {e}")
         return jsonify({'error': str(e)}), 500
 
+# ============================================================================
+# GET TOP MOVERS (precomputed series trends)
+# ============================================================================
+@college_comparison_bp.route('/trends/top-movers', methods=['GET'])
+def get_top_movers():
+    """
+    College-branch series with the largest competition change for a category
+    
+    Query params:
+        category (required), direction ('increasing' | 'decreasing'),
+        city, type, branch, min_rank, limit (default 20, max 200)
+    """
+    try:
+        if comparator is None:
+            return jsonify({'error': 'Comparator not initialized'}), 500
+        
+        category = request.args.get('category')
+        direction = request.args.get('direction', 'increasing')
+        
+        if not category:
+            return jsonify({
+                'error': 'Missing required parameters',
+                'required': ['category']
+            }), 400
+        
+        if direction not in ('increasing', 'decreasing'):
+            return jsonify({'error': "direction must be 'increasing' or 'decreasing'"}), 400
+        
+        params = {
+            'category': category,
+            'direction': direction,
+            'city': request.args.get('city'),
+            'college_type': request.args.get('type'),
+            'branch': request.args.get('branch'),
+            'min_rank': request.args.get('min_rank', 0, type=int),
+            'limit': min(request.args.get('limit', 20, type=int), 200)
+        }
+        
+        def build():
+            movers = comparator.get_top_movers(**params)
+            return jsonify({
+                'category': category,
+                'direction': direction,
+                'count': len(movers),
+                'movers': movers
+            }), 200
+        
+        return response_cache.json_response('top_movers', params, build)
+        
+    except Exception as e:
+        print(f"❌ Error in get_top_movers: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # ============================================================================
 # GET CATEGORY INFO
 # ============================================================================
@@ -452,31 +649,61 @@ def get_category_info(category_code):
         return jsonify({'error': str(e)}), 500
 
 # ============================================================================
-# GET RECOMMENDATIONS (Future enhancement)
+# GET RECOMMENDATIONS
 # ============================================================================
 @college_comparison_bp.route('/colleges/recommendations', methods=['POST'])
 def get_recommendations():
-    """Get college recommendations based on rank and preferences"""
+    """
+    Get college recommendations based on rank and preferences
+    
+    Body:
+        rank (or percentile, converted with the latest year's table), category (required)
+        preferences: {city, branch, college_type} (optional)
+        limit (default 20, max 100), window (rank ± window, default 5000), year
+    """
     try:
         if comparator is None:
             return jsonify({'error': 'Comparator not initialized'}), 500
         
-        data = request.get_json()
+        data = request.get_json() or {}
         rank = data.get('rank')
         category = data.get('category')
         
+        # Percentile-only queries: estimate the rank first
+        if not rank and data.get('percentile') is not None and category:
+            try:
+                rank = data_repository.get_rank_converter().rank_for_percentile(
+                    float(data['percentile']), category=category
+                )
+            except (TypeError, ValueError, KeyError):
+                rank = None
+        
         if not rank or not category:
             return jsonify({
                 'error': 'Missing required parameters',
                 'required': ['rank', 'category']
             }), 400
         
-        # TODO: Implement recommendation logic
-        return jsonify({
-            'message': 'Recommendations feature coming soon',
-            'rank': rank,
-            'category': category
-        }), 501  # Not Implemented
+        try:
+            rank = int(rank)
+            limit = min(int(data.get('limit', 20)), 100)
+            window = int(data['window']) if data.get('window') is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'rank, limit and window must be integers'}), 400
+        
+        preferences = data.get('preferences') or {
+            key: data.get(key) for key in ('city', 'branch', 'college_type') if data.get(key)
+        }
+        
+        result = comparator.recommend(
+            rank, category,
+            preferences=preferences,
+            window=window,
+            limit=limit,
+            year=data.get('year')
+        )
+        result['preferences'] = preferences
+        return jsonify(result)
         
     except Exception as e:
         print(f"❌ Error in get_recommendations: {e}")
@@ -486,6 +713,6 @@ def get_recommendations():
 # INIT CACHE WITH APP
 # ============================================================================
 def init_cache(app):
-    """Initialize cache with Flask app"""
+    """Initialize the comparator read cache with the Flask app"""
     cache.init_app(app)
     print("✅ Cache initialized for college comparison blueprint")
\ No newline at end of file
@@ -1,69 +1,77 @@
 # routes/college_directory.py
 
-from flask import Blueprint, jsonify, request, current_app
-import pandas as pd
+from flask import Blueprint, jsonify, request
 import os
 from datetime import datetime
-import numpy as np
+from utils.data_repository import data_repository
+from utils.college_directory_store import DirectorySnapshot, college_directory_store
+from utils.pagination import PaginationError, page_metadata, parse_page_request, project, wants_page
+from utils.encoded_responses import encoded_responses
 
 college_directory_bp = Blueprint('college_directory', __name__)
 
 # Simple college directory - just reads your Excel file
 @college_directory_bp.route('/colleges/directory', methods=['GET'])
 def get_college_directory():
-    """Simple endpoint to get college directory data"""
+    """
+    Get college directory data
+    
+    Without parameters the whole directory is returned. With limit, offset,
+    cursor, fields, city, search (or name) or type, one page is returned:
+    {colleges, total, offset, limit, next_cursor}; the first page also
+    carries the city list.
+    """
     try:
-        # Try different file paths
-        file_paths = [
-            'data/Colleges_URL.xlsx',
-            'backend/data/Colleges_URL.xlsx',
-            os.path.join(os.path.dirname(__file__), '..', 'data', 'Colleges_URL.xlsx')
-        ]
+        found_path = data_repository.paths['college_directory']
+        directory = college_directory_store.get_snapshot()
         
-        df = None
-        found_path = None
-        
-        for path in file_paths:
-            if os.path.exists(path):
-                df = pd.read_excel(path)
-                found_path = os.path.abspath(path)
-                break
-        
-        if df is None:
+        if not directory.records:
             return jsonify({
                 'success': False,
                 'error': 'College directory file not found',
-                'searched_paths': file_paths,
+                'searched_paths': [found_path],
                 'current_dir': os.getcwd()
             }), 404
         
-        # Clean the data
-        df = df.where(pd.notna(df), '')
-        
-        # Convert to list of colleges
-        colleges = []
-        for _, row in df.iterrows():
-            college = {
-                'Sr. No': str(row.get('Sr. No', '')),
-                'College Code': str(row.get('College Code', '')).strip(),
-                'College Name': str(row.get('College Name', '')).strip(),
-                'City': str(row.get('City', '')).strip(),
-                'URL': str(row.get('URL', '')).strip()
+        filter_args = {
+            'city': request.args.get('city'),
+            'search': request.args.get('search') or request.args.get('name'),
+            'college_type': request.args.get('type'),
+        }
+        if wants_page(request.args) or any(filter_args.values()):
+            version = f'{directory.generation}.{directory.version}'
+            page = parse_page_request(request.args, version, DirectorySnapshot.FIELDS, filter_args)
+            colleges, total, snapshot = college_directory_store.query(
+                offset=page['offset'], limit=page['limit'], **page['filters']
+            )
+            body = {
+                'success': True,
+                'colleges': project(colleges, page['fields']),
+                **page_metadata(total, page, version),
+                'timestamp': snapshot.loaded_at
             }
-            colleges.append(college)
-        
-        # Get unique cities
-        cities = sorted(set([c['City'] for c in colleges if c['City']]))
+            if page['offset'] == 0:
+                body['cities'] = snapshot.cities
+            return jsonify(body)
+        
+        # Pre-encoded once per directory version; timestamp is when it was loaded
+        return encoded_responses.respond(
+            'directory', (directory.generation, directory.version),
+            lambda: {
+                'success': True,
+                'colleges': directory.records,
+                'total': len(directory.records),
+                'cities': directory.cities,
+                'file_path': found_path,
+                'timestamp': directory.loaded_at
+            }
+        )
         
+    except PaginationError as e:
         return jsonify({
-            'success': True,
-            'colleges': colleges,
-            'total': len(colleges),
-            'cities': cities,
-            'file_path': found_path,
-            'timestamp': datetime.now().isoformat()
-        })
-        
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -72,34 +80,14 @@ def get_college_directory():
 
 @college_directory_bp.route('/colleges/filter', methods=['GET'])
 def filter_colleges():
-    """Simple filter endpoint"""
+    """Simple filter endpoint (search is ranked and typo-tolerant)"""
     try:
         city = request.args.get('city', 'ALL')
         search = request.args.get('search', '').lower()
+        limit = request.args.get('limit', type=int)
         
-        # Get all colleges first
-        all_response = get_college_directory()
-        if isinstance(all_response, tuple):  # Error response
-            return all_response
-        
-        colleges = all_response.json['colleges']
-        
-        # Apply filters
-        filtered = []
-        for college in colleges:
-            # City filter
-            if city != 'ALL' and college['City'] != city:
-                continue
-            
-            # Search filter
-            if search:
-                college_name = college['College Name'].lower()
-                college_code = college['College Code'].lower()
-                
-                if search not in college_name and search not in college_code:
-                    continue
-            
-            filtered.append(college)
+        # Search is ranked from the shared index; city uses the directory's city index
+        filtered = college_directory_store.filter(city=city, search=search, limit=limit)
         
         return jsonify({
             'success': True,
@@ -119,26 +107,16 @@ def filter_colleges():
 
 @college_directory_bp.route('/colleges/stats', methods=['GET'])
 def get_college_stats():
-    """Get simple statistics"""
+    """Get simple statistics (or per-college stats when ?codes= is given)"""
     try:
-        response = get_college_directory()
-        if isinstance(response, tuple):  # Error response
-            return response
-        
-        colleges = response.json['colleges']
-        
-        # Calculate statistics
-        cities = set([c['City'] for c in colleges if c['City']])
-        has_website = sum(1 for c in colleges if c['URL'] and c['URL'].strip())
+        if request.args.get('codes'):
+            from routes.college_comparison_routes import get_bulk_college_stats
+            return get_bulk_college_stats()
         
+        # Precomputed when the directory is loaded
         return jsonify({
             'success': True,
-            'statistics': {
-                'total_colleges': len(colleges),
-                'total_cities': len(cities),
-                'colleges_with_website': has_website,
-                'website_coverage': f'{(has_website / len(colleges) * 100):.1f}%' if colleges else '0%'
-            }
+            'statistics': college_directory_store.get_snapshot().statistics
         })
         
     except Exception as e:
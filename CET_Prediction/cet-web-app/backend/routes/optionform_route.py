@@ -1,44 +1,81 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime
-import json
+from services.option_form_store import get_option_form_store, VersionConflict
+from utils.tabular_export import export_response, iter_csv
+from utils.data_repository import data_repository
+from services.option_form_optimizer import option_form_optimizer
 
 optionform_bp = Blueprint('optionform', __name__)
 
-# In-memory storage (replace with database later)
-user_option_forms = {}
+# Forms live in SQLite (services/option_form_store.py), shared by every worker
+
+# Export columns: (header, key in the saved college entry)
+EXPORT_COLUMNS = [
+    ('Priority', 'priority'),
+    ('College Name', 'college_name'),
+    ('Branch', 'branch'),
+    ('City', 'city'),
+    ('Type', 'type'),
+    ('Category', 'quota_category'),
+    ('Historical Cutoff', 'historical_cutoff'),
+    ('Predicted Cutoff', 'predicted_cutoff'),
+    ('Admission Probability', 'admission_probability'),
+]
+
+
+def _export_rows(colleges):
+    """Saved entries numbered in priority order"""
+    for idx, college in enumerate(colleges, 1):
+        yield {**college, 'priority': idx}
 
 @optionform_bp.route('/api/optionform/save', methods=['POST'])
 def save_option_form():
-    """Save user's option form with priorities"""
+    """
+    Save user's option form with priorities
+
+    Send the 'version' returned by the last load/save to reject the save
+    (409) if the form was changed elsewhere in the meantime.
+    """
     try:
         data = request.get_json()
         user_id = data.get('user_id')
         form_data = data.get('form_data', [])
-        
+        expected_version = data.get('version')
+
         if not user_id:
             return jsonify({'success': False, 'error': 'User ID required'}), 400
-        
-        # Store the form
-        user_option_forms[user_id] = {
-            'colleges': form_data,
-            'updated_at': datetime.now().isoformat(),
-            'total_colleges': len(form_data)
-        }
-        
+        if not isinstance(form_data, list):
+            return jsonify({'success': False, 'error': 'form_data must be a list'}), 400
+        if expected_version is not None:
+            try:
+                expected_version = int(expected_version)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': 'version must be an integer'}), 400
+
+        try:
+            saved = get_option_form_store().save(user_id, form_data, expected_version)
+        except VersionConflict as e:
+            return jsonify({
+                'success': False,
+                'error': 'Option form was modified elsewhere; reload it and try again',
+                'current_version': e.current
+            }), 409
+
         return jsonify({
             'success': True,
             'message': f'Option form saved with {len(form_data)} colleges',
-            'form_id': user_id
+            'form_id': user_id,
+            'version': saved['version'],
+            'updated_at': saved['updated_at']
         })
-        
+
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @optionform_bp.route('/api/optionform/load/<user_id>', methods=['GET'])
 def load_option_form(user_id):
-    """Load user's saved option form"""
+    """Load user's saved option form (version 0 = never saved)"""
     try:
-        form_data = user_option_forms.get(user_id, {'colleges': []})
+        form_data = get_option_form_store().load(user_id) or {'colleges': [], 'version': 0}
         return jsonify({
             'success': True,
             'form_data': form_data
@@ -50,20 +87,141 @@ def load_option_form(user_id):
 def export_option_form(user_id):
     """Export option form as CSV/JSON"""
     try:
-        form_data = user_option_forms.get(user_id, {'colleges': []})
-        
-        # Create CSV format
-        csv_data = "Priority,College Name,Branch,City,Type,Category,Historical Cutoff,Predicted Cutoff,Admission Probability\n"
-        
-        for idx, college in enumerate(form_data['colleges'], 1):
-            csv_data += f'{idx},{college.get("college_name", "")},{college.get("branch", "")},{college.get("city", "")},{college.get("type", "")},{college.get("quota_category", "")},{college.get("historical_cutoff", "")},{college.get("predicted_cutoff", "")},{college.get("admission_probability", "")}\n'
-        
+        form_data = get_option_form_store().load(user_id) or {'colleges': [], 'version': 0}
+
+        # Create CSV format (use /download for large forms)
+        csv_data = ''.join(iter_csv(EXPORT_COLUMNS, _export_rows(form_data['colleges'])))
+
         return jsonify({
             'success': True,
             'csv_data': csv_data,
             'json_data': form_data,
             'total_colleges': len(form_data['colleges'])
         })
-        
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@optionform_bp.route('/api/optionform/export/<user_id>/download', methods=['GET'])
+def download_option_form(user_id):
+    """Stream the option form as a CSV (default) or XLSX attachment (?format=xlsx)"""
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        form_data = get_option_form_store().load(user_id) or {'colleges': []}
+        return export_response(EXPORT_COLUMNS, _export_rows(form_data['colleges']), export_format,
+                               filename=f'option_form_{user_id}', sheet_title='Option Form')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _request_form_data(data):
+    """
+    Option entries from form_data, or the saved form of user_id
+
+    Returns:
+        (entries, None) or (None, (error response, 400))
+    """
+    form_data = data.get('form_data')
+    if form_data is None and data.get('user_id'):
+        form_data = (get_option_form_store().load(data['user_id']) or {'colleges': []})['colleges']
+    if not isinstance(form_data, list):
+        return None, (jsonify({'success': False, 'error': 'form_data (list) or user_id required'}), 400)
+    if not all(isinstance(entry, dict) for entry in form_data):
+        return None, (jsonify({'success': False, 'error': 'Every form_data entry must be an object'}), 400)
+    return form_data, None
+
+@optionform_bp.route('/api/optionform/simulate', methods=['POST'])
+def simulate_option_form():
+    """
+    Which option would have been allotted in each past year and CAP round
+
+    Body:
+    {
+        "form_data": [...],      # option entries in priority order, or
+        "user_id": "abc",        # use the saved form
+        "rank": 5000,            # and/or "percentile": 99.1 (rank preferred)
+        "category": "OPEN"       # group name or cutoff code (GOPENS, TFWS, ...)
+    }
+    """
+    try:
+        data = request.get_json() or {}
+        form_data, error = _request_form_data(data)
+        if error:
+            return error
+
+        rank, percentile = data.get('rank'), data.get('percentile')
+        if rank is None and percentile is None:
+            return jsonify({'success': False, 'error': 'Rank or percentile is required'}), 400
+        try:
+            rank = int(float(rank)) if rank is not None else None
+            percentile = float(percentile) if percentile is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'rank and percentile must be numbers'}), 400
+
+        simulation = data_repository.get_allotment_simulator().simulate(
+            form_data, data.get('category') or 'OPEN', rank=rank, percentile=percentile
+        )
+        return jsonify({'success': True, **simulation})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@optionform_bp.route('/api/optionform/optimize', methods=['POST'])
+def optimize_option_form():
+    """
+    Order candidate options to maximize expected preference satisfaction
+
+    Body:
+    {
+        "form_data": [...],              # candidates (e.g. /api/predict results), or
+        "user_id": "abc",                # use the saved form
+        "rank": 5000,                    # and/or "percentile": 99.1
+        "category": "OPEN",
+        "branches": ["Computer Engineering", "Information Technology"],   # most wanted first
+        "cities": ["Pune"],
+        "college_types": ["Government"],
+        "weights": {"quality": 1, "branch": 1, "city": 0.5, "college_type": 0.3, "preference": 1},
+        "max_options": 300
+    }
+    """
+    try:
+        data = request.get_json() or {}
+        form_data, error = _request_form_data(data)
+        if error:
+            return error
+
+        if data.get('rank') is None and data.get('percentile') is None:
+            return jsonify({'success': False, 'error': 'Rank or percentile is required'}), 400
+        try:
+            profile = {
+                'rank': int(float(data['rank'])) if data.get('rank') is not None else None,
+                'percentile': float(data['percentile']) if data.get('percentile') is not None else None,
+                'category': data.get('category') or 'OPEN',
+                'branches': data.get('branches') or [],
+                'cities': data.get('cities') or [],
+                'college_types': data.get('college_types') or [],
+                'weights': {k: float(v) for k, v in (data.get('weights') or {}).items()},
+            }
+            max_options = int(data['max_options']) if data.get('max_options') is not None else None
+        except (TypeError, ValueError, AttributeError):
+            return jsonify({'success': False, 'error': 'rank, percentile, weights and max_options must be numbers'}), 400
+        if max_options is not None and max_options < 1:
+            return jsonify({'success': False, 'error': 'max_options must be positive'}), 400
+
+        result = option_form_optimizer.optimize(form_data, profile, max_options=max_options)
+        return jsonify({'success': True, **result})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@optionform_bp.route('/api/optionform/health', methods=['GET'])
+def optionform_health():
+    """Store status: saved forms, batches committed, version conflicts"""
+    try:
+        return jsonify({
+            'status': 'healthy',
+            'store': get_option_form_store().get_stats()
+        })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'status': 'error', 'error': str(e)}), 500
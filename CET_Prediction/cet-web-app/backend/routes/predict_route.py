@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify
-from services.predictor import CollegePredictor
+from utils.search_index import search_index
+from utils.data_repository import data_repository
+from utils.response_cache import response_cache
+from utils.encoded_responses import encoded_responses
+from utils.tabular_export import EXPORT_FORMATS, export_response
 import traceback
 
 # ==========================================
@@ -7,14 +11,36 @@ import traceback
 # ==========================================
 predict_bp = Blueprint('predict', __name__)
 
+# Request fields the cache warmup needs to replay a prediction (nothing else is logged)
+PREDICT_REPLAY_FIELDS = ('rank', 'percentile', 'category', 'city', 'branches')
+
+
+def load_predictor():
+    """Predictor of the current data generation, or None when it failed to build"""
+    try:
+        loaded = data_repository.get_predictor()
+        print("✅ College Predictor initialized successfully")
+        return loaded
+    except Exception as e:
+        print(f"❌ Failed to initialize predictor: {e}")
+        traceback.print_exc()
+        return None
+
+
 # Initialize Predictor
-try:
-    predictor = CollegePredictor()
-    print("✅ College Predictor initialized successfully")
-except Exception as e:
-    print(f"❌ Failed to initialize predictor: {e}")
-    traceback.print_exc()
-    predictor = None
+predictor = load_predictor()
+predictor_generation = data_repository.generation
+
+
+@predict_bp.before_request
+def sync_predictor():
+    """Rebuild the predictor (CAP data, model, forecaster) after a data reload"""
+    global predictor, predictor_generation
+    data_repository.check_for_updates()
+    generation = data_repository.generation
+    if predictor_generation != generation:
+        predictor = load_predictor()
+        predictor_generation = generation
 
 
 # ==========================================
@@ -34,6 +60,11 @@ def predict_colleges():
         "branches": ["Computer Engineering"]
     }
     
+    Either rank or percentile may be omitted; it is then estimated from the
+    latest year's rank/percentile table (category table when available; a
+    group like OPEN uses its GOPENS/GOPENH/GOPENO table). input.conversion
+    names the table used.
+    
     Returns colleges sorted by historical cutoff (high to low)
     """
     if not predictor:
@@ -42,81 +73,262 @@ def predict_colleges():
             'error': 'Predictor not initialized'
         }), 500
 
+    try:
+        params, error = _parse_prediction_input(request.get_json())
+        if error:
+            return error
+
+        def build():
+            predictions = _run_prediction(params, limit=100)
+
+            # Calculate statistics
+            stats = predictor.get_statistics(predictions)
+
+            return jsonify({
+                'success': True,
+                'input': {
+                    **{key: params[key] for key in ('rank', 'percentile', 'category', 'city')},
+                    'branches': params['branches'] if params['branches'] else ['All'],
+                    'derived': params['derived'],
+                    'conversion': params['conversion']
+                },
+                'statistics': stats,
+                'total_results': len(predictions),
+                'predictions': predictions,
+                'sorting': 'Historical Cutoff (High to Low) - Option Form Order'
+            }), 200
+
+        return response_cache.json_response('predict', params, build, replay_fields=PREDICT_REPLAY_FIELDS)
+
+    except Exception as e:
+        print(f"❌ Prediction error: {e}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _parse_prediction_input(data):
+    """
+    Validate and normalize a prediction request body
+
+    Returns:
+        (params, None) on success, (None, (response, status)) on bad input
+    """
+    if not data:
+        return None, (jsonify({
+            'success': False,
+            'error': 'No data provided'
+        }), 400)
+
+    # Extract parameters
+    rank = data.get('rank')
+    percentile = data.get('percentile')
+    category = str(data.get('category') or 'OPEN').strip().upper()
+    city = data.get('city')
+    branches = data.get('branches', [])
+
+    # Validate
+    if rank is None and percentile is None:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Rank or percentile is required'
+        }), 400)
+
+    # Fill in whichever value is missing (group names like OPEN use their GOPENS/H/O table)
+    derived = None
+    conversion = None
+    try:
+        converter = data_repository.get_rank_converter()
+        if rank is None and isinstance(percentile, (int, float)):
+            rank = converter.rank_for_percentile(percentile, category=category)
+            derived = 'rank'
+        elif percentile is None and isinstance(rank, (int, float)):
+            percentile = round(converter.percentile_for_rank(rank, category=category), 4)
+            derived = 'percentile'
+        if derived:
+            table = converter.describe(category=category)
+            conversion = {key: table[key] for key in ('year', 'table', 'category')}
+    except KeyError as e:
+        return None, (jsonify({
+            'success': False,
+            'error': f'Rank and percentile are required ({e})'
+        }), 400)
+
+    if not isinstance(rank, (int, float)) or rank <= 0:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Invalid rank'
+        }), 400)
+
+    if not isinstance(percentile, (int, float)) or not (0 <= percentile <= 100):
+        return None, (jsonify({
+            'success': False,
+            'error': 'Percentile must be between 0 and 100'
+        }), 400)
+
+    return {
+        'rank': int(rank),
+        'percentile': float(percentile),
+        'category': category,
+        'city': city.strip() if isinstance(city, str) and city.strip() else None,
+        'branches': [str(b).strip() for b in branches if str(b).strip()] if branches else [],
+        'derived': derived,
+        'conversion': conversion
+    }, None
+
+
+def _run_prediction(params, limit):
+    """Predictions for parsed input (all branches, or each requested branch)"""
+    if params['branches']:
+        return predictor.predict_multiple_branches(
+            rank=params['rank'],
+            percentile=params['percentile'],
+            category=params['category'],
+            branches=params['branches'],
+            city=params['city'],
+            limit=limit
+        )
+    return predictor.predict_colleges(
+        rank=params['rank'],
+        percentile=params['percentile'],
+        category=params['category'],
+        city=params['city'],
+        limit=limit
+    )
+
+
+# ==========================================
+# Prediction Export Endpoint
+# ==========================================
+
+# Largest export a counselor can request in one file
+MAX_EXPORT_ROWS = 5000
+
+PREDICTION_EXPORT_COLUMNS = [
+    ('Rank', 'rank'),
+    ('College Name', 'college_name'),
+    ('Branch', 'branch'),
+    ('Branch Code', 'branch_code'),
+    ('City', 'city'),
+    ('Type', 'type'),
+    ('Quota Category', 'quota_category'),
+    ('Round', 'round'),
+    ('Historical Cutoff', 'historical_cutoff'),
+    ('Predicted Cutoff', 'predicted_cutoff'),
+    ('Cutoff Rank', 'cutoff_rank'),
+    ('Admission Probability', 'admission_probability'),
+    ('Chance', 'category'),
+    ('Forecast Year', lambda row: (row.get('forecast') or {}).get('forecast_year')),
+    ('Forecast Rank', lambda row: (row.get('forecast') or {}).get('forecast_rank')),
+    ('Forecast Percentile', lambda row: (row.get('forecast') or {}).get('forecast_percentile')),
+]
+
+
+@predict_bp.route('/api/predict/export', methods=['POST'])
+def export_predictions():
+    """
+    Stream predictions as a CSV (default) or XLSX attachment
+
+    Body: same as /api/predict, plus optional "limit" (default 100, max 5000)
+    Query: ?format=csv|xlsx
+    """
+    if not predictor:
+        return jsonify({
+            'success': False,
+            'error': 'Predictor not initialized'
+        }), 500
+
     try:
         data = request.get_json()
-        
-        if not data:
+        params, error = _parse_prediction_input(data)
+        if error:
+            return error
+
+        try:
+            limit = int(data.get('limit', 100))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+        limit = max(1, min(limit, MAX_EXPORT_ROWS))
+
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
             return jsonify({
                 'success': False,
-                'error': 'No data provided'
+                'error': f"Unsupported format '{export_format}' (use {' or '.join(EXPORT_FORMATS)})"
             }), 400
 
-        # Extract parameters
-        rank = data.get('rank')
-        percentile = data.get('percentile')
-        category = data.get('category', 'OPEN').upper()
-        city = data.get('city')
-        branches = data.get('branches', [])
+        predictions = _run_prediction(params, limit=limit)
+        return export_response(
+            PREDICTION_EXPORT_COLUMNS, predictions, export_format,
+            filename=f"predictions_{params['category']}_{params['percentile']}",
+            sheet_title='Predictions'
+        )
 
-        # Validate
-        if rank is None or percentile is None:
+    except Exception as e:
+        print(f"❌ Prediction export error: {e}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+# ==========================================
+# Rank / Percentile Conversion Endpoint
+# ==========================================
+@predict_bp.route('/api/convert', methods=['GET'])
+def convert_rank_percentile():
+    """
+    Convert percentile -> rank or rank -> percentile
+    
+    Query params:
+        percentile or rank (comma-separated for several values)
+        year (default: latest), category (optional; falls back to the year table)
+    """
+    try:
+        converter = data_repository.get_rank_converter()
+        year = request.args.get('year')
+        category = request.args.get('category')
+        percentiles = request.args.get('percentile')
+        ranks = request.args.get('rank')
+
+        if not percentiles and not ranks:
             return jsonify({
                 'success': False,
-                'error': 'Rank and percentile are required'
+                'error': 'percentile or rank is required'
             }), 400
 
-        if not isinstance(rank, (int, float)) or rank <= 0:
+        try:
+            if percentiles:
+                values = [float(v) for v in percentiles.split(',')]
+                converted = converter.rank_for_percentile(values, year=year, category=category)
+                results = [{'percentile': v, 'rank': int(r)} for v, r in zip(values, converted)]
+            else:
+                values = [int(float(v)) for v in ranks.split(',')]
+                converted = converter.percentile_for_rank(values, year=year, category=category)
+                results = [{'rank': v, 'percentile': round(float(p), 4)} for v, p in zip(values, converted)]
+        except ValueError:
             return jsonify({
                 'success': False,
-                'error': 'Invalid rank'
+                'error': 'percentile/rank values must be numbers'
             }), 400
-
-        if not isinstance(percentile, (int, float)) or not (0 <= percentile <= 100):
+        except KeyError as e:
             return jsonify({
                 'success': False,
-                'error': 'Percentile must be between 0 and 100'
-            }), 400
-
-        # Make prediction
-        if branches and len(branches) > 0:
-            predictions = predictor.predict_multiple_branches(
-                rank=int(rank),
-                percentile=float(percentile),
-                category=category,
-                branches=branches,
-                city=city,
-                limit=100
-            )
-        else:
-            predictions = predictor.predict_colleges(
-                rank=int(rank),
-                percentile=float(percentile),
-                category=category,
-                city=city,
-                limit=100
-            )
-
-        # Calculate statistics
-        stats = predictor.get_statistics(predictions)
+                'error': str(e).strip("'"),
+                'available_years': converter.get_years()
+            }), 404
 
         return jsonify({
             'success': True,
-            'input': {
-                'rank': rank,
-                'percentile': percentile,
-                'category': category,
-                'city': city,
-                'branches': branches if branches else ['All']
-            },
-            'statistics': stats,
-            'total_results': len(predictions),
-            'predictions': predictions,
-            'sorting': 'Historical Cutoff (High to Low) - Option Form Order'
+            'table': converter.describe(year=year, category=category),
+            'results': results
         })
 
     except Exception as e:
-        print(f"❌ Prediction error: {e}")
-        traceback.print_exc()
+        print(f"❌ Conversion error: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -161,7 +373,7 @@ def get_filters():
         }), 500
 
     try:
-        return jsonify({
+        return encoded_responses.respond('filters', data_repository.generation, lambda: {
             'success': True,
             'branches': predictor.available_branches,
             'cities': predictor.available_cities,
@@ -180,8 +392,8 @@ def get_filters():
 @predict_bp.route('/api/search', methods=['GET'])
 def search_colleges():
     """
-    Search colleges/branches/cities
-    Query: ?q=COEP&type=college
+    Search colleges/branches/cities (ranked, typo-tolerant)
+    Query: ?q=COEP&type=college&limit=20
     """
     if not predictor:
         return jsonify({
@@ -192,6 +404,7 @@ def search_colleges():
     try:
         query = request.args.get('q', '').lower()
         search_type = request.args.get('type', 'college')
+        limit = request.args.get('limit', 20, type=int)
 
         if not query:
             return jsonify({
@@ -201,17 +414,9 @@ def search_colleges():
 
         results = []
 
-        if search_type == 'college':
-            matching = predictor.college_data[
-                predictor.college_data['college_name'].str.contains(query, case=False, na=False)
-            ]['college_name'].unique().tolist()
-            results = matching[:20]
-
-        elif search_type == 'branch':
-            results = [b for b in predictor.available_branches if query in b.lower()][:20]
-
-        elif search_type == 'city':
-            results = [c for c in predictor.available_cities if query in c.lower()][:20]
+        if search_type in ('college', 'branch', 'city'):
+            hits = search_index.search(query, kinds=[search_type], limit=limit)
+            results = [hit['value'] for hit in hits]
 
         return jsonify({
             'success': True,
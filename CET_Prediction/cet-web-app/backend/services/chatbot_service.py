@@ -1,22 +1,63 @@
 # backend/services/chatbot_service.py
 
 import os
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime
 
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from services.llm_executor import CircuitOpen, LLMRejected, LLMTimeout, create_llm_executor
+from services.standin_llm import StandInModel
+
 # Load environment variables from .env
 load_dotenv()
 
 
+class ChatReply(str):
+    """Reply text; from_model is False for canned replies (busy, fallback, errors)"""
+
+    def __new__(cls, text: str, from_model: bool = False):
+        reply = super().__new__(cls, text)
+        reply.from_model = from_model
+        return reply
+
+
 class ChatbotService:
     def __init__(self):
         """Initialize Gemini Flash chatbot service"""
 
         api_key = os.getenv("GEMINI_API_KEY")
 
+        # Upstream calls run on a bounded pool with timeouts and a circuit breaker
+        self.executor = create_llm_executor()
+
+        # System prompt
+        self.system_prompt = (
+            "You are AdmitAssist AI, a friendly and knowledgeable college admission assistant "
+            "for the CET Insights platform in India.\n\n"
+            "You help students with:\n"
+            "- CET, JEE, NEET exam guidance\n"
+            "- Engineering & medical admissions\n"
+            "- Cut-offs, ranks, and percentiles\n"
+            "- College comparisons\n"
+            "- Counseling and documentation\n\n"
+            "Guidelines:\n"
+            "- Be comprehensive and complete in your responses\n"
+            "- Use bullet points and numbering for better readability\n"
+            "- Give actionable, step-by-step advice when appropriate\n"
+            "- Always finish your complete thought - don't cut off mid-sentence\n"
+            "- Admit uncertainty and suggest official sources if needed\n\n"
+            "Academic year: 2024–2025\n"
+        )
+
+        # Local stand-in model (tests, offline development); no API key needed
+        if os.getenv("CHATBOT_STANDIN", "").strip().lower() in ("1", "true", "yes"):
+            self.model = StandInModel()
+            self.is_configured = True
+            print("🧪 Chatbot using the local stand-in model (CHATBOT_STANDIN)")
+            return
+
         # ✅ DEBUG: Print what we got
         print(f"🔍 ChatbotService.__init__ called")
         print(f"   API Key present: {bool(api_key)}")
@@ -33,8 +74,15 @@ class ChatbotService:
             return
 
         try:
-            # Configure Gemini API
-            genai.configure(api_key=api_key)
+            # Configure Gemini API (GEMINI_API_ENDPOINT points at another server,
+            # e.g. benchmarks/fake_llm_server.py, over REST)
+            endpoint = os.getenv("GEMINI_API_ENDPOINT")
+            if endpoint:
+                genai.configure(api_key=api_key, transport="rest",
+                                client_options={"api_endpoint": endpoint})
+                print(f"   Using Gemini endpoint: {endpoint}")
+            else:
+                genai.configure(api_key=api_key)
 
             # ✅ FIX: Use correct safety settings format
             from google.generativeai.types import HarmCategory, HarmBlockThreshold
@@ -64,25 +112,6 @@ class ChatbotService:
             self.model = None
             return
 
-        # System prompt
-        self.system_prompt = (
-            "You are AdmitAssist AI, a friendly and knowledgeable college admission assistant "
-            "for the CET Insights platform in India.\n\n"
-            "You help students with:\n"
-            "- CET, JEE, NEET exam guidance\n"
-            "- Engineering & medical admissions\n"
-            "- Cut-offs, ranks, and percentiles\n"
-            "- College comparisons\n"
-            "- Counseling and documentation\n\n"
-            "Guidelines:\n"
-            "- Be comprehensive and complete in your responses\n"
-            "- Use bullet points and numbering for better readability\n"
-            "- Give actionable, step-by-step advice when appropriate\n"
-            "- Always finish your complete thought - don't cut off mid-sentence\n"
-            "- Admit uncertainty and suggest official sources if needed\n\n"
-            "Academic year: 2024–2025\n"
-        )
-
     # ----------------------------------------------------
     # MAIN CHAT RESPONSE
     # ----------------------------------------------------
@@ -90,49 +119,121 @@ class ChatbotService:
         self,
         message: str,
         conversation_history: Optional[List[Dict]] = None,
-    ) -> str:
-        """Get AI response for user message"""
+    ) -> ChatReply:
+        """Get AI response for user message (reply.from_model is False for canned replies)"""
         
         # ✅ FIX: Check if service is configured
         if not self.is_configured or not self.model:
-            return (
-                "⚠️ AI chatbot is not configured. "
-                "Please add GEMINI_API_KEY to the backend/.env file. "
-                "Contact the administrator for assistance."
-            )
+            return ChatReply(self._not_configured_response())
 
         try:
-            context = self.system_prompt + "\n"
-
-            # Add conversation history (last 10 messages)
-            if conversation_history:
-                context += "Previous conversation:\n"
-                for msg in conversation_history[-10:]:
-                    role = "Student" if msg.get("role") == "user" else "AdmitAssist"
-                    content = msg.get("content", "")
-                    context += f"{role}: {content}\n"
-                context += "\n"
-
-            context += f"Student: {message}\nAdmitAssist:"
-
-            response = self.model.generate_content(
-                context,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    top_p=0.9,
-                    top_k=40,
-                    max_output_tokens=2048,  # ✅ FIX: Increased to 2048 for longer responses
-                ),
-            )
+            context = self._build_context(message, conversation_history)
+
+            # Runs on the executor's pool; the request thread waits at most the call timeout
+            text = self.executor.call(self._generate, context)
+            if text:
+                return ChatReply(text, from_model=True)
 
-            if response and response.text:
-                return response.text.strip()
+            return ChatReply(self._fallback_response())
 
-            return self._fallback_response()
+        except (CircuitOpen, LLMTimeout) as e:
+            # Upstream slow or failing: fall back instead of holding the request
+            print(f"[ChatbotService] {type(e).__name__}: {e}")
+            return ChatReply(self._fallback_response())
+
+        except LLMRejected as e:
+            print(f"[ChatbotService] {type(e).__name__}: {e}")
+            return ChatReply(self._busy_response())
 
         except Exception as e:
             print(f"[ChatbotService ERROR]: {e}")
-            return self._error_response(str(e))
+            return ChatReply(self._error_response(str(e)))
+
+    def stream_response(
+        self,
+        message: str,
+        conversation_history: Optional[List[Dict]] = None,
+    ) -> Iterator[ChatReply]:
+        """
+        Yield the AI response in pieces as the model produces them
+
+        Falls back like get_response; a failure after some text was sent
+        appends the fallback message to what the student already has.
+        Canned pieces have from_model False.
+        """
+        if not self.is_configured or not self.model:
+            yield ChatReply(self._not_configured_response())
+            return
+
+        sent = False
+        try:
+            context = self._build_context(message, conversation_history)
+
+            for text in self.executor.stream(self._generate_stream, context):
+                if not sent:
+                    text = text.lstrip()
+                    if not text:
+                        continue
+                sent = True
+                yield ChatReply(text, from_model=True)
+
+            if not sent:
+                yield ChatReply(self._fallback_response())
+
+        except (CircuitOpen, LLMTimeout) as e:
+            print(f"[ChatbotService] {type(e).__name__}: {e}")
+            yield ChatReply(("\n\n" if sent else "") + self._fallback_response())
+
+        except LLMRejected as e:
+            print(f"[ChatbotService] {type(e).__name__}: {e}")
+            yield ChatReply(self._busy_response())
+
+        except Exception as e:
+            print(f"[ChatbotService ERROR]: {e}")
+            yield ChatReply(("\n\n" if sent else "") + self._error_response(str(e)))
+
+    def _build_context(self, message: str, conversation_history: Optional[List[Dict]]) -> str:
+        """Prompt: system prompt, the last 10 messages and the new message"""
+        context = self.system_prompt + "\n"
+
+        # Add conversation history (last 10 messages)
+        if conversation_history:
+            context += "Previous conversation:\n"
+            for msg in conversation_history[-10:]:
+                role = "Student" if msg.get("role") == "user" else "AdmitAssist"
+                content = msg.get("content", "")
+                context += f"{role}: {content}\n"
+            context += "\n"
+
+        context += f"Student: {message}\nAdmitAssist:"
+        return context
+
+    def _generation_config(self):
+        return genai.types.GenerationConfig(
+            temperature=0.7,
+            top_p=0.9,
+            top_k=40,
+            max_output_tokens=2048,  # ✅ FIX: Increased to 2048 for longer responses
+        )
+
+    def _generate(self, context: str) -> str:
+        """Blocking upstream call (runs on an executor worker)"""
+        response = self.model.generate_content(context, generation_config=self._generation_config())
+        return response.text.strip() if response and response.text else ""
+
+    def _generate_stream(self, context: str) -> Iterator[str]:
+        """Blocking upstream stream (iterated on an executor worker)"""
+        response = self.model.generate_content(
+            context, generation_config=self._generation_config(), stream=True
+        )
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. only a finish reason)
+                continue
+            if text:
+                yield text
 
     # ----------------------------------------------------
     # HELPERS
@@ -192,6 +293,18 @@ class ChatbotService:
             "Please try again in a moment 😊"
         )
 
+    def _not_configured_response(self) -> str:
+        """Response when no model is available"""
+        return (
+            "⚠️ AI chatbot is not configured. "
+            "Please add GEMINI_API_KEY to the backend/.env file. "
+            "Contact the administrator for assistance."
+        )
+
+    def _busy_response(self) -> str:
+        """Response when every LLM slot is taken"""
+        return "I'm getting a lot of requests right now. Please try again shortly."
+
     def _error_response(self, error: str) -> str:
         """Generate user-friendly error message"""
         error_lower = error.lower()
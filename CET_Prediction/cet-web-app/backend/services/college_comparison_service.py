@@ -12,18 +12,8 @@ class CollegeComparisonService:
     
     def __init__(self):
         try:
-            # Import the enhanced comparator
-            from utils.college_comparator import CollegeComparator
-            
-            # Initialize comparator with proper paths
-            data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-            
-            self.comparator = CollegeComparator(
-                merged_data_path=os.path.join(data_dir, 'merged_cutoff_2021_2025.csv'),
-                individual_data_dir=os.path.join(data_dir, 'cutoff_trends'),
-                colleges_url_path=os.path.join(data_dir, 'Colleges_URL.xlsx'),
-                main_data_path=os.path.join(data_dir, 'flattened_CAP_data done.xlsx')
-            )
+            # Fail early if the comparator cannot be built
+            self.comparator
             
             print("✅ CollegeComparisonService initialized with enhanced comparator")
             
@@ -33,6 +23,12 @@ class CollegeComparisonService:
             traceback.print_exc()
             raise
     
+    @property
+    def comparator(self):
+        """Process-wide comparator of the current data generation (rebuilt after a reload)"""
+        from utils.data_repository import data_repository
+        return data_repository.get_comparator()
+    
     def get_all_colleges(self, filters: Dict = None) -> List[Dict]:
         """Get all colleges WITHOUT branch/category filtering"""
         try:
@@ -73,13 +69,7 @@ class CollegeComparisonService:
                 return data
             
             # Otherwise return all data for this college
-            df = (self.comparator.merged_data if not self.comparator.merged_data.empty 
-                  else self.comparator.individual_data)
-            
-            if df.empty:
-                return []
-            
-            df_college = df[df['college_code'] == int(college_code)]
+            df_college = self.comparator.get_college_rows(str(college_code).strip())
             
             if filters:
                 if filters.get('year'):
@@ -112,57 +102,9 @@ class CollegeComparisonService:
             return {}
     
     def get_recommendations(self, rank: int, category: str, preferences: Dict = None) -> List[Dict]:
-        """Get college recommendations based on rank"""
+        """Get college recommendations based on rank (rank-window index)"""
         try:
-            df = (self.comparator.merged_data if not self.comparator.merged_data.empty 
-                  else self.comparator.individual_data)
-            
-            if df.empty:
-                return []
-            
-            # Get colleges where user's rank is within range (with buffer)
-            buffer = 5000
-            df_filtered = df[
-                (df['category'] == category) &
-                (df['closing_rank'] >= rank - buffer) &
-                (df['closing_rank'] <= rank + buffer)
-            ].copy()
-            
-            # Apply preferences
-            if preferences:
-                if preferences.get('city'):
-                    df_filtered = df_filtered[
-                        df_filtered['city'].str.contains(preferences['city'], case=False, na=False)
-                    ]
-                
-                if preferences.get('branch'):
-                    branch_normalized = self.comparator.normalize_branch(preferences['branch'])
-                    df_filtered = df_filtered[
-                        df_filtered['branch_name'].apply(self.comparator.normalize_branch) == branch_normalized
-                    ]
-                
-                if preferences.get('college_type'):
-                    df_filtered = df_filtered[
-                        df_filtered['type'].apply(self.comparator.normalize_college_type) == preferences['college_type']
-                    ]
-            
-            # Get latest year data
-            latest_year = df_filtered['year'].max() if len(df_filtered) > 0 else '2025'
-            df_latest = df_filtered[df_filtered['year'] == latest_year]
-            
-            # Sort by closing rank
-            df_latest = df_latest.sort_values('closing_rank')
-            
-            # Get unique colleges
-            df_unique = df_latest.drop_duplicates(subset=['college_code'], keep='first').copy()
-            
-            # Add URLs
-            df_unique['college_url'] = df_unique['college_code'].astype(str).map(
-                self.comparator.college_urls
-            )
-            
-            return df_unique.head(20).to_dict('records')
-            
+            return self.comparator.recommend(rank, category, preferences=preferences)['recommendations']
         except Exception as e:
             print(f"❌ Error in get_recommendations: {e}")
             return []
@@ -0,0 +1,310 @@
+"""
+Bounded chatbot conversation store
+
+Sessions are keyed by the client's sessionId and hold the last MAX_MESSAGES
+messages (older ones drop off, like a ring buffer). The store as a whole is
+bounded:
+- Sessions idle for longer than SESSION_TTL_SECONDS expire
+- When the stored text exceeds MAX_BYTES, least recently used sessions are
+  evicted until it fits
+
+Two backends with the same interface:
+- MemoryConversationStore (default): per process; sessions live in an
+  OrderedDict in LRU order and each history is a deque of (role, content)
+- SQLiteConversationStore (CHATBOT_STORE=sqlite): one WAL-mode database
+  shared by every worker, so any worker can serve any session
+  (CHATBOT_STORE_PATH, default storage/conversations.sqlite3)
+
+Limits: CHATBOT_MAX_MESSAGES, CHATBOT_STORE_MAX_BYTES, CHATBOT_SESSION_TTL_SECONDS.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from utils.data_repository import BACKEND_DIR
+
+
+# Rough per-message bookkeeping cost added to the text size
+MESSAGE_OVERHEAD_BYTES = 64
+
+
+def _message_bytes(content: str) -> int:
+    return len(content.encode('utf-8')) + MESSAGE_OVERHEAD_BYTES
+
+
+def _as_history(messages) -> List[Dict]:
+    """Messages in the shape ChatbotService.get_response expects"""
+    return [{'role': role, 'content': content, 'timestamp': None} for role, content in messages]
+
+
+class _Session:
+    __slots__ = ('messages', 'bytes', 'last_access')
+
+    def __init__(self, max_messages: int):
+        self.messages = deque(maxlen=max_messages)
+        self.bytes = 0
+        self.last_access = time.time()
+
+
+class MemoryConversationStore:
+    """Per-process store with TTL, LRU eviction and a global byte cap"""
+
+    backend = 'memory'
+
+    def __init__(self, max_messages: int, max_bytes: int, ttl_seconds: float):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._sessions: 'OrderedDict[str, _Session]' = OrderedDict()
+        self._bytes = 0
+        self._evictions = {'expired': 0, 'lru': 0}
+
+    def get_history(self, session_id: str) -> List[Dict]:
+        with self._lock:
+            self._expire(time.time())
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            session.last_access = time.time()
+            self._sessions.move_to_end(session_id)
+            return _as_history(session.messages)
+
+    def append(self, session_id: str, messages: List[Tuple[str, str]]):
+        """Add messages to a session (creating it), then enforce every limit"""
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(self.max_messages)
+            for role, content in messages:
+                if len(session.messages) == session.messages.maxlen:
+                    dropped = session.messages[0]
+                    session.bytes -= _message_bytes(dropped[1])
+                    self._bytes -= _message_bytes(dropped[1])
+                session.messages.append((role, content))
+                session.bytes += _message_bytes(content)
+                self._bytes += _message_bytes(content)
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+
+            # Oldest sessions first; never the one just written
+            while self._bytes > self.max_bytes and len(self._sessions) > 1:
+                self._drop(next(iter(self._sessions)), 'lru')
+
+    def clear(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id, None)
+            return True
+
+    def _expire(self, now: float):
+        # LRU order is last-access order, so expired sessions are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= self.ttl_seconds:
+                break
+            self._drop(session_id, 'expired')
+
+    def _drop(self, session_id: str, reason: Optional[str]):
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.bytes
+        if reason:
+            self._evictions[reason] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            self._expire(time.time())
+            return {
+                'backend': self.backend,
+                'sessions': len(self._sessions),
+                'messages': sum(len(s.messages) for s in self._sessions.values()),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_messages_per_session': self.max_messages,
+                'session_ttl_seconds': self.ttl_seconds,
+                'evictions': dict(self._evictions),
+            }
+
+
+class SQLiteConversationStore:
+    """Store shared by every worker through one WAL-mode SQLite database"""
+
+    backend = 'sqlite'
+    BUSY_TIMEOUT_SECONDS = 10
+    # Expired sessions are swept at most this often
+    SWEEP_INTERVAL_SECONDS = 30
+
+    def __init__(self, max_messages: int, max_bytes: int, ttl_seconds: float, path: Optional[str] = None):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.path = path or os.getenv(
+            'CHATBOT_STORE_PATH', os.path.join(BACKEND_DIR, 'storage', 'conversations.sqlite3')
+        )
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        self._swept_at = 0.0
+        self._evictions = {'expired': 0, 'lru': 0}
+
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                session_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                next_seq INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS chat_sessions_access ON chat_sessions (last_access);
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID;
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (and per process)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_history(self, session_id: str) -> List[Dict]:
+        conn = self._conn()
+        now = time.time()
+        self._maybe_sweep(conn, now)
+        row = conn.execute('SELECT last_access FROM chat_sessions WHERE session_id = ?', (session_id,)).fetchone()
+        if row is None:
+            return []
+        if now - row[0] > self.ttl_seconds:
+            self._delete(conn, [session_id], 'expired')
+            return []
+        conn.execute('UPDATE chat_sessions SET last_access = ? WHERE session_id = ?', (now, session_id))
+        messages = conn.execute(
+            'SELECT role, content FROM chat_messages WHERE session_id = ? ORDER BY seq', (session_id,)
+        ).fetchall()
+        return _as_history(messages)
+
+    def append(self, session_id: str, messages: List[Tuple[str, str]]):
+        conn = self._conn()
+        now = time.time()
+        self._maybe_sweep(conn, now)
+        added = sum(_message_bytes(content) for _, content in messages)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT next_seq FROM chat_sessions WHERE session_id = ?', (session_id,)).fetchone()
+            seq = row[0] if row else 0
+            conn.executemany(
+                'INSERT INTO chat_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)',
+                [(session_id, seq + i, role, content) for i, (role, content) in enumerate(messages)]
+            )
+            next_seq = seq + len(messages)
+
+            # Ring buffer: keep the newest max_messages
+            dropped = conn.execute(
+                'SELECT COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0), COUNT(*) FROM chat_messages '
+                'WHERE session_id = ? AND seq < ?', (session_id, next_seq - self.max_messages)
+            ).fetchone()
+            conn.execute('DELETE FROM chat_messages WHERE session_id = ? AND seq < ?',
+                         (session_id, next_seq - self.max_messages))
+            dropped_bytes = dropped[0] + dropped[1] * MESSAGE_OVERHEAD_BYTES
+
+            conn.execute(
+                'INSERT INTO chat_sessions (session_id, last_access, bytes, next_seq) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access, '
+                'bytes = bytes + ?, next_seq = excluded.next_seq',
+                (session_id, now, added - dropped_bytes, next_seq, added - dropped_bytes)
+            )
+
+            # Global cap: evict least recently used sessions (never this one)
+            total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM chat_sessions').fetchone()[0]
+            if total > self.max_bytes:
+                victims = []
+                for victim, size in conn.execute(
+                        'SELECT session_id, bytes FROM chat_sessions WHERE session_id != ? ORDER BY last_access',
+                        (session_id,)):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append(victim)
+                    total -= size
+                self._delete(conn, victims, 'lru', in_transaction=True)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def clear(self, session_id: str) -> bool:
+        conn = self._conn()
+        exists = conn.execute('SELECT 1 FROM chat_sessions WHERE session_id = ?', (session_id,)).fetchone()
+        if exists:
+            self._delete(conn, [session_id], None)
+        return bool(exists)
+
+    def _maybe_sweep(self, conn: sqlite3.Connection, now: float):
+        if now - self._swept_at < self.SWEEP_INTERVAL_SECONDS:
+            return
+        self._swept_at = now
+        expired = [row[0] for row in conn.execute(
+            'SELECT session_id FROM chat_sessions WHERE last_access < ?', (now - self.ttl_seconds,))]
+        if expired:
+            self._delete(conn, expired, 'expired')
+
+    def _delete(self, conn: sqlite3.Connection, session_ids: List[str], reason: Optional[str],
+                in_transaction: bool = False):
+        if not session_ids:
+            return
+        if not in_transaction:
+            conn.execute('BEGIN IMMEDIATE')
+        for session_id in session_ids:
+            conn.execute('DELETE FROM chat_messages WHERE session_id = ?', (session_id,))
+            conn.execute('DELETE FROM chat_sessions WHERE session_id = ?', (session_id,))
+        if not in_transaction:
+            conn.execute('COMMIT')
+        if reason:
+            self._evictions[reason] += len(session_ids)
+
+    def get_stats(self) -> Dict:
+        conn = self._conn()
+        self._maybe_sweep(conn, time.time())
+        sessions, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM chat_sessions').fetchone()
+        messages = conn.execute('SELECT COUNT(*) FROM chat_messages').fetchone()[0]
+        return {
+            'backend': self.backend,
+            'path': self.path,
+            'sessions': sessions,
+            'messages': messages,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'max_messages_per_session': self.max_messages,
+            'session_ttl_seconds': self.ttl_seconds,
+            # Evictions performed by this process
+            'evictions': dict(self._evictions),
+        }
+
+
+def create_conversation_store():
+    """Store selected by CHATBOT_STORE ('memory' or 'sqlite') with limits from the environment"""
+    limits = {
+        'max_messages': int(os.getenv('CHATBOT_MAX_MESSAGES', 20)),
+        'max_bytes': int(os.getenv('CHATBOT_STORE_MAX_BYTES', 64 * 1024 * 1024)),
+        'ttl_seconds': float(os.getenv('CHATBOT_SESSION_TTL_SECONDS', 2 * 60 * 60)),
+    }
+    backend = os.getenv('CHATBOT_STORE', 'memory').strip().lower()
+    if backend == 'sqlite':
+        try:
+            return SQLiteConversationStore(**limits)
+        except sqlite3.Error as e:
+            print(f"⚠️ Conversation database unavailable ({e}), keeping conversations in memory")
+    return MemoryConversationStore(**limits)
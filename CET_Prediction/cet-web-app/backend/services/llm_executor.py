@@ -0,0 +1,303 @@
+"""
+Bounded execution of upstream LLM calls
+
+Calls run on a small worker pool instead of the request thread, so a slow
+upstream costs at most a timeout per request and never more than a fixed
+number of upstream connections:
+- max_in_flight calls run at once; up to max_queue more wait for a worker,
+  anything beyond that is rejected at once (LLMRejected)
+- The caller waits at most timeout_seconds, queueing included. A call that
+  timed out while running raises LLMTimeout; one that never left the queue
+  is dropped and raises LLMRejected (local saturation, not an upstream fault).
+  The worker keeps its slot until the upstream answers (the Gemini client
+  gives up after 60s), so a hung upstream fills the pool and new calls are
+  rejected instead of piling up
+- A circuit breaker counts consecutive failures and timeouts of calls that
+  reached the upstream; once open it fails calls immediately (CircuitOpen)
+  for reset_seconds, then lets a single trial call through and closes again
+  if it succeeds
+- Streamed calls hold their slot until the stream ends; the timeout applies
+  to the wait for each chunk, the first one included
+
+Limits come from LLM_MAX_IN_FLIGHT, LLM_MAX_QUEUE, LLM_TIMEOUT_SECONDS,
+LLM_BREAKER_FAILURES and LLM_BREAKER_RESET_SECONDS.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Callable, Dict, Iterator, Optional
+
+
+class LLMRejected(Exception):
+    """All workers busy and the wait queue is full"""
+
+
+class LLMTimeout(Exception):
+    """The upstream did not answer within the call timeout"""
+
+
+class CircuitOpen(Exception):
+    """The upstream is failing; calls are skipped until the breaker resets"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half_open -> closed"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._state = 'half_open'
+            self._trial_running = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (half-open admits one trial at a time)"""
+        with self._lock:
+            state = self._current_state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = 'closed'
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == 'half_open' or self._failures >= self.failure_threshold:
+                if self._state != 'open':
+                    self._times_opened += 1
+                self._state = 'open'
+                self._opened_at = time.monotonic()
+
+    def record_abandoned(self):
+        """Call dropped by the client before an outcome; lets another trial through"""
+        with self._lock:
+            self._trial_running = False
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'times_opened': self._times_opened,
+            }
+
+
+class BoundedLLMExecutor:
+    """Worker pool with an in-flight limit, a bounded wait queue, per-call timeouts and a breaker"""
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 16, timeout_seconds: float = 20.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.timeout_seconds = timeout_seconds
+        self.breaker = breaker or CircuitBreaker()
+        # One slot per running or waiting call
+        self._slots = threading.BoundedSemaphore(self.max_in_flight + self.max_queue)
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_pid: Optional[int] = None
+        self._admitted = 0
+        self._running = 0
+        self._stats = {'calls': 0, 'successes': 0, 'failures': 0, 'timeouts': 0,
+                       'rejected': 0, 'queue_timeouts': 0, 'short_circuited': 0}
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Worker pool of this process (created on first call; threads do not survive a fork)"""
+        if self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool_pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                                    thread_name_prefix='llm-call')
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    # ============================================================================
+    # CALLS
+    # ============================================================================
+
+    def call(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Run fn(*args, **kwargs) on a worker and wait for its result
+
+        Raises:
+            CircuitOpen: the breaker is open (nothing was sent upstream)
+            LLMRejected: no worker or queue slot is free, or the call was
+                still queued when the timeout passed
+            LLMTimeout: no result within timeout (default timeout_seconds)
+            Exception: whatever fn raised
+        """
+        wait = self.timeout_seconds if timeout is None else timeout
+        future = self._submit(fn, args, kwargs)
+        try:
+            result = future.result(timeout=wait)
+        except FuturesTimeout:
+            self._timed_out(future, wait)
+            raise LLMTimeout(f'LLM call exceeded {wait}s')
+        except Exception:
+            self._count('failures')
+            self.breaker.record_failure()
+            raise
+
+        self._count('successes')
+        self.breaker.record_success()
+        return result
+
+    def stream(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Iterator:
+        """
+        Iterate fn(*args, **kwargs) on a worker and yield its items as they arrive
+
+        Closing the generator early (client went away) stops the worker at
+        its next item.
+
+        Raises:
+            Same as call(); LLMTimeout when any single item takes longer
+            than timeout
+        """
+        items: 'queue.Queue' = queue.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for item in fn(*args, **kwargs):
+                    if stop.is_set():
+                        return
+                    items.put((item, None))
+                items.put((done, None))
+            except Exception as e:
+                items.put((done, e))
+
+        future = self._submit(produce, (), {})
+        wait = self.timeout_seconds if timeout is None else timeout
+        finished = False
+        try:
+            while True:
+                try:
+                    item, error = items.get(timeout=wait)
+                except queue.Empty:
+                    finished = True
+                    self._timed_out(future, wait)
+                    raise LLMTimeout(f'No LLM output for {wait}s')
+                if item is done:
+                    finished = True
+                    if error is not None:
+                        self._count('failures')
+                        self.breaker.record_failure()
+                        raise error
+                    self._count('successes')
+                    self.breaker.record_success()
+                    return
+                yield item
+        finally:
+            stop.set()
+            future.cancel()
+            if not finished:
+                self.breaker.record_abandoned()
+
+    def _timed_out(self, future, wait: float):
+        """
+        Account for a call that passed its timeout
+
+        Raises:
+            LLMRejected: the call never left the queue (dropped; the breaker
+                is not charged for local saturation)
+        """
+        if future.cancel():
+            self._count('queue_timeouts')
+            self.breaker.record_abandoned()
+            raise LLMRejected(f'LLM call waited {wait}s for a free worker')
+        # Already running: it finishes in the background and keeps its slot until then
+        self._count('timeouts')
+        self.breaker.record_failure()
+
+    def _submit(self, fn: Callable, args: tuple, kwargs: dict):
+        """Take a slot (or raise LLMRejected / CircuitOpen) and queue fn on the pool"""
+        self._count('calls')
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise LLMRejected(f'{self.max_in_flight} LLM calls running and {self.max_queue} waiting')
+        if not self.breaker.allow():
+            self._slots.release()
+            self._count('short_circuited')
+            raise CircuitOpen('LLM upstream is degraded')
+
+        with self._lock:
+            self._admitted += 1
+        try:
+            future = self._get_pool().submit(self._run, fn, args, kwargs)
+        except Exception:
+            self._release()
+            self.breaker.record_failure()
+            raise
+        # The slot is freed when the call really ends, not when the caller gives up
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _run(self, fn: Callable, args: tuple, kwargs: dict):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _release(self):
+        with self._lock:
+            self._admitted -= 1
+        self._slots.release()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                **self._stats,
+                'in_flight': self._running,
+                'queued': max(0, self._admitted - self._running),
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'timeout_seconds': self.timeout_seconds,
+            }
+        stats['breaker'] = self.breaker.get_stats()
+        return stats
+
+
+def create_llm_executor() -> BoundedLLMExecutor:
+    """Executor with limits from the environment"""
+    return BoundedLLMExecutor(
+        max_in_flight=int(os.getenv('LLM_MAX_IN_FLIGHT', 8)),
+        max_queue=int(os.getenv('LLM_MAX_QUEUE', 16)),
+        timeout_seconds=float(os.getenv('LLM_TIMEOUT_SECONDS', 20)),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv('LLM_BREAKER_FAILURES', 5)),
+            reset_seconds=float(os.getenv('LLM_BREAKER_RESET_SECONDS', 30)),
+        ),
+    )
@@ -0,0 +1,311 @@
+"""
+Option form auto-ordering
+
+CAP allots the first option on the form whose cutoff the student clears, so
+with a utility u and an admission probability p per option the expected
+satisfaction of an ordering is
+
+    E = sum_k u_k * p_k * prod_{j<k} (1 - p_j)
+
+Swapping two adjacent options changes E by p_a * p_b * (u_a - u_b), so the
+best order of any chosen set is by utility, highest first. What remains is
+the choice of set when the form is capped at max_options: options are added
+greedily by marginal gain in E (each step is one vectorized pass over the
+remaining candidates).
+
+Probabilities (all options at once):
+- From cutoff history: the closing rank is modelled as normal, centred on
+  the cutoff forecast (or the historical mean) with the larger of the
+  year-to-year spread, the forecast band and a relative floor as sigma
+- From CollegePredictor: the admission_probability carried by options that
+  came from /api/predict
+- Blended by the number of years of history; options with neither are
+  placed after the ranked options, in their original order
+
+Utility: seat quality (latest closing percentile) plus matches with the
+student's preferred branches (earlier = stronger), cities and college types,
+plus an optional per-option 'preference' score (0-10).
+"""
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.data_repository import data_repository
+
+# Chebyshev fit of erfc(z) = t * exp(-z^2 + P(t)), t = 1 / (1 + z/2), z >= 0
+# (Numerical Recipes erfcc; fractional error below 1.2e-7 everywhere)
+_ERFC_COEFFICIENTS = (0.17087277, -0.82215223, 1.48851587, -1.13520398, 0.27886807,
+                      -0.18628806, 0.09678418, 0.37409196, 1.00002368, -1.26551223)
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    """Complementary error function on whole arrays (numpy has none; keeps scipy out)"""
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    result = t * np.exp(-z * z + np.polyval(_ERFC_COEFFICIENTS, t))
+    return np.where(x >= 0, result, 2.0 - result)
+
+
+def normal_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF, elementwise (NaN stays NaN)"""
+    return 0.5 * _erfc(-np.asarray(x, dtype=float) / math.sqrt(2.0))
+
+
+class OptionFormOptimizer:
+    """Vectorized utility/probability scoring and greedy ordering"""
+
+    DEFAULT_WEIGHTS = {
+        'quality': 1.0,
+        'branch': 1.0,
+        'city': 0.5,
+        'college_type': 0.3,
+        'preference': 1.0,
+    }
+    # Cutoff spread is never taken below this share of the expected cutoff
+    MIN_RELATIVE_SIGMA = 0.08
+    # z of the forecaster's band (its ~80% two-sided interval)
+    FORECAST_BAND_Z = 1.28
+    # CAP allows at most this many options
+    MAX_OPTIONS = 300
+
+    def __init__(self, repository=None):
+        self.repository = repository or data_repository
+
+    # ============================================================================
+    # SCORING
+    # ============================================================================
+
+    def admission_probabilities(self, options: List[Dict], category: str, rank: int) -> Dict[str, np.ndarray]:
+        """
+        Admission probability per option
+
+        Returns:
+            Dict with 'probability' (NaN when unknown), 'history' (from the
+            cutoff model), 'predictor' (carried CollegePredictor value) and
+            'years' (years of cutoff history) and 'latest_percentile'
+        """
+        simulator = self.repository.get_allotment_simulator()
+        forecaster = self.repository.get_forecaster()
+
+        series = np.array([
+            simulator.resolve_series(option.get('branch_code'), category, option) for option in options
+        ], dtype=int)
+        history = simulator.seat_history(series)
+        ranks = history['ranks']
+        years = (~np.isnan(ranks)).sum(axis=1)
+
+        labels = [simulator.seat_label(s) if s >= 0 else None for s in series]
+        forecast_rank = np.full(len(options), np.nan)
+        forecast_sigma = np.full(len(options), np.nan)
+        for position, (option, label) in enumerate(zip(options, labels)):
+            if label is None:
+                continue
+            forecast = forecaster.get(label['college_code'], option.get('branch_code'), label['category'])
+            if forecast and forecast.get('forecast_rank'):
+                forecast_rank[position] = forecast['forecast_rank']
+                forecast_sigma[position] = (forecast['rank_upper'] - forecast['rank_lower']) / (2 * self.FORECAST_BAND_Z)
+
+        # Mean and spread of the observed years (NaN-free arithmetic)
+        observed = ~np.isnan(ranks)
+        count = np.maximum(years, 1)
+        mean = np.where(years > 0, np.where(observed, ranks, 0.0).sum(axis=1) / count, np.nan)
+        spread = np.sqrt(np.where(observed, (ranks - mean[:, None]) ** 2, 0.0).sum(axis=1) / count)
+        center = np.where(np.isnan(forecast_rank), mean, forecast_rank)
+        sigma = np.fmax(np.fmax(spread, forecast_sigma), self.MIN_RELATIVE_SIGMA * center)
+        sigma = np.where(sigma > 0, sigma, 1.0)
+        p_history = np.where(years > 0, normal_cdf((center - rank) / sigma), np.nan)
+
+        p_predictor = np.array([
+            self._as_float(option.get('admission_probability')) for option in options
+        ]) / 100.0
+
+        # More years of history -> more weight on the cutoff model
+        weight = years / (years + 1.0)
+        probability = np.where(
+            np.isnan(p_predictor), p_history,
+            np.where(np.isnan(p_history), p_predictor, weight * p_history + (1 - weight) * p_predictor)
+        )
+        return {
+            'probability': np.clip(probability, 0.0, 1.0),
+            'history': p_history,
+            'predictor': p_predictor,
+            'years': years,
+            'latest_percentile': self._latest(history['percentiles']),
+        }
+
+    def utilities(self, options: List[Dict], profile: Dict, latest_percentile: np.ndarray) -> np.ndarray:
+        """Preference score per option (higher = more wanted)"""
+        weights = {**self.DEFAULT_WEIGHTS, **(profile.get('weights') or {})}
+        n = len(options)
+
+        carried = np.array([self._as_float(option.get('historical_cutoff')) for option in options])
+        quality = np.where(np.isnan(latest_percentile), carried, latest_percentile) / 100.0
+        utility = weights['quality'] * np.nan_to_num(quality, nan=0.0)
+
+        branches = [str(b).strip().lower() for b in (profile.get('branches') or []) if str(b).strip()]
+        if branches:
+            names = [str(option.get('branch') or '').lower() for option in options]
+            branch_score = np.zeros(n)
+            for position, branch in enumerate(branches):
+                score = 1.0 - position / len(branches)
+                matches = np.array([branch in name for name in names])
+                branch_score = np.where((branch_score == 0) & matches, score, branch_score)
+            utility += weights['branch'] * branch_score
+
+        for key, field in (('cities', 'city'), ('college_types', 'type')):
+            wanted = [str(v).strip().lower() for v in (profile.get(key) or []) if str(v).strip()]
+            if wanted:
+                values = [str(option.get(field) or '').lower() for option in options]
+                matches = np.array([any(w in value for w in wanted) for value in values], dtype=float)
+                utility += weights['city' if key == 'cities' else 'college_type'] * matches
+
+        preference = np.array([self._as_float(option.get('preference')) for option in options]) / 10.0
+        utility += weights['preference'] * np.nan_to_num(preference, nan=0.0)
+        return utility
+
+    # ============================================================================
+    # ORDERING
+    # ============================================================================
+
+    @staticmethod
+    def expected_utility(utility: np.ndarray, probability: np.ndarray) -> float:
+        """E for options in the given order"""
+        survival = np.cumprod(np.r_[1.0, 1.0 - probability[:-1]])
+        return float((utility * probability * survival).sum())
+
+    @staticmethod
+    def greedy_select(utility: np.ndarray, probability: np.ndarray, max_options: int) -> np.ndarray:
+        """
+        Positions of the chosen options, in form order (utility descending)
+
+        Each step adds the candidate with the largest gain in E. Inserting c
+        into the utility-sorted set S gains
+            p_c * (u_c * survival before c - expected utility of S after c)
+        which is computed for every remaining candidate at once.
+        """
+        n = len(utility)
+        # Stable utility order; ties keep the input order
+        order = np.argsort(-utility, kind='stable')
+        if max_options >= n:
+            return order
+
+        u, p = utility[order], probability[order]
+        chosen = np.zeros(n, dtype=bool)
+        for _ in range(max_options):
+            q = np.where(chosen, 1.0 - p, 1.0)
+            survival_before = np.cumprod(np.r_[1.0, q[:-1]])
+            terms = np.where(chosen, u * p * survival_before, 0.0)
+            after = np.r_[np.cumsum(terms[::-1])[::-1][1:], 0.0]
+            gain = np.where(chosen, -np.inf, p * (u * survival_before - after))
+            best = int(np.argmax(gain))
+            if not np.isfinite(gain[best]):
+                break
+            chosen[best] = True
+        return order[chosen]
+
+    def optimize(self, options: List[Dict], profile: Dict, max_options: Optional[int] = None) -> Dict:
+        """
+        Ordered option form for a student
+
+        Args:
+            options: Candidate entries (branch_code; /api/predict fields are used when present)
+            profile: rank and/or percentile, category, and optional branches,
+                cities, college_types and weights
+            max_options: Form length cap (default and maximum MAX_OPTIONS)
+
+        Returns:
+            Dict with the ordered options (each annotated with utility,
+            probability and the chance it is the one allotted), the options
+            left out, and E / P(any allotment) for the new and original order
+        """
+        category = str(profile.get('category') or 'OPEN').strip().upper()
+        rank = profile.get('rank')
+        if rank is None:
+            rank = self.repository.get_rank_converter().rank_for_percentile(
+                float(profile['percentile']), category=category
+            )
+        rank = int(rank)
+        max_options = min(int(max_options or self.MAX_OPTIONS), self.MAX_OPTIONS)
+
+        # A course can appear on the form only once; keep its first occurrence
+        seen = set()
+        duplicates = []
+        unique = []
+        for position, option in enumerate(options):
+            key = str(option.get('branch_code') or '').lstrip('0') or f'#{position}'
+            if key in seen:
+                duplicates.append(position + 1)
+            else:
+                seen.add(key)
+                unique.append(position)
+        candidates = options
+        options = [options[position] for position in unique]
+
+        scores = self.admission_probabilities(options, category, rank)
+        probability = scores['probability']
+        utility = self.utilities(options, profile, scores['latest_percentile'])
+
+        known = np.flatnonzero(~np.isnan(probability))
+        unknown = np.flatnonzero(np.isnan(probability))
+        picked = known[self.greedy_select(utility[known], probability[known], max_options)]
+        ordered = np.r_[picked, unknown[:max(0, max_options - len(picked))]].astype(int)
+        left_out = np.setdiff1d(np.arange(len(options)), ordered)
+
+        p_ordered = np.nan_to_num(probability[ordered], nan=0.0)
+        survival = np.cumprod(np.r_[1.0, 1.0 - p_ordered[:-1]])
+        allotted_share = p_ordered * survival
+
+        ranked = []
+        for priority, position in enumerate(ordered, 1):
+            entry = dict(options[position])
+            entry.update({
+                'priority': priority,
+                'original_priority': unique[position] + 1,
+                'utility': round(float(utility[position]), 4),
+                'admission_probability_estimate': None if np.isnan(probability[position])
+                else round(float(probability[position]) * 100, 2),
+                'allotment_chance': round(float(allotted_share[priority - 1]) * 100, 2),
+                'years_of_history': int(scores['years'][position]),
+            })
+            ranked.append(entry)
+
+        p_original = np.nan_to_num(probability, nan=0.0)
+        return {
+            'rank': rank,
+            'category': category,
+            'total_candidates': len(candidates),
+            'total_options': len(ranked),
+            'options': ranked,
+            'left_out': [dict(options[position], original_priority=unique[position] + 1) for position in left_out],
+            'no_history': [unique[position] + 1 for position in unknown],
+            'duplicates': duplicates,
+            'expected_utility': round(self.expected_utility(utility[ordered], p_ordered), 4),
+            'original_expected_utility': round(self.expected_utility(utility, p_original), 4),
+            'allotment_probability': round(float(1.0 - np.prod(1.0 - p_ordered)) * 100, 2),
+        }
+
+    # ============================================================================
+    # HELPERS
+    # ============================================================================
+
+    @staticmethod
+    def _as_float(value) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    @staticmethod
+    def _latest(values: np.ndarray) -> np.ndarray:
+        """Last non-NaN value of each row (NaN for empty rows)"""
+        if values.size == 0:
+            return np.full(len(values), np.nan)
+        observed = ~np.isnan(values)
+        last = values.shape[1] - 1 - np.argmax(observed[:, ::-1], axis=1)
+        latest = values[np.arange(len(values)), last]
+        return np.where(observed.any(axis=1), latest, np.nan)
+
+
+# Process-wide instance
+option_form_optimizer = OptionFormOptimizer()
@@ -0,0 +1,231 @@
+"""
+Durable option form store (SQLite, WAL mode)
+
+- One row per user: the ordered college list as JSON plus a version number
+- Optimistic concurrency: a save that names the version it was based on only
+  succeeds if the row is still at that version, otherwise VersionConflict
+  reports the current one (saves without a version overwrite, as before)
+- Batched writes: saves from all request threads are queued and committed
+  by one writer thread, many per transaction, so a burst of editors costs
+  one commit per batch instead of one per save
+- WAL lets any number of readers (and other gunicorn workers) load forms
+  while a batch is being written; writers from other processes wait on the
+  SQLite lock (busy timeout)
+
+The database lives in storage/option_forms.sqlite3 (OPTION_FORM_DB_PATH
+overrides).
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.data_repository import BACKEND_DIR
+
+
+class VersionConflict(Exception):
+    """The stored form changed since the version the client edited"""
+
+    def __init__(self, user_id: str, expected: int, current: int):
+        super().__init__(f"Option form for {user_id} is at version {current}, not {expected}")
+        self.expected = expected
+        self.current = current
+
+
+class OptionFormStore:
+    """Per-user option forms with optimistic versioning and group commits"""
+
+    # Saves committed per transaction, and how long the writer waits to fill a batch
+    BATCH_SIZE = 200
+    BATCH_WAIT_SECONDS = 0.005
+    # How long a save waits for its batch to commit
+    SAVE_TIMEOUT_SECONDS = 30
+    BUSY_TIMEOUT_SECONDS = 30
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv(
+            'OPTION_FORM_DB_PATH', os.path.join(BACKEND_DIR, 'storage', 'option_forms.sqlite3')
+        )
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._writer_lock = threading.Lock()
+        self._writer_pid: Optional[int] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'saves': 0, 'conflicts': 0, 'batches': 0, 'largest_batch': 0}
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS option_forms (
+                    user_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    colleges TEXT NOT NULL,
+                    total_colleges INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT_SECONDS,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """One read connection per request thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    # ============================================================================
+    # READS
+    # ============================================================================
+
+    def load(self, user_id: str) -> Optional[Dict]:
+        """Saved form for a user (None if the user never saved one)"""
+        row = self._reader().execute(
+            'SELECT colleges, total_colleges, updated_at, version FROM option_forms WHERE user_id = ?',
+            (str(user_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'colleges': json.loads(row[0]),
+            'total_colleges': row[1],
+            'updated_at': row[2],
+            'version': row[3],
+        }
+
+    # ============================================================================
+    # WRITES (queued, committed in batches by the writer thread)
+    # ============================================================================
+
+    def save(self, user_id: str, colleges: List[Dict], expected_version: Optional[int] = None) -> Dict:
+        """
+        Save a user's form
+
+        Args:
+            user_id: Form owner
+            colleges: Ordered option list
+            expected_version: Version the edit was based on (0 = new form);
+                None overwrites whatever is stored
+
+        Returns:
+            Dict with the new version and updated_at
+
+        Raises:
+            VersionConflict: expected_version is not the stored version
+        """
+        self._ensure_writer()
+        future: Future = Future()
+        self._queue.put((str(user_id), list(colleges), expected_version, future))
+        return future.result(timeout=self.SAVE_TIMEOUT_SECONDS)
+
+    def _ensure_writer(self):
+        """Start the writer thread on first save in this process (threads do not survive a fork)"""
+        if self._writer_pid == os.getpid():
+            return
+        with self._writer_lock:
+            if self._writer_pid != os.getpid():
+                self._queue = queue.Queue()
+                self._local = threading.local()
+                threading.Thread(target=self._write_loop, args=(self._queue,),
+                                 name='optionform-writer', daemon=True).start()
+                self._writer_pid = os.getpid()
+
+    def _write_loop(self, pending: 'queue.Queue'):
+        conn = self._connect()
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.BATCH_WAIT_SECONDS
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(pending.get(timeout=remaining) if remaining > 0
+                                 else pending.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit_batch(conn, batch)
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List):
+        """Apply a batch in one transaction; conflicts fail only their own save"""
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for user_id, colleges, expected_version, future in batch:
+                try:
+                    results.append((future, self._apply(conn, user_id, colleges, expected_version)))
+                except VersionConflict as e:
+                    results.append((future, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        conflicts = 0
+        for future, result in results:
+            if isinstance(result, Exception):
+                conflicts += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        with self._stats_lock:
+            self._stats['saves'] += len(batch) - conflicts
+            self._stats['conflicts'] += conflicts
+            self._stats['batches'] += 1
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, user_id: str, colleges: List[Dict],
+               expected_version: Optional[int]) -> Dict:
+        row = conn.execute('SELECT version FROM option_forms WHERE user_id = ?', (user_id,)).fetchone()
+        current = row[0] if row else 0
+        if expected_version is not None and int(expected_version) != current:
+            raise VersionConflict(user_id, int(expected_version), current)
+
+        version = current + 1
+        updated_at = datetime.now().isoformat()
+        conn.execute(
+            'INSERT INTO option_forms (user_id, version, colleges, total_colleges, updated_at) '
+            'VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(user_id) DO UPDATE SET version = excluded.version, colleges = excluded.colleges, '
+            'total_colleges = excluded.total_colleges, updated_at = excluded.updated_at',
+            (user_id, version, json.dumps(colleges, separators=(',', ':')), len(colleges), updated_at)
+        )
+        return {'version': version, 'updated_at': updated_at}
+
+    # ============================================================================
+    # STATS
+    # ============================================================================
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        stats['forms'] = self._reader().execute('SELECT COUNT(*) FROM option_forms').fetchone()[0]
+        return stats
+
+
+_store: Optional[OptionFormStore] = None
+_store_lock = threading.Lock()
+
+
+def get_option_form_store() -> OptionFormStore:
+    """Process-wide store, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = OptionFormStore()
+    return _store
@@ -3,6 +3,8 @@ import pandas as pd
 import numpy as np
 import os
 from typing import List, Dict, Optional
+from utils.search_index import search_index
+from utils.data_repository import BACKEND_DIR, DataRepository, data_repository
 
 class CollegePredictor:
     """
@@ -13,10 +15,11 @@ class CollegePredictor:
     """
 
     def __init__(self,
-                 model_path: str = os.path.join('model', 'xgb_cap_model.pkl'),
-                 data_path: str = os.path.join('data', 'flattened_CAP_data done.xlsx'),
-                 college_list_path: str = os.path.join('data', 'unique_colleges_with_city_CAP1_2025.xlsx')):
+                 model_path: str = os.path.join(BACKEND_DIR, 'model', 'xgb_cap_model.pkl'),
+                 repository: Optional[DataRepository] = None):
         try:
+            repository = repository or data_repository
+
             # Load XGBoost model
             if os.path.exists(model_path):
                 self.model = joblib.load(model_path)
@@ -24,19 +27,15 @@ class CollegePredictor:
             else:
                 raise FileNotFoundError(f"Model file not found: {model_path}")
 
-            # Load main college dataframe
-            if os.path.exists(data_path):
-                self.college_data = pd.read_excel(data_path)
-                print(f"✅ College data loaded: {len(self.college_data)} records")
-            else:
-                raise FileNotFoundError(f"College data file not found: {data_path}")
+            # Main college dataframe (shared; copied because derived columns are added below)
+            self.college_data = repository.get_cap_data().copy()
+            print(f"✅ College data loaded: {len(self.college_data)} records")
 
-            # Load college list
-            if os.path.exists(college_list_path):
-                self.college_list = pd.read_excel(college_list_path)
-                print(f"✅ College list loaded: {len(self.college_list)} colleges")
-            else:
-                self.college_list = pd.DataFrame()
+            # College list
+            self.college_list = repository.get_college_list()
+
+            # Next-year cutoff forecasts (O(1) per series)
+            self.forecaster = repository.get_forecaster()
 
             # Type weight mapping
             self.type_weight_mapping = {
@@ -76,6 +75,14 @@ class CollegePredictor:
                 self.college_data['category'].dropna().unique().tolist()
             )
 
+            # Register colleges, branches and cities with the shared typeahead index
+            colleges = self.college_data[['college_name', 'college_code']].drop_duplicates()
+            search_index.register('predictor', (
+                [('college', name, code) for name, code in colleges.itertuples(index=False)] +
+                [('branch', branch, None) for branch in self.available_branches] +
+                [('city', city, None) for city in self.available_cities]
+            ))
+
             print(f"🎓 Branches: {len(self.available_branches)}")
             print(f"🏙️ Cities: {len(self.available_cities)}")
             print(f"📊 Categories: {len(self.available_categories)}")
@@ -276,6 +283,11 @@ class CollegePredictor:
                     'category': str(row['category_tag']),
                     'category_emoji': self.get_category_emoji(row['category_tag']),
                     
+                    # Next-year forecast for this college/branch/category
+                    'forecast': self.get_forecast_summary(
+                        row.get('college_code'), row.get('branch_code'), row.get('category')
+                    ),
+
                     # Metadata
                     'quota_category': str(row.get('category', 'N/A')),
                     'round': int(row.get('round', 1)),
@@ -343,6 +355,18 @@ class CollegePredictor:
         return unique_results[:limit]
 
 
+    FORECAST_FIELDS = ['forecast_year', 'forecast_rank', 'rank_lower', 'rank_upper',
+                       'forecast_percentile', 'percentile_lower', 'percentile_upper']
+
+    def get_forecast_summary(self, college_code, branch_code, category) -> Optional[Dict]:
+        """Forecast fields for one series, or None if it has no history"""
+        if college_code is None or branch_code is None or category is None:
+            return None
+        forecast = self.forecaster.get(college_code, branch_code, category)
+        if forecast is None:
+            return None
+        return {field: forecast[field] for field in self.FORECAST_FIELDS}
+
     def get_category_emoji(self, category: str) -> str:
         emojis = {
             "HIGH": "🟢",
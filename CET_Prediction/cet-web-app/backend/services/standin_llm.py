@@ -0,0 +1,67 @@
+"""
+Local stand-in for the Gemini model (tests and offline development)
+
+Answers generate_content like genai.GenerativeModel, unary or streamed,
+with a canned reply and simulated timing: first_token_seconds before the
+first chunk, chunk_seconds between chunks. No API key or network needed.
+
+Enable with CHATBOT_STANDIN=1; timing from CHATBOT_STANDIN_FIRST_TOKEN_SECONDS
+and CHATBOT_STANDIN_CHUNK_SECONDS.
+"""
+import os
+import time
+from typing import Iterator
+
+
+class StandInChunk:
+    """A response (or streamed chunk) with the .text of a genai response"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StandInModel:
+    """generate_content(contents, generation_config=None, stream=False) with a canned reply"""
+
+    WORDS_PER_CHUNK = 4
+
+    def __init__(self, first_token_seconds: float = None, chunk_seconds: float = None):
+        self.first_token_seconds = float(os.getenv('CHATBOT_STANDIN_FIRST_TOKEN_SECONDS', 0.3)) \
+            if first_token_seconds is None else first_token_seconds
+        self.chunk_seconds = float(os.getenv('CHATBOT_STANDIN_CHUNK_SECONDS', 0.02)) \
+            if chunk_seconds is None else chunk_seconds
+
+    def reply_for(self, contents: str) -> str:
+        """Canned answer that echoes the student's last question"""
+        question = str(contents).rsplit('Student:', 1)[-1].split('\n')[0].strip()
+        return (
+            f"(Stand-in reply) You asked: \"{question}\"\n\n"
+            "Here is how I would usually approach this:\n"
+            "1. Check your CET percentile and category rank on the official result.\n"
+            "2. Compare it with the previous years' closing cutoffs for each college and branch.\n"
+            "3. Fill the option form with the colleges you prefer most first, "
+            "keeping a few safer options towards the end.\n"
+            "4. Keep your documents ready for verification before the CAP rounds begin.\n\n"
+            "This answer comes from the local stand-in model, not from Gemini."
+        )
+
+    def _chunks(self, text: str) -> Iterator[str]:
+        words = text.split(' ')
+        for start in range(0, len(words), self.WORDS_PER_CHUNK):
+            piece = ' '.join(words[start:start + self.WORDS_PER_CHUNK])
+            yield piece if start + self.WORDS_PER_CHUNK >= len(words) else piece + ' '
+
+    def generate_content(self, contents, generation_config=None, stream: bool = False, **kwargs):
+        text = self.reply_for(contents)
+        if not stream:
+            chunks = list(self._chunks(text))
+            time.sleep(self.first_token_seconds + self.chunk_seconds * (len(chunks) - 1))
+            return StandInChunk(text)
+        return self._stream(text)
+
+    def _stream(self, text: str) -> Iterator[StandInChunk]:
+        time.sleep(self.first_token_seconds)
+        for position, piece in enumerate(self._chunks(text)):
+            if position:
+                time.sleep(self.chunk_seconds)
+            yield StandInChunk(piece)
@@ -0,0 +1,219 @@
+"""
+Historical allotment simulation for an option form
+
+The cutoff store is packed once into a cube of closing ranks (and closing
+percentiles) indexed by [series, year, CAP round], where a series is one
+(branch_code, category) seat type. Simulating a form is then:
+1. Resolve each option to its series (dict lookups, one per option)
+2. Gather the form's slice of the cube: options x years x rounds
+3. Compare the student's rank (or percentile) with every cutoff at once
+4. The first eligible option along the priority axis is the allotment for
+   that year and round (argmax over a boolean array)
+
+A missing cutoff (the seat type did not exist, or had no vacancy in that
+round) never allots.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.data_repository import DataRepository
+
+
+class AllotmentSimulator:
+    """Rank/percentile cutoff cube with vectorized first-eligible-option lookups"""
+
+    def __init__(self):
+        self.years: List[str] = []
+        self.rounds: List[int] = []
+        self.categories = set()
+        self._series: Dict[tuple, int] = {}
+        self._series_keys: List[tuple] = []
+        self._ranks = np.empty((0, 0, 0))
+        self._percentiles = np.empty((0, 0, 0))
+        self._labels: List[Dict] = []
+
+    # ============================================================================
+    # BUILDING
+    # ============================================================================
+
+    def build(self, df: pd.DataFrame) -> 'AllotmentSimulator':
+        """Pack rows with year, branch_code, category, cap_round and closing cutoffs into the cube"""
+        required = ['year', 'branch_code', 'category', 'closing_rank']
+        if df.empty or any(col not in df.columns for col in required):
+            return self
+
+        df = df.dropna(subset=['year', 'branch_code', 'category'])
+        series_ids, series_keys = pd.factorize(pd.MultiIndex.from_arrays([
+            df['branch_code'].astype(str), df['category'].astype(str).str.strip().str.upper()
+        ]))
+        year_ids, years = pd.factorize(df['year'].astype(str), sort=True)
+        # Stores without round information count as round 1
+        rounds_raw = df['cap_round'].to_numpy() if 'cap_round' in df.columns else np.ones(len(df))
+        rounds_raw = np.where(rounds_raw > 0, rounds_raw, 1).astype(int)
+        round_ids, rounds = pd.factorize(rounds_raw, sort=True)
+
+        shape = (len(series_keys), len(years), len(rounds))
+        self._ranks = np.full(shape, np.nan)
+        self._ranks[series_ids, year_ids, round_ids] = df['closing_rank'].to_numpy(dtype=float)
+        self._percentiles = np.full(shape, np.nan)
+        if 'closing_percentile' in df.columns:
+            percentiles = df['closing_percentile'].to_numpy(dtype=float)
+            # 0 is a placeholder in the source data
+            self._percentiles[series_ids, year_ids, round_ids] = np.where(percentiles > 0, percentiles, np.nan)
+
+        self.years = [str(y) for y in years]
+        self.rounds = [int(r) for r in rounds]
+        self._series_keys = list(series_keys)
+        self._series = {key: position for position, key in enumerate(self._series_keys)}
+        self.categories = {category for _, category in series_keys}
+
+        # Display labels: the latest row seen for each series
+        labels = pd.DataFrame({
+            'series': series_ids,
+            'college_code': df['college_code'].astype(str).to_numpy() if 'college_code' in df.columns else '',
+            'college_name': df['college_name'].astype(str).to_numpy() if 'college_name' in df.columns else '',
+            'branch': df['branch_name'].astype(str).to_numpy() if 'branch_name' in df.columns else '',
+        }).drop_duplicates('series', keep='last').set_index('series').sort_index()
+        self._labels = labels.to_dict('records')
+
+        print(f"✅ Built allotment cube: {shape[0]} seat types x {shape[1]} years x {shape[2]} rounds")
+        return self
+
+    # ============================================================================
+    # SIMULATION
+    # ============================================================================
+
+    # General-quota suffixes: state level, home university, other than home university
+    QUOTA_SUFFIXES = ('S', 'H', 'O')
+
+    def resolve_series(self, branch_code, category: str, option: Optional[Dict] = None) -> int:
+        """
+        Cube row for one option (-1 if the seat type has no cutoff history)
+
+        A store code (GOPENS, TFWS, ...) is used as given. A group name (OPEN,
+        OBC) uses the option's own quota_category when it belongs to the group,
+        otherwise the first general-quota seat the branch has (GOPENS, GOPENH,
+        GOPENO).
+        """
+        if not branch_code:
+            return -1
+        branch_code = DataRepository.canonical_code(branch_code)
+        category = str(category or '').strip().upper()
+        if category in self.categories:
+            candidates = [category]
+        else:
+            quota = str((option or {}).get('quota_category') or '').strip().upper()
+            candidates = [f'G{category}{suffix}' for suffix in self.QUOTA_SUFFIXES]
+            if quota in candidates:
+                candidates.insert(0, quota)
+        for code in candidates:
+            series_id = self._series.get((branch_code, code))
+            if series_id is not None:
+                return series_id
+        return -1
+
+    def simulate(self, options: List[Dict], category: str, rank: Optional[float] = None,
+                 percentile: Optional[float] = None) -> Dict:
+        """
+        First option that would have been allotted in each past year and CAP round
+
+        Args:
+            options: Option form entries in priority order (branch_code required)
+            category: Student category (store code or group name)
+            rank: Student's rank (compared with closing ranks, preferred)
+            percentile: Student's percentile (used when no rank is given)
+
+        Returns:
+            Dict with per-(year, round) allotments, the best allotment per year,
+            and the options that had no cutoff history
+        """
+        basis = 'rank' if rank is not None else 'percentile'
+        series = np.full(len(options), -1)
+        unmatched = []
+        for position, option in enumerate(options):
+            series_id = self.resolve_series(option.get('branch_code'), category, option)
+            series[position] = series_id
+            if series_id < 0:
+                unmatched.append(position + 1)
+
+        known = series >= 0
+        cube = self._ranks if basis == 'rank' else self._percentiles
+        # options x years x rounds; unknown options gather NaN (never eligible)
+        cutoffs = np.full((len(options), len(self.years), len(self.rounds)), np.nan)
+        if known.any():
+            cutoffs[known] = cube[series[known]]
+        with np.errstate(invalid='ignore'):
+            eligible = (rank <= cutoffs) if basis == 'rank' else (percentile >= cutoffs)
+
+        allotted = eligible.any(axis=0)
+        first = eligible.argmax(axis=0)
+
+        allotments = []
+        by_year = {}
+        for y, year in enumerate(self.years):
+            best = None
+            for r, cap_round in enumerate(self.rounds):
+                entry = {'year': year, 'round': cap_round, 'allotted': bool(allotted[y, r])}
+                if allotted[y, r]:
+                    position = int(first[y, r])
+                    entry.update(self._describe(options, series, position, y, r))
+                    if best is None or position < best:
+                        best = position
+                allotments.append(entry)
+            by_year[year] = {'allotted': best is not None, 'priority': best + 1 if best is not None else None}
+
+        return {
+            'basis': basis,
+            'rank': rank,
+            'percentile': percentile,
+            'category': category,
+            'years': self.years,
+            'rounds': self.rounds,
+            'total_options': len(options),
+            'unmatched_priorities': unmatched,
+            'allotments': allotments,
+            'by_year': by_year,
+        }
+
+    def seat_history(self, series: np.ndarray, cap_round: int = 1) -> Dict[str, np.ndarray]:
+        """
+        Closing cutoffs of seat types across years for one CAP round
+
+        Args:
+            series: Cube rows from resolve_series (-1 gathers NaN)
+
+        Returns:
+            Dict of 'ranks' and 'percentiles', each len(series) x len(years)
+        """
+        series = np.asarray(series, dtype=int)
+        shape = (len(series), len(self.years))
+        history = {'ranks': np.full(shape, np.nan), 'percentiles': np.full(shape, np.nan)}
+        if cap_round not in self.rounds:
+            return history
+        r = self.rounds.index(cap_round)
+        known = series >= 0
+        history['ranks'][known] = self._ranks[series[known], :, r]
+        history['percentiles'][known] = self._percentiles[series[known], :, r]
+        return history
+
+    def seat_label(self, series_id: int) -> Dict:
+        """college_code, college_name, branch and category of a cube row"""
+        return {**self._labels[series_id], 'category': self._series_keys[series_id][1]}
+
+    def _describe(self, options: List[Dict], series: np.ndarray, position: int, y: int, r: int) -> Dict:
+        option = options[position]
+        label = self.seat_label(series[position])
+        closing_rank = self._ranks[series[position], y, r]
+        closing_percentile = self._percentiles[series[position], y, r]
+        return {
+            'priority': position + 1,
+            'branch_code': str(option.get('branch_code')),
+            'college_code': label['college_code'],
+            'college_name': option.get('college_name') or label['college_name'],
+            'branch': option.get('branch') or label['branch'],
+            'category': label['category'],
+            'closing_rank': None if np.isnan(closing_rank) else int(closing_rank),
+            'closing_percentile': None if np.isnan(closing_percentile) else round(float(closing_percentile), 4),
+        }
@@ -0,0 +1,265 @@
+"""
+Cache warmup after a deploy
+
+A background thread replays popular requests through the app (test client)
+so the predictor, the comparator caches and the response cache are hot
+before the worker reports ready (/api/ready).
+
+Sources, replayed in this order (duplicates skipped):
+1. The request log (cache/request_log.jsonl, WARMUP_LOG_PATH overrides):
+   one JSON object per line with method, path and json body. The response
+   cache records every request it had to compute, so the log holds recent
+   distinct queries; replays are marked with X-Warmup and are not logged.
+   Newest entries are replayed first. Bodies only keep the fields the
+   endpoint reads. New entries are kept in memory and merged into the file
+   every LOG_FLUSH_SECONDS (or LOG_FLUSH_ENTRIES new entries), which keeps
+   it to the newest LOG_MAX_ENTRIES distinct requests.
+2. A curated list built from the data: percentile buckets x categories for
+   /api/predict (overall and for the most common branches) plus trends and
+   comparisons for the most competitive colleges.
+
+Readiness flips when the replay finishes or WARMUP_BUDGET_SECONDS expires.
+WARMUP_ENABLED=0 skips the warmup (ready immediately).
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+from utils.data_repository import BACKEND_DIR, data_repository
+
+
+WARMUP_HEADER = 'X-Warmup'
+
+
+class CacheWarmer:
+    """Replays logged or curated requests in a background thread"""
+
+    BUDGET_SECONDS = 60
+    # Newest distinct requests kept in the log (and replayed)
+    LOG_MAX_ENTRIES = 2000
+    # New entries are merged into the file this often, or once this many are pending
+    LOG_FLUSH_SECONDS = 30
+    LOG_FLUSH_ENTRIES = 100
+
+    PERCENTILE_BUCKETS = [99, 97, 95, 92, 90, 85, 80, 75, 70, 60, 50]
+    CATEGORIES = ['OPEN', 'OBC', 'SC', 'ST', 'EWS']
+    POPULAR_BRANCHES = 3
+    POPULAR_COLLEGES = 24
+    COMPARE_GROUP_SIZE = 3
+
+    def __init__(self, log_path: Optional[str] = None, repository=None):
+        self.log_path = log_path or os.getenv(
+            'WARMUP_LOG_PATH', os.path.join(BACKEND_DIR, 'cache', 'request_log.jsonl')
+        )
+        self.repository = repository or data_repository
+        self._log_lock = threading.Lock()
+        # Distinct requests recorded since the last flush, oldest first
+        self._pending: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush_log)
+        self._thread: Optional[threading.Thread] = None
+        self.status = {
+            'state': 'pending',
+            'source': None,
+            'total': 0,
+            'done': 0,
+            'failed': 0,
+            'budget_seconds': None,
+            'elapsed_seconds': 0.0,
+        }
+        self.ready = False
+
+    # ============================================================================
+    # REQUEST LOG
+    # ============================================================================
+
+    def record(self, method: str, path: str, body: Optional[Dict] = None):
+        """
+        Remember one request for the next warmup
+
+        Args:
+            body: JSON fields needed to replay it (None for GET requests)
+        """
+        entry = {'method': method, 'path': path, 'json': body}
+        key = self._request_key(entry)
+        with self._log_lock:
+            self._pending.pop(key, None)
+            self._pending[key] = entry
+            while len(self._pending) > self.LOG_MAX_ENTRIES:
+                self._pending.popitem(last=False)
+            due = (len(self._pending) >= self.LOG_FLUSH_ENTRIES
+                   or time.monotonic() - self._last_flush >= self.LOG_FLUSH_SECONDS)
+        if due:
+            self.flush_log()
+
+    def flush_log(self):
+        """Merge pending entries into the log file, keeping the newest LOG_MAX_ENTRIES"""
+        with self._log_lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, OrderedDict()
+            # Other workers flush into the same file; merge rather than overwrite
+            requests = OrderedDict((self._request_key(entry), entry) for entry in self._read_log())
+            for key, entry in pending.items():
+                requests.pop(key, None)
+                requests[key] = entry
+            self._write_log(list(requests.values())[-self.LOG_MAX_ENTRIES:])
+
+    def load_log(self) -> List[Dict]:
+        """Newest distinct requests from the log, oldest first"""
+        with self._log_lock:
+            entries = self._read_log()
+        return entries[-self.LOG_MAX_ENTRIES:]
+
+    def _read_log(self) -> List[Dict]:
+        """Distinct entries of the log file, oldest first (latest occurrence wins)"""
+        if not os.path.exists(self.log_path):
+            return []
+        try:
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError as e:
+            print(f"⚠️ Could not read warmup log: {e}")
+            return []
+
+        requests = OrderedDict()
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict) or not entry.get('path'):
+                continue
+            key = self._request_key(entry)
+            requests.pop(key, None)
+            requests[key] = entry
+        return list(requests.values())
+
+    @staticmethod
+    def _request_key(entry: Dict) -> str:
+        return json.dumps([entry.get('method', 'GET'), entry['path'], entry.get('json')], sort_keys=True)
+
+    def _write_log(self, entries: List[Dict]):
+        """Replace the log with entries (temp file + os.replace; skipped if not writable)"""
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.request_log.', suffix='.tmp',
+                                            dir=os.path.dirname(self.log_path))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            os.replace(tmp_path, self.log_path)
+        except OSError as e:
+            print(f"⚠️ Could not write warmup log: {e}")
+
+    # ============================================================================
+    # CURATED REQUESTS
+    # ============================================================================
+
+    def curated_requests(self) -> List[Dict]:
+        """Popular predictor and comparator queries derived from the data"""
+        requests = []
+
+        cap = self.repository.get_cap_data()
+        branches = cap['branch_name'].value_counts().index[:self.POPULAR_BRANCHES].tolist()
+        for percentile in self.PERCENTILE_BUCKETS:
+            for category in self.CATEGORIES:
+                requests.append({'method': 'POST', 'path': '/api/predict',
+                                 'json': {'percentile': percentile, 'category': category}})
+        for branch in branches:
+            for percentile in self.PERCENTILE_BUCKETS:
+                requests.append({'method': 'POST', 'path': '/api/predict',
+                                 'json': {'percentile': percentile, 'category': 'OPEN', 'branches': [branch]}})
+
+        # Most competitive colleges: lowest latest-year GOPENS closing rank
+        comparator = self.repository.get_comparator()
+        store = comparator.cutoff_data
+        if store.empty:
+            return requests
+        latest = store[(store['year'] == store['year'].max()) & (store['category'] == 'GOPENS')]
+        best = (latest.sort_values('closing_rank')
+                .drop_duplicates('college_code')
+                .head(self.POPULAR_COLLEGES))
+        for code, branch in zip(best['college_code'], best['branch_name']):
+            for endpoint in ('trends', 'trend-analysis'):
+                query = urlencode({'branch': branch, 'category': 'GOPENS'})
+                requests.append({'method': 'GET', 'path': f'/api/colleges/{code}/{endpoint}?{query}'})
+
+        codes = best['college_code'].tolist()
+        for start in range(0, len(codes), self.COMPARE_GROUP_SIZE):
+            group = codes[start:start + self.COMPARE_GROUP_SIZE]
+            query = urlencode({'college_codes': ','.join(group)})
+            requests.append({'method': 'GET', 'path': f'/api/colleges/branches?{query}'})
+            for branch in branches:
+                requests.append({'method': 'POST', 'path': '/api/colleges/compare',
+                                 'json': {'college_codes': group, 'branch': branch, 'category': 'GOPENS'}})
+        return requests
+
+    # ============================================================================
+    # REPLAY
+    # ============================================================================
+
+    def start(self, app, budget_seconds: Optional[float] = None) -> Optional[threading.Thread]:
+        """Start the warmup thread (or mark ready right away when disabled)"""
+        if os.getenv('WARMUP_ENABLED', '1').strip().lower() in ('0', 'false', 'no'):
+            self.status['state'] = 'disabled'
+            self.ready = True
+            return None
+        budget = budget_seconds or float(os.getenv('WARMUP_BUDGET_SECONDS', self.BUDGET_SECONDS))
+        self.status['budget_seconds'] = budget
+        self._thread = threading.Thread(target=self._run, args=(app, budget),
+                                        name='cache-warmup', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _run(self, app, budget: float):
+        start_time = time.time()
+        try:
+            self.status['state'] = 'running'
+            logged = self.load_log()[::-1]
+            curated = self.curated_requests()
+            requests = list(OrderedDict(
+                (self._request_key(entry), entry) for entry in logged + curated
+            ).values())
+            self.status['source'] = f"{len(logged)} logged + {len(requests) - len(logged)} curated"
+            self.status['total'] = len(requests)
+            print(f"🔥 Cache warmup: replaying {self.status['source']} requests (budget {budget:.0f}s)")
+
+            client = app.test_client()
+            for entry in requests:
+                if time.time() - start_time > budget:
+                    self.status['state'] = 'budget_expired'
+                    break
+                try:
+                    response = client.open(entry['path'], method=entry.get('method', 'GET'),
+                                           json=entry.get('json'), headers={WARMUP_HEADER: '1'})
+                    if response.status_code >= 500:
+                        self.status['failed'] += 1
+                except Exception:
+                    self.status['failed'] += 1
+                self.status['done'] += 1
+                self.status['elapsed_seconds'] = round(time.time() - start_time, 2)
+            else:
+                self.status['state'] = 'complete'
+        except Exception as e:
+            print(f"❌ Cache warmup failed: {e}")
+            self.status['state'] = 'failed'
+        finally:
+            self.status['elapsed_seconds'] = round(time.time() - start_time, 2)
+            self.ready = True
+            print(f"✅ Cache warmup {self.status['state']}: {self.status['done']}/{self.status['total']} "
+                  f"requests in {self.status['elapsed_seconds']}s ({self.status['failed']} failed)")
+
+    def get_status(self) -> Dict:
+        return {'ready': self.ready, **self.status}
+
+
+# Process-wide instance
+cache_warmer = CacheWarmer()
@@ -1,8 +1,10 @@
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Optional, Tuple
-import os
+import json
 from collections import defaultdict
+from utils.search_index import search_index
+from utils.data_repository import DataRepository
 
 class CollegeComparator:
     """
@@ -206,26 +208,35 @@ class CollegeComparator:
         ]
     }
     
-    def __init__(self,
-                 merged_data_path: str = 'data/merged_cutoff_2021_2025.csv',
-                 individual_data_dir: str = 'data/cutoff_trends',
-                 colleges_url_path: str = 'data/Colleges_URL.xlsx',
-                 main_data_path: str = 'data/flattened_CAP_data done.xlsx'):
+    def __init__(self, repository=None):
         """
-        Initialize the College Comparator with multi-source data loading
+        Initialize the College Comparator from the shared data repository
+        
+        Args:
+            repository: DataRepository to read from (defaults to the process-wide one)
         """
         try:
-            # Load merged cutoff data (2021-2025)
-            self.merged_data = self._load_merged_data(merged_data_path)
+            if repository is None:
+                from utils.data_repository import data_repository
+                repository = data_repository
+            self.repository = repository
             
-            # Load individual year files as fallback
-            self.individual_data = self._load_individual_data(individual_data_dir)
+            # Load merged cutoff data (2021-2025)
+            merged_data = repository.load_merged_cutoffs()
             
-            # Load college URLs
-            self.college_urls = self._load_college_urls(colleges_url_path)
+            # Load individual year files (only years the merged snapshot lacks or
+            # that changed since it was built)
+            partition_status = repository.get_cutoff_partition_status()
+            individual_data = repository.load_yearly_cutoffs(
+                years=[year for year, state in partition_status.items() if state != 'merged']
+            )
+            changed_years = [year for year, state in partition_status.items() if state == 'changed']
             
-            # Load main college metadata
-            self.college_metadata = self._load_college_metadata(main_data_path)
+            # College URLs (shared with the directory): code index + URL array with a
+            # trailing None so that a missing code (-1) gathers None
+            self.college_url_table = repository.get_college_url_table()
+            self.college_urls = repository.get_college_urls()
+            self._url_values = np.append(self.college_url_table.to_numpy(dtype=object), None)
             
             # Build reverse category mapping for normalization
             self.category_code_to_group = {}
@@ -245,18 +256,25 @@ class CollegeComparator:
                 for variation in variations:
                     self.type_name_to_group[variation.lower()] = group
             
+            # Merge both cutoff sources into one year-partitioned store
+            self.cutoff_data = self._build_cutoff_store(merged_data, individual_data, replaced_years=changed_years)
+            del merged_data, individual_data
+            
+            # Materialize college catalog and per-college statistics
+            self.refresh_materialized_views()
+            
             print("✅ College Comparator initialized successfully!")
-            print(f"   - Merged data: {len(self.merged_data)} records")
-            print(f"   - Individual data: {len(self.individual_data)} records")
+            print(f"   - Cutoff store: {len(self.cutoff_data)} records "
+                  f"({', '.join(self.year_partitions) or 'no years'})")
             print(f"   - College URLs: {len(self.college_urls)} colleges")
             print(f"   - Category groups: {len(self.CATEGORY_GROUPS)}")
             print(f"   - Branch groups: {len(self.BRANCH_GROUPS)}")
+            print(f"   - College catalog: {len(self.college_catalog)} colleges (latest year {self.catalog_latest_year})")
+            print(f"   - College stats: {len(self.college_stats)} colleges")
             
             # Debug: Print sample data columns
-            if not self.merged_data.empty:
-                print(f"   - Merged data columns: {list(self.merged_data.columns)}")
-            if not self.individual_data.empty:
-                print(f"   - Individual data columns: {list(self.individual_data.columns)}")
+            if not self.cutoff_data.empty:
+                print(f"   - Cutoff store columns: {list(self.cutoff_data.columns)}")
             
         except Exception as e:
             print(f"❌ Error initializing College Comparator: {e}")
@@ -265,133 +283,128 @@ class CollegeComparator:
             raise
     
     # ============================================================================
-    # DATA LOADING METHODS
+    # CUTOFF STORE (single, year-partitioned)
     # ============================================================================
     
-    def _load_merged_data(self, path: str) -> pd.DataFrame:
-        """Load merged cutoff data (2021-2025)"""
-        try:
-            if os.path.exists(path):
-                df = pd.read_csv(path)
-                # Ensure college_code is string for consistent comparison
-                df['college_code'] = df['college_code'].astype(str).str.strip()
-                df['year'] = df['year'].astype(str)
-                df['category'] = df['category'].astype(str).str.strip().str.upper()
-                df['branch_name'] = df['branch_name'].astype(str).str.strip()
-                print(f"✅ Loaded merged data: {len(df)} records")
-                return df
-            else:
-                print(f"⚠️ Merged data file not found: {path}")
-                return pd.DataFrame()
-        except Exception as e:
-            print(f"❌ Error loading merged data: {e}")
-            import traceback
-            traceback.print_exc()
-            return pd.DataFrame()
+    SERIES_KEY = ['year', 'college_code', 'branch_name', 'category']
+    CATEGORICAL_COLUMNS = ['category', 'branch_name', 'type']
     
-    def _load_individual_data(self, dir_path: str) -> pd.DataFrame:
-        """Load individual year files (2021-2025) as fallback"""
-        try:
-            if not os.path.exists(dir_path):
-                print(f"⚠️ Individual data directory not found: {dir_path}")
-                return pd.DataFrame()
+    def _build_cutoff_store(self, merged: pd.DataFrame, individual: pd.DataFrame,
+                            replaced_years: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Merge the merged file and the per-year files into one frame
+        
+        Precedence: a year in replaced_years (its per-year file changed since
+        the snapshot was built) comes entirely from the per-year file. Otherwise
+        the merged file wins for any (year, college, branch, category) series it
+        contains; per-year rows only fill series-years it lacks.
+        Rows are sorted by year so each year is a contiguous partition.
+        """
+        merged = self._canonicalize_cutoffs(merged)
+        individual = self._canonicalize_cutoffs(individual)
+        
+        report = {
+            'merged_rows': len(merged),
+            'individual_rows': len(individual),
+            'replaced_years': sorted(replaced_years or []),
+            'replaced_rows': 0,
+            'overlapping_rows': 0,
+            'conflicting_rows': 0,
+        }
+        
+        # Stale snapshot copies of changed years give way to the fresh files
+        if replaced_years and not merged.empty and 'year' in merged.columns:
+            stale = merged['year'].isin(replaced_years).to_numpy()
+            report['replaced_rows'] = int(stale.sum())
+            merged = merged.loc[~stale].reset_index(drop=True)
+        
+        if merged.empty:
+            store = individual
+        elif individual.empty:
+            store = merged
+        else:
+            merged_keys = pd.MultiIndex.from_frame(merged[self.SERIES_KEY])
+            overlap = pd.MultiIndex.from_frame(individual[self.SERIES_KEY]).isin(merged_keys)
+            report['overlapping_rows'] = int(overlap.sum())
             
-            all_data = []
-            for year in ['2021', '2022', '2023', '2024', '2025']:
-                file_path = os.path.join(dir_path, f"{year}.csv")
-                if os.path.exists(file_path):
-                    df_year = pd.read_csv(file_path)
-                    df_year['year'] = year
-                    # Ensure consistent data types
-                    df_year['college_code'] = df_year['college_code'].astype(str).str.strip()
-                    df_year['category'] = df_year['category'].astype(str).str.strip().str.upper()
-                    df_year['branch_name'] = df_year['branch_name'].astype(str).str.strip()
-                    all_data.append(df_year)
-                    print(f"   ✓ Loaded {year}: {len(df_year)} records")
+            # Overlapping rows whose closing rank disagrees with the merged file
+            join_cols = self.SERIES_KEY + (
+                ['cap_round'] if 'cap_round' in merged.columns and 'cap_round' in individual.columns else []
+            )
+            if 'closing_rank' in merged.columns and 'closing_rank' in individual.columns:
+                both = individual.loc[overlap, join_cols + ['closing_rank']].merge(
+                    merged[join_cols + ['closing_rank']].drop_duplicates(subset=join_cols),
+                    on=join_cols, suffixes=('_individual', '_merged')
+                )
+                report['conflicting_rows'] = int(
+                    (both['closing_rank_individual'] != both['closing_rank_merged']).sum()
+                )
             
-            if all_data:
-                df_combined = pd.concat(all_data, ignore_index=True)
-                print(f"✅ Combined individual data: {len(df_combined)} records")
-                return df_combined
-            else:
-                print("⚠️ No individual year files found")
-                return pd.DataFrame()
-                
-        except Exception as e:
-            print(f"❌ Error loading individual data: {e}")
-            import traceback
-            traceback.print_exc()
-            return pd.DataFrame()
+            store = pd.concat([merged, individual.loc[~overlap]], ignore_index=True)
+        
+        if store.empty:
+            self.year_partitions = {}
+            self._college_rows = {}
+            self.store_report = {**report, 'store_rows': 0}
+            return store
+        
+        store = store.sort_values(['year', 'college_code'], kind='stable').reset_index(drop=True)
+        
+        # Keep the repetitive text columns categorical (concat with the merged file may undo it)
+        for col in self.CATEGORICAL_COLUMNS:
+            if col in store.columns and not isinstance(store[col].dtype, pd.CategoricalDtype):
+                store[col] = store[col].astype('category')
+        
+        # Normalized labels computed once per distinct value, stored as categoricals
+        store['branch_normalized'] = self._map_distinct(store['branch_name'], self.normalize_branch)
+        store['category_normalized'] = self._map_distinct(store['category'], self.normalize_category)
+        store['type_normalized'] = self._map_distinct(store['type'], self.normalize_college_type)
+        
+        years = store['year'].to_numpy()
+        self.year_partitions = {
+            year: slice(int(np.searchsorted(years, year, 'left')),
+                        int(np.searchsorted(years, year, 'right')))
+            for year in pd.unique(years)
+        }
+        self._college_rows = store.groupby('college_code', sort=False).indices
+        
+        report['store_rows'] = len(store)
+        self.store_report = report
+        print(f"✅ Built cutoff store: {report['store_rows']} records "
+              f"(merged file: {report['merged_rows']}, per-year files: {report['individual_rows']}, "
+              f"overlapping: {report['overlapping_rows']}, conflicts: {report['conflicting_rows']}, "
+              f"replaced from changed year files: {report['replaced_rows']})")
+        return store
     
-    def _load_college_urls(self, path: str) -> Dict[str, str]:
-        """Load college URLs from Excel file"""
-        try:
-            if os.path.exists(path):
-                df = pd.read_excel(path)
-                
-                # Debug: Print column names to see what we have
-                print(f"   URL file columns: {list(df.columns)}")
-                
-                url_map = {}
-                for _, row in df.iterrows():
-                    # Try different possible column names
-                    college_code = None
-                    url = None
-                    
-                    # Check for College Code column
-                    if 'College Code' in df.columns:
-                        college_code = str(row['College Code']).strip()
-                    elif 'college_code' in df.columns:
-                        college_code = str(row['college_code']).strip()
-                    
-                    # Check for URL column
-                    if 'URL' in df.columns:
-                        url = str(row['URL']).strip()
-                    elif 'url' in df.columns:
-                        url = str(row['url']).strip()
-                    
-                    # Clean up URL
-                    if url and url != 'nan' and url.lower() != 'nan':
-                        # Add https:// if missing
-                        if url.startswith('www.'):
-                            url = 'https://' + url
-                        elif not url.startswith('http://') and not url.startswith('https://'):
-                            url = 'https://' + url
-                        
-                        if college_code:
-                            url_map[college_code] = url
-                
-                print(f"✅ Loaded {len(url_map)} college URLs")
-                
-                # Debug: Show first 3 mappings
-                if url_map:
-                    print(f"   Sample URLs:")
-                    for i, (code, url) in enumerate(list(url_map.items())[:3]):
-                        print(f"      {code}: {url}")
-                
-                return url_map
-            else:
-                print(f"⚠️ College URL file not found: {path}")
-                return {}
-        except Exception as e:
-            print(f"❌ Error loading college URLs: {e}")
-            import traceback
-            traceback.print_exc()
-            return {}
+    def _canonicalize_cutoffs(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Give a cutoff frame the store's column layout (type and city always present)"""
+        if df.empty:
+            return df
+        if 'type' not in df.columns:
+            df = df.rename(columns={'college_type': 'type'}) if 'college_type' in df.columns else df.assign(type=None)
+        if 'city' not in df.columns:
+            df['city'] = df['college_code'].map(self.repository.get_college_city_map())
+        return df
     
-    def _load_college_metadata(self, path: str) -> pd.DataFrame:
-        """Load main college metadata"""
-        try:
-            if os.path.exists(path):
-                df = pd.read_excel(path)
-                print(f"✅ Loaded college metadata: {len(df)} records")
-                return df
-            else:
-                print(f"⚠️ College metadata file not found: {path}")
-                return pd.DataFrame()
-        except Exception as e:
-            print(f"❌ Error loading college metadata: {e}")
-            return pd.DataFrame()
+    @staticmethod
+    def _map_distinct(values: pd.Series, func) -> pd.Series:
+        """Apply func once per distinct value and return a categorical column"""
+        mapping = {v: func(v) for v in values.dropna().unique()}
+        return values.astype(object).map(mapping).fillna('Unknown').astype('category')
+    
+    def get_college_rows(self, college_code: str) -> pd.DataFrame:
+        """All store rows for one college via the college index"""
+        rows = self._college_rows.get(DataRepository.canonical_code(college_code))
+        if rows is None:
+            return self.cutoff_data.iloc[0:0]
+        return self.cutoff_data.iloc[rows]
+    
+    def get_year_rows(self, year: str) -> pd.DataFrame:
+        """All store rows for one year (a contiguous partition)"""
+        partition = self.year_partitions.get(str(year))
+        if partition is None:
+            return self.cutoff_data.iloc[0:0]
+        return self.cutoff_data.iloc[partition]
     
     # ============================================================================
     # NORMALIZATION METHODS
@@ -440,7 +453,7 @@ class CollegeComparator:
     
     def get_college_data(self, college_code: str, branch: str, category: str) -> List[Dict]:
         """
-        Get college data for comparison with fallback to individual files
+        Get college data for comparison from the unified cutoff store
         
         Args:
             college_code: College code (as string)
@@ -460,40 +473,8 @@ class CollegeComparator:
         print(f"   Normalized branch: {branch_normalized}")
         print(f"   Category (uppercase): {category}")
         
-        # Try merged data first
-        data = self._get_from_merged(college_code, branch, branch_normalized, category)
-        print(f"   Found {len(data)} records from merged data")
-        
-        # Fallback to individual files if merged data is incomplete
-        if len(data) < 3:  # If less than 3 years of data
-            individual_data = self._get_from_individual(college_code, branch, branch_normalized, category)
-            print(f"   Found {len(individual_data)} records from individual data")
-            
-            # Merge results, preferring merged data for overlapping years
-            existing_years = {str(d['year']) for d in data}
-            for record in individual_data:
-                if str(record['year']) not in existing_years:
-                    data.append(record)
-        
-        # Sort by year
-        data.sort(key=lambda x: x['year'])
-        
-        print(f"   Total data points: {len(data)}")
-        return data
-    
-    def _get_from_merged(self, college_code: str, branch: str, 
-                         branch_normalized: str, category: str) -> List[Dict]:
-        """Get data from merged file"""
-        if self.merged_data.empty:
-            return []
-        
         try:
-            # Filter by college code (string comparison)
-            df = self.merged_data[
-                self.merged_data['college_code'] == college_code
-            ].copy()
-            
-            print(f"      Merged - After college filter: {len(df)} records")
+            df = self.get_college_rows(college_code)
             
             if len(df) == 0:
                 return []
@@ -501,92 +482,28 @@ class CollegeComparator:
             # Filter by branch (check both original and normalized)
             branch_mask = (
                 (df['branch_name'].str.lower() == branch.lower()) |
-                (df['branch_name'].apply(self.normalize_branch) == branch_normalized)
-            )
-            df = df[branch_mask]
-            
-            print(f"      Merged - After branch filter: {len(df)} records")
-            
-            if len(df) == 0:
-                # Debug: Show available branches
-                available = self.merged_data[
-                    self.merged_data['college_code'] == college_code
-                ]['branch_name'].unique()
-                print(f"      Available branches: {list(available)[:5]}")
-                return []
-            
-            # Filter by category
-            df = df[df['category'] == category]
-            
-            print(f"      Merged - After category filter: {len(df)} records")
-            
-            if len(df) == 0:
-                # Debug: Show available categories
-                available = self.merged_data[
-                    self.merged_data['college_code'] == college_code
-                ]['category'].unique()
-                print(f"      Available categories: {list(available)[:10]}")
-                return []
-            
-            # Add normalized fields
-            df['branch_normalized'] = df['branch_name'].apply(self.normalize_branch)
-            df['category_normalized'] = df['category'].apply(self.normalize_category)
-            df['type_normalized'] = df['type'].apply(self.normalize_college_type) if 'type' in df.columns else 'Unknown'
-            
-            # Add college URL
-            df['college_url'] = self.college_urls.get(college_code, '')
-            
-            return df.to_dict('records')
-            
-        except Exception as e:
-            print(f"⚠️ Error getting merged data for {college_code}: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
-    
-    def _get_from_individual(self, college_code: str, branch: str,
-                            branch_normalized: str, category: str) -> List[Dict]:
-        """Get data from individual year files"""
-        if self.individual_data.empty:
-            return []
-        
-        try:
-            # Filter by college code (string comparison)
-            df = self.individual_data[
-                self.individual_data['college_code'] == college_code
-            ].copy()
-            
-            if len(df) == 0:
-                return []
-            
-            # Filter by branch
-            branch_mask = (
-                (df['branch_name'].str.lower() == branch.lower()) |
-                (df['branch_name'].apply(self.normalize_branch) == branch_normalized)
+                (df['branch_normalized'] == branch_normalized)
             )
-            df = df[branch_mask]
-            
-            if len(df) == 0:
-                return []
-            
-            # Filter by category
-            df = df[df['category'] == category]
+            df = df[branch_mask & (df['category'] == category)]
             
             if len(df) == 0:
+                # Debug: Show available branches/categories
+                available = self.get_college_rows(college_code)
+                print(f"      Available branches: {list(available['branch_name'].unique())[:5]}")
+                print(f"      Available categories: {list(available['category'].unique())[:10]}")
                 return []
             
-            # Add normalized fields
-            df['branch_normalized'] = df['branch_name'].apply(self.normalize_branch)
-            df['category_normalized'] = df['category'].apply(self.normalize_category)
-            df['type_normalized'] = df['type'].apply(self.normalize_college_type) if 'type' in df.columns else 'Unknown'
+            records = df.to_dict('records')
+            college_url = self.college_urls.get(college_code, '')
+            for record in records:
+                record['college_url'] = college_url
             
-            # Add college URL
-            df['college_url'] = self.college_urls.get(college_code, '')
-            
-            return df.to_dict('records')
+            # Store is partitioned by year, so records are already in year order
+            print(f"   Total data points: {len(records)}")
+            return records
             
         except Exception as e:
-            print(f"⚠️ Error getting individual data for {college_code}: {e}")
+            print(f"⚠️ Error getting data for {college_code}: {e}")
             import traceback
             traceback.print_exc()
             return []
@@ -601,75 +518,95 @@ class CollegeComparator:
         Returns:
             List of unique college records
         """
-        # Use merged data, fallback to individual
-        df = self.merged_data if not self.merged_data.empty else self.individual_data
-        
-        if df.empty:
-            return []
-        
-        df_filtered = df.copy()
-        
-        # Apply filters
-        if filters:
-            if filters.get('city'):
-                df_filtered = df_filtered[
-                    df_filtered['city'].str.contains(filters['city'], case=False, na=False)
-                ]
-            
-            if filters.get('type'):
-                df_filtered = df_filtered[
-                    df_filtered['type'].apply(self.normalize_college_type) == filters['type']
-                ]
-        
-        # Get latest year data
-        latest_year = df_filtered['year'].max() if len(df_filtered) > 0 else '2025'
-        df_latest = df_filtered[df_filtered['year'] == latest_year]
-        
-        # Get unique colleges (group by college_code)
-        df_unique = df_latest.drop_duplicates(subset=['college_code'], keep='first').copy()
+        positions = self._catalog_positions(filters)
+        return self.college_catalog.iloc[positions].to_dict('records')
+    
+    def get_all_colleges_json(self, filters: Dict = None) -> str:
+        """Get all unique colleges as JSON (unfiltered list is pre-serialized)"""
+        if not filters:
+            return self.college_catalog_json
+        positions = self._catalog_positions(filters)
+        return self.college_catalog.iloc[positions].to_json(orient='records')
+    
+    def query_catalog(self, filters: Dict = None, offset: int = 0, limit: Optional[int] = None,
+                      fields: Optional[List[str]] = None) -> Tuple[List[Dict], int]:
+        """
+        One page of the catalog, filtered through the city/type/name indexes
         
-        # Add normalized fields
-        df_unique['type_normalized'] = df_unique['type'].apply(self.normalize_college_type) if 'type' in df_unique.columns else 'Unknown'
+        Args:
+            filters: Optional city (substring), type (normalized group) and
+                name (ranked name/code search) filters
+            offset: Matches to skip
+            limit: Page size (None = all remaining)
+            fields: Catalog columns to return (None = every column)
         
-        # Add URLs
-        df_unique['college_url'] = df_unique['college_code'].map(self.college_urls)
+        Returns:
+            (records, total) where total counts every match
+        """
+        filters = filters or {}
+        if filters.get('name'):
+            positions = self._search_catalog_positions(filters['name'], filters)
+        else:
+            positions = self._catalog_positions(filters)
         
-        return df_unique.to_dict('records')
+        page = positions[offset:offset + limit] if limit else positions[offset:]
+        frame = self.college_catalog.iloc[page]
+        if fields:
+            frame = frame[fields]
+        # to_json handles the store's numpy dtypes
+        return json.loads(frame.to_json(orient='records')), len(positions)
+    
+    def search_colleges(self, query: str, filters: Dict = None,
+                        limit: Optional[int] = None) -> List[Dict]:
+        """Search colleges by name or code (ranked, typo-tolerant)"""
+        positions = self._search_catalog_positions(query, filters, limit)
+        return self.college_catalog.iloc[positions].to_dict('records')
     
-    def search_colleges(self, query: str, filters: Dict = None) -> List[Dict]:
-        """Search colleges by name"""
-        df = self.merged_data if not self.merged_data.empty else self.individual_data
+    def search_colleges_json(self, query: str, filters: Dict = None,
+                             limit: Optional[int] = None) -> str:
+        """Search colleges by name or code, returning JSON"""
+        positions = self._search_catalog_positions(query, filters, limit)
+        return self.college_catalog.iloc[positions].to_json(orient='records')
+    
+    def _catalog_positions(self, filters: Dict = None) -> np.ndarray:
+        """Resolve city/type filters to catalog row positions using the indexes"""
+        positions = self._catalog_current
         
-        if df.empty:
-            return []
+        if not filters:
+            return positions
         
-        # Apply search query
-        df_filtered = df[
-            df['college_name'].str.contains(query, case=False, na=False)
-        ].copy()
-        
-        # Apply filters
-        if filters:
-            if filters.get('city'):
-                df_filtered = df_filtered[
-                    df_filtered['city'].str.contains(filters['city'], case=False, na=False)
-                ]
-            
-            if filters.get('type'):
-                df_filtered = df_filtered[
-                    df_filtered['type'].apply(self.normalize_college_type) == filters['type']
-                ]
+        if filters.get('city'):
+            # Substring match (case-insensitive) over distinct cities only
+            city_query = str(filters['city']).strip().lower()
+            matches = [
+                rows for city, rows in self._catalog_city_index.items()
+                if city_query in city
+            ]
+            city_rows = np.concatenate(matches) if matches else np.array([], dtype=np.int64)
+            positions = np.intersect1d(positions, city_rows)
         
-        # Get unique colleges
-        latest_year = df_filtered['year'].max() if len(df_filtered) > 0 else '2025'
-        df_latest = df_filtered[df_filtered['year'] == latest_year]
-        df_unique = df_latest.drop_duplicates(subset=['college_code'], keep='first').copy()
+        if filters.get('type'):
+            type_rows = self._catalog_type_index.get(filters['type'], np.array([], dtype=np.int64))
+            positions = np.intersect1d(positions, type_rows)
         
-        # Add normalized fields and URLs
-        df_unique['type_normalized'] = df_unique['type'].apply(self.normalize_college_type) if 'type' in df_unique.columns else 'Unknown'
-        df_unique['college_url'] = df_unique['college_code'].map(self.college_urls)
+        return positions
+    
+    def _search_catalog_positions(self, query: str, filters: Dict = None,
+                                  limit: Optional[int] = None) -> np.ndarray:
+        """Catalog positions matching the query (name or code), best match first"""
+        positions = self._catalog_positions(filters)
+        if not str(query).strip():
+            return positions[:limit] if limit else positions
         
-        return df_unique.to_dict('records')
+        allowed = set(positions.tolist())
+        ranked = []
+        for code in search_index.search_codes(query):
+            position = self._catalog_code_position.get(code)
+            if position is not None and position in allowed:
+                ranked.append(position)
+                if limit and len(ranked) >= limit:
+                    break
+        return np.array(ranked, dtype=np.int64)
     
     # ============================================================================
     # COMPARISON METHODS
@@ -717,7 +654,7 @@ class CollegeComparator:
         Returns:
             List of available branch names
         """
-        df = self.merged_data if not self.merged_data.empty else self.individual_data
+        df = self.cutoff_data
         
         if df.empty:
             return []
@@ -743,7 +680,7 @@ class CollegeComparator:
         Returns:
             List of category codes
         """
-        df = self.merged_data if not self.merged_data.empty else self.individual_data
+        df = self.cutoff_data
         
         if df.empty:
             return []
@@ -758,7 +695,7 @@ class CollegeComparator:
             branch_normalized = self.normalize_branch(branch)
             branch_mask = (
                 (df['branch_name'].str.lower() == branch.lower()) |
-                (df['branch_name'].apply(self.normalize_branch) == branch_normalized)
+                (df['branch_normalized'] == branch_normalized)
             )
             df = df[branch_mask]
         
@@ -766,7 +703,7 @@ class CollegeComparator:
     
     def get_available_cities(self) -> List[str]:
         """Get all available cities"""
-        df = self.merged_data if not self.merged_data.empty else self.individual_data
+        df = self.cutoff_data
         
         if df.empty:
             return []
@@ -792,96 +729,564 @@ class CollegeComparator:
         return ''
     
     # ============================================================================
-    # STATISTICS & ANALYSIS
+    # MATERIALIZED VIEWS (rebuilt only when data is (re)loaded)
     # ============================================================================
     
-    def get_college_stats(self, college_code: str) -> Dict:
-        """Get comprehensive statistics for a college"""
-        df = self.merged_data if not self.merged_data.empty else self.individual_data
+    def refresh_materialized_views(self):
+        """Rebuild the college catalog and per-college statistics from loaded data"""
+        self._build_college_catalog()
+        self.college_stats, self.college_stats_json = self._build_college_stats()
+        self._build_rank_index()
+        self._build_series_trends()
+        self._register_search_entries()
+    
+    def _register_search_entries(self):
+        """Register catalog colleges, codes, cities and branches with the typeahead index"""
+        if self.college_catalog.empty:
+            return
+        codes = self.college_catalog['college_code'].tolist()
+        df = self.cutoff_data
+        search_index.register('comparator', (
+            [('college', name, code) for name, code in zip(self.college_catalog['college_name'], codes)] +
+            [('code', code, code) for code in codes] +
+            [('city', city, code) for city, code in zip(self.college_catalog['city'], codes) if pd.notna(city)] +
+            [('branch', branch, None) for branch in df['branch_name'].dropna().unique()]
+        ))
+    
+    def _build_college_catalog(self):
+        """
+        Build a one-row-per-college catalog from each college's latest record,
+        with type_normalized, city and URL attached, plus city/type indexes.
+        """
+        df = self.cutoff_data
         
         if df.empty:
-            return {}
+            self.college_catalog = pd.DataFrame()
+            self.catalog_latest_year = None
+            self._catalog_current = np.array([], dtype=np.int64)
+            self._catalog_city_index = {}
+            self._catalog_type_index = {}
+            self._catalog_code_position = {}
+            self._catalog_url_ids = np.array([], dtype=np.int64)
+            self.college_catalog_json = '[]'
+            return
         
-        college_code = str(college_code).strip()
-        df_college = df[df['college_code'] == college_code]
+        catalog = (df.sort_values('year', ascending=False, kind='stable')
+                     .drop_duplicates(subset=['college_code'], keep='first')
+                     .reset_index(drop=True))
+        
+        # URL ids aligned with catalog rows; attaching URLs is a gather
+        self._catalog_url_ids = self.encode_college_urls(catalog['college_code'])
+        catalog['college_url'] = self._url_values[self._catalog_url_ids]
+        
+        self.college_catalog = catalog
+        self.catalog_latest_year = df['year'].max()
+        
+        # Only colleges present in the latest year are listed
+        self._catalog_current = np.flatnonzero(
+            (catalog['year'] == self.catalog_latest_year).to_numpy()
+        )
+        current = catalog.iloc[self._catalog_current]
         
-        if len(df_college) == 0:
-            return {}
+        # Pre-encoded indexes: value -> sorted catalog positions
+        city_keys = current['city'].fillna('').astype(str).str.strip().str.lower()
+        self._catalog_city_index = self._group_positions(city_keys, self._catalog_current)
+        self._catalog_city_index.pop('', None)
+        self._catalog_type_index = self._group_positions(
+            current['type_normalized'].astype(str), self._catalog_current
+        )
+        self._catalog_code_position = {
+            code: position for position, code in enumerate(catalog['college_code'])
+        }
+        
+        # Unfiltered list is the compare page's landing query: serialize once
+        self.college_catalog_json = current.to_json(orient='records')
+        
+        print(f"✅ Built college catalog: {len(catalog)} colleges, "
+              f"{len(self._catalog_current)} in {self.catalog_latest_year}")
+    
+    def encode_college_urls(self, college_codes) -> np.ndarray:
+        """Integer URL ids for college codes (-1 where the college has no URL)"""
+        return self.college_url_table.index.get_indexer(pd.Index(college_codes, dtype=object))
+    
+    def lookup_college_urls(self, college_codes) -> np.ndarray:
+        """URLs for college codes (None where the college has no URL)"""
+        return self._url_values[self.encode_college_urls(college_codes)]
+    
+    @staticmethod
+    def _group_positions(keys: pd.Series, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """Map each distinct key to the (sorted) positions it occurs at"""
+        groups = pd.Series(keys.to_numpy()).groupby(keys.to_numpy()).indices
+        return {key: positions[rows] for key, rows in groups.items()}
+    
+    def _build_college_stats(self) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+        """
+        Precompute statistics for every college in a single groupby pass
+        
+        Returns:
+            Tuple of (college_code -> stats dict, college_code -> serialized JSON)
+        """
+        df = self.cutoff_data
         
-        # Get latest record for basic info
-        latest = df_college.sort_values('year', ascending=False).iloc[0]
+        if df.empty:
+            return {}, {}
         
-        stats = {
-            'college_code': college_code,
-            'college_name': latest['college_name'],
-            'city': latest['city'],
-            'type': latest.get('type', 'Unknown'),
-            'type_normalized': self.normalize_college_type(latest.get('type', '')),
-            'college_url': self.college_urls.get(college_code, ''),
+        try:
+            # Normalize each distinct branch once instead of once per row
+            branch_groups = {
+                b: self.normalize_branch(b) for b in df['branch_name'].dropna().unique()
+            }
+            
+            grouped = df.groupby('college_code', sort=False)
+            branches = grouped['branch_name'].unique()
+            categories = grouped['category'].unique()
+            years = grouped['year'].unique()
             
-            'total_branches': int(df_college['branch_name'].nunique()),
-            'available_branches': df_college['branch_name'].unique().tolist(),
-            'available_branches_normalized': list(set(
-                df_college['branch_name'].apply(self.normalize_branch).tolist()
-            )),
+            has_rank = 'closing_rank' in df.columns
+            has_percentile = 'closing_percentile' in df.columns
+            aggregations = {'total_branches': ('branch_name', 'nunique')}
+            if has_rank:
+                aggregations.update({
+                    'avg_closing_rank': ('closing_rank', 'mean'),
+                    'min_closing_rank': ('closing_rank', 'min'),
+                    'max_closing_rank': ('closing_rank', 'max'),
+                })
+            if has_percentile:
+                aggregations['avg_closing_percentile'] = ('closing_percentile', 'mean')
+            aggregates = grouped.agg(**aggregations)
             
-            'available_categories': df_college['category'].unique().tolist(),
-            'years_of_data': sorted(df_college['year'].unique().tolist()),
+            # Latest record per college (from the catalog) for basic info
+            latest = self.college_catalog.set_index('college_code')
             
-            'avg_closing_rank': int(df_college['closing_rank'].mean()) if 'closing_rank' in df_college else None,
-            'min_closing_rank': int(df_college['closing_rank'].min()) if 'closing_rank' in df_college else None,
-            'max_closing_rank': int(df_college['closing_rank'].max()) if 'closing_rank' in df_college else None,
+            def _int_or_none(value):
+                return int(value) if pd.notna(value) else None
             
-            'avg_closing_percentile': float(df_college['closing_percentile'].mean()) if 'closing_percentile' in df_college else None,
+            def _float_or_none(value):
+                return float(value) if pd.notna(value) else None
+            
+            stats_table = {}
+            stats_json = {}
+            for college_code, agg in aggregates.iterrows():
+                info = latest.loc[college_code]
+                college_type = info['type'] if pd.notna(info['type']) else 'Unknown'
+                college_url = info['college_url']
+                college_branches = [b for b in branches[college_code].tolist() if pd.notna(b)]
+                
+                stats = {
+                    'college_code': college_code,
+                    'college_name': info['college_name'],
+                    'city': info['city'] if pd.notna(info['city']) else None,
+                    'type': college_type,
+                    'type_normalized': str(info['type_normalized']),
+                    'college_url': college_url if pd.notna(college_url) else '',
+                    
+                    'total_branches': int(agg['total_branches']),
+                    'available_branches': college_branches,
+                    'available_branches_normalized': sorted({
+                        str(branch_groups[b]) for b in college_branches
+                    }),
+                    
+                    'available_categories': categories[college_code].tolist(),
+                    'years_of_data': sorted(years[college_code].tolist()),
+                    
+                    'avg_closing_rank': _int_or_none(agg['avg_closing_rank']) if has_rank else None,
+                    'min_closing_rank': _int_or_none(agg['min_closing_rank']) if has_rank else None,
+                    'max_closing_rank': _int_or_none(agg['max_closing_rank']) if has_rank else None,
+                    
+                    'avg_closing_percentile': _float_or_none(agg['avg_closing_percentile']) if has_percentile else None,
+                }
+                
+                stats_table[college_code] = stats
+                # Serialize once so the endpoints can return the blob as-is
+                stats_json[college_code] = json.dumps(
+                    stats, sort_keys=True, separators=(',', ':'), default=str
+                )
+            
+            print(f"✅ Precomputed stats for {len(stats_table)} colleges")
+            return stats_table, stats_json
+            
+        except Exception as e:
+            print(f"❌ Error precomputing college stats: {e}")
+            import traceback
+            traceback.print_exc()
+            return {}, {}
+    
+    # ============================================================================
+    # STATISTICS & ANALYSIS
+    # ============================================================================
+    
+    def get_college_stats(self, college_code: str) -> Dict:
+        """Get comprehensive statistics for a college (precomputed at load)"""
+        return self.college_stats.get(DataRepository.canonical_code(college_code), {})
+    
+    def get_college_stats_json(self, college_code: str) -> Optional[str]:
+        """Get pre-serialized JSON statistics for a college"""
+        return self.college_stats_json.get(DataRepository.canonical_code(college_code))
+    
+    def get_bulk_college_stats_json(self, college_codes: List[str]) -> str:
+        """
+        Assemble a JSON object of precomputed stats for several colleges
+        
+        Returns:
+            JSON string: {"colleges": {code: stats, ...}, "missing": [codes]},
+            keyed by the codes as requested ("01002" finds college 1002);
+            repeated codes appear once
+        """
+        found = []
+        missing = []
+        for code in dict.fromkeys(str(code).strip() for code in college_codes):
+            blob = self.college_stats_json.get(DataRepository.canonical_code(code))
+            if blob is None:
+                missing.append(code)
+            else:
+                found.append(f'{json.dumps(code)}:{blob}')
+        
+        return '{"colleges":{' + ','.join(found) + '},"missing":' + json.dumps(missing) + '}'
+    
+    # ============================================================================
+    # RECOMMENDATIONS (rank-window index)
+    # ============================================================================
+    
+    RECOMMENDATION_WINDOW = 5000
+    
+    def _build_rank_index(self):
+        """
+        Sort every (category, year) partition of the store by closing_rank
+        
+        One global lexsort produces contiguous per-(category, year) runs; each
+        run is addressed by a slice. Branch/type/city/college codes are gathered
+        into the same order so preference filters are integer comparisons.
+        """
+        df = self.cutoff_data
+        self._rank_slices = {}
+        self._rank_latest_year = {}
+        if df.empty or 'closing_rank' not in df.columns:
+            self._rank_sorted = {}
+            return
+        
+        ranks = df['closing_rank'].to_numpy()
+        valid = np.flatnonzero(pd.notna(ranks))
+        category_codes = df['category'].cat.codes.to_numpy()
+        year_codes, years = pd.factorize(df['year'])
+        order = valid[np.lexsort((ranks[valid], year_codes[valid], category_codes[valid]))]
+        
+        city_codes, cities = pd.factorize(df['city'].fillna('').astype(str).str.strip().str.lower())
+        college_codes, _ = pd.factorize(df['college_code'])
+        self._rank_sorted = {
+            'rows': order,
+            'ranks': ranks[order].astype(np.int64),
+            'branch': df['branch_normalized'].cat.codes.to_numpy()[order],
+            'type': df['type_normalized'].cat.codes.to_numpy()[order],
+            'city': city_codes[order],
+            'college': college_codes[order],
         }
+        self._rank_cities = pd.Index(cities)
         
-        return stats
+        # Run boundaries: positions where (category, year) changes
+        category_sorted = category_codes[order]
+        year_sorted = year_codes[order]
+        starts = np.flatnonzero(np.r_[
+            True,
+            (category_sorted[1:] != category_sorted[:-1]) | (year_sorted[1:] != year_sorted[:-1])
+        ])
+        ends = np.r_[starts[1:], len(order)]
+        categories = df['category'].cat.categories
+        for start, end in zip(starts, ends):
+            if category_sorted[start] < 0:
+                continue
+            category, year = categories[category_sorted[start]], years[year_sorted[start]]
+            self._rank_slices[(category, year)] = slice(int(start), int(end))
+            if year > self._rank_latest_year.get(category, ''):
+                self._rank_latest_year[category] = year
+        
+        print(f"✅ Built rank index: {len(self._rank_slices)} (category, year) partitions")
+    
+    def recommend(self, rank: int, category: str, preferences: Dict = None,
+                  window: int = None, limit: int = 20, year: str = None) -> Dict:
+        """
+        Colleges whose closing rank lies within rank ± window
+        
+        Args:
+            rank: Student's CET rank
+            category: Category code (e.g. GOPENS)
+            preferences: Optional {'city', 'branch', 'college_type'} filters
+            window: Rank window half-width (default RECOMMENDATION_WINDOW)
+            limit: Maximum number of colleges returned
+            year: Cutoff year to use (defaults to the latest year for the category)
+        
+        Returns:
+            Dict with the resolved year/window and one record per college
+            (its best branch in the window), ordered by closing_rank
+        """
+        category = str(category).strip().upper()
+        window = self.RECOMMENDATION_WINDOW if window is None else window
+        year = str(year) if year else self._rank_latest_year.get(category)
+        result = {'rank': rank, 'category': category, 'year': year, 'window': window,
+                  'total': 0, 'recommendations': []}
+        
+        partition = self._rank_slices.get((category, year))
+        if partition is None:
+            return result
+        
+        index = self._rank_sorted
+        ranks = index['ranks'][partition]
+        lo = int(np.searchsorted(ranks, rank - window, 'left'))
+        hi = int(np.searchsorted(ranks, rank + window, 'right'))
+        window_slice = slice(partition.start + lo, partition.start + hi)
+        
+        mask = np.ones(hi - lo, dtype=bool)
+        preferences = preferences or {}
+        if preferences.get('branch'):
+            mask &= index['branch'][window_slice] == self._category_code(
+                self.cutoff_data['branch_normalized'], self.normalize_branch(preferences['branch'])
+            )
+        if preferences.get('college_type'):
+            mask &= index['type'][window_slice] == self._category_code(
+                self.cutoff_data['type_normalized'], preferences['college_type']
+            )
+        if preferences.get('city'):
+            city = str(preferences['city']).strip().lower()
+            city_ids = np.flatnonzero(self._rank_cities.str.contains(city, regex=False))
+            mask &= np.isin(index['city'][window_slice], city_ids)
+        
+        candidates = np.flatnonzero(mask)
+        # Runs are rank-sorted, so a college's first occurrence is its best branch
+        _, first = np.unique(index['college'][window_slice][candidates], return_index=True)
+        picked = candidates[np.sort(first)]
+        result['total'] = len(picked)
+        
+        rows = self.cutoff_data.iloc[index['rows'][window_slice][picked[:limit]]]
+        records = rows.to_dict('records')
+        for record, url in zip(records, self.lookup_college_urls(rows['college_code'])):
+            record['college_url'] = url or ''
+            record['rank_margin'] = int(record['closing_rank']) - int(rank)
+        result['recommendations'] = records
+        return result
+    
+    @staticmethod
+    def _category_code(column: pd.Series, value: str) -> int:
+        """Categorical code of value in column (-2, matching nothing, if absent)"""
+        categories = column.cat.categories
+        return int(categories.get_loc(value)) if value in categories else -2
+    
+    # ============================================================================
+    # SERIES TRENDS (every college-branch-category series, materialized at load)
+    # ============================================================================
+    
+    # Rank change (%) beyond which a series counts as easier/harder to get into
+    TREND_THRESHOLD_PERCENT = 5
+    
+    SERIES_TREND_COLUMNS = [
+        'college_code', 'college_name', 'city', 'type_normalized', 'branch_name',
+        'branch_normalized', 'category', 'first_year', 'last_year', 'years_available',
+        'first_rank', 'last_rank', 'rank_change', 'rank_change_percent', 'trend'
+    ]
+    
+    def _build_series_trends(self):
+        """
+        Classify every (college, branch, category) series in one vectorized pass
+        
+        Rows are ordered by series, then year and CAP round; a series' first
+        and last rows give first_rank/last_rank. Series with fewer than two
+        years of data are left out. The table is sorted by (category,
+        rank_change_percent) so a category's movers are a contiguous slice.
+        """
+        df = self.cutoff_data
+        self._trend_category_slices = {}
+        self._series_trend_index = {}
+        if df.empty or 'closing_rank' not in df.columns:
+            self.series_trends = pd.DataFrame(columns=self.SERIES_TREND_COLUMNS)
+            return
+        
+        ranks = df['closing_rank'].to_numpy()
+        valid = np.flatnonzero(pd.notna(ranks) & (ranks > 0))
+        college_ids, _ = pd.factorize(df['college_code'])
+        branch_ids = df['branch_name'].cat.codes.to_numpy()
+        category_ids = df['category'].cat.codes.to_numpy()
+        year_ids, years = pd.factorize(df['year'], sort=True)
+        cap_rounds = df['cap_round'].to_numpy() if 'cap_round' in df.columns else np.zeros(len(df))
+        order = valid[np.lexsort((
+            cap_rounds[valid], year_ids[valid],
+            category_ids[valid], branch_ids[valid], college_ids[valid]
+        ))]
+        
+        series_sorted = np.stack([college_ids[order], branch_ids[order], category_ids[order]])
+        new_series = np.r_[True, (series_sorted[:, 1:] != series_sorted[:, :-1]).any(axis=0)]
+        starts = np.flatnonzero(new_series)
+        ends = np.r_[starts[1:], len(order)]
+        
+        year_sorted = year_ids[order]
+        new_year = new_series | np.r_[True, year_sorted[1:] != year_sorted[:-1]]
+        years_available = np.add.reduceat(new_year.astype(np.int64), starts)
+        
+        keep = years_available >= 2
+        starts, ends, years_available = starts[keep], ends[keep], years_available[keep]
+        first_rows, last_rows = order[starts], order[ends - 1]
+        
+        first_rank = ranks[first_rows].astype(np.int64)
+        last_rank = ranks[last_rows].astype(np.int64)
+        rank_change = last_rank - first_rank
+        rank_change_percent = np.round(rank_change / first_rank * 100, 2)
+        
+        trends = df.iloc[first_rows][[
+            'college_code', 'college_name', 'city', 'type_normalized',
+            'branch_name', 'branch_normalized', 'category'
+        ]].reset_index(drop=True)
+        trends['first_year'] = years[year_ids[first_rows]]
+        trends['last_year'] = years[year_ids[last_rows]]
+        trends['years_available'] = years_available
+        trends['first_rank'] = first_rank
+        trends['last_rank'] = last_rank
+        trends['rank_change'] = rank_change
+        trends['rank_change_percent'] = rank_change_percent
+        trends['trend'] = np.select(
+            [rank_change_percent > self.TREND_THRESHOLD_PERCENT,
+             rank_change_percent < -self.TREND_THRESHOLD_PERCENT],
+            ['decreasing_competition', 'increasing_competition'],
+            'stable'
+        )
+        
+        trends = trends.sort_values(['category', 'rank_change_percent'], kind='stable').reset_index(drop=True)
+        category_sorted = trends['category'].cat.codes.to_numpy()
+        categories = trends['category'].cat.categories
+        bounds = np.flatnonzero(np.r_[True, category_sorted[1:] != category_sorted[:-1]])
+        for start, end in zip(bounds, np.r_[bounds[1:], len(trends)]):
+            self._trend_category_slices[categories[category_sorted[start]]] = slice(int(start), int(end))
+        
+        # (college_code, branch_name, category) -> row, for single-series lookups
+        self._series_trend_index = {
+            key: position for position, key in enumerate(zip(
+                trends['college_code'].astype(str), trends['branch_name'].astype(str), trends['category'].astype(str)
+            ))
+        }
+        self.series_trends = trends
+        counts = trends['trend'].value_counts().to_dict()
+        print(f"✅ Built series trends: {len(trends)} series "
+              f"({counts.get('increasing_competition', 0)} harder, "
+              f"{counts.get('decreasing_competition', 0)} easier, {counts.get('stable', 0)} stable)")
+    
+    def get_top_movers(self, category: str, direction: str = 'increasing', city: str = None,
+                       college_type: str = None, branch: str = None, min_rank: int = 0,
+                       limit: int = 20) -> List[Dict]:
+        """
+        Series with the largest change in competition for a category
+        
+        Args:
+            category: Category code (e.g. GOPENS)
+            direction: 'increasing' (closing rank fell most, harder to get) or
+                       'decreasing' (closing rank rose most, easier to get)
+            city: Optional city substring
+            college_type: Optional normalized college type (e.g. Government)
+            branch: Optional branch (matched on its normalized group)
+            min_rank: Ignore series whose first closing rank is below this
+                      (tiny ranks give outsized percentages)
+            limit: Maximum number of series returned
+        
+        Returns:
+            List of series trend records, biggest movers first
+        """
+        partition = self._trend_category_slices.get(str(category).strip().upper())
+        if partition is None:
+            return []
+        
+        rows = self.series_trends.iloc[partition]
+        mask = np.ones(len(rows), dtype=bool)
+        if city:
+            mask &= rows['city'].fillna('').str.lower().str.contains(
+                str(city).strip().lower(), regex=False
+            ).to_numpy()
+        if college_type:
+            mask &= (rows['type_normalized'] == college_type).to_numpy()
+        if branch:
+            mask &= (rows['branch_normalized'] == self.normalize_branch(branch)).to_numpy()
+        if min_rank:
+            mask &= rows['first_rank'].to_numpy() >= min_rank
+        
+        if direction == 'increasing':
+            mask &= rows['rank_change_percent'].to_numpy() < 0
+            positions = np.flatnonzero(mask)[:limit]
+        else:
+            mask &= rows['rank_change_percent'].to_numpy() > 0
+            positions = np.flatnonzero(mask)[::-1][:limit]
+        
+        records = rows.iloc[positions].to_dict('records')
+        for record in records:
+            record['college_url'] = self.college_urls.get(record['college_code'], '')
+        return records
     
     def get_trend_analysis(self, college_code: str, branch: str, category: str) -> Dict:
-        """Get trend analysis for specific college-branch-category combination"""
-        data = self.get_college_data(college_code, branch, category)
+        """
+        Trend analysis for one college-branch-category series
         
-        if len(data) < 2:
+        Read from the series_trends table, so a series means the same thing
+        here as in get_top_movers: one exact branch name in one category,
+        every CAP round. A branch group name (e.g. "Computer") stands for the
+        college's branch in that group when it has exactly one.
+        """
+        college_code = DataRepository.canonical_code(college_code)
+        category = str(category).strip().upper()
+        branch_name, candidates = self._resolve_series_branch(college_code, branch, category)
+        if branch_name is None:
+            if candidates:
+                return {
+                    'trend': 'ambiguous_branch',
+                    'branches': candidates,
+                    'message': 'Several branches match; pass one of the exact branch names'
+                }
             return {
                 'trend': 'insufficient_data',
-                'years_available': len(data),
+                'years_available': 0,
                 'message': 'Need at least 2 years of data for trend analysis'
             }
         
-        # Sort by year
-        data.sort(key=lambda x: x['year'])
+        df = self.get_college_rows(college_code)
+        series = df[(df['branch_name'] == branch_name) & (df['category'] == category)]
+        data = series.to_dict('records')
+        college_url = self.college_urls.get(college_code, '')
+        for record in data:
+            record['college_url'] = college_url
         
-        # Calculate rank changes
-        ranks = [d.get('closing_rank', 0) for d in data if d.get('closing_rank')]
-        
-        if len(ranks) < 2:
+        position = self._series_trend_index.get((college_code, branch_name, category))
+        if position is None:
+            ranks = series['closing_rank']
             return {
-                'trend': 'no_rank_data',
-                'message': 'No rank data available'
+                'trend': 'insufficient_data',
+                'branch_name': branch_name,
+                'years_available': int(series.loc[ranks.notna() & (ranks > 0), 'year'].nunique()),
+                'message': 'Need at least 2 years of data for trend analysis',
+                'all_years_data': data
             }
         
-        # Calculate trend
-        first_rank = ranks[0]
-        last_rank = ranks[-1]
-        rank_change = last_rank - first_rank
-        rank_change_percent = (rank_change / first_rank) * 100 if first_rank > 0 else 0
-        
-        # Determine trend direction
-        if rank_change_percent > 5:
-            trend = 'decreasing_competition'  # Rank going up means easier
-        elif rank_change_percent < -5:
-            trend = 'increasing_competition'  # Rank going down means harder
-        else:
-            trend = 'stable'
-        
+        row = self.series_trends.iloc[[position]].to_dict('records')[0]
         return {
-            'trend': trend,
-            'years_available': len(data),
-            'first_year': data[0]['year'],
-            'last_year': data[-1]['year'],
-            'first_rank': first_rank,
-            'last_rank': last_rank,
-            'rank_change': rank_change,
-            'rank_change_percent': round(rank_change_percent, 2),
+            'trend': row['trend'],
+            'branch_name': branch_name,
+            'years_available': row['years_available'],
+            'first_year': row['first_year'],
+            'last_year': row['last_year'],
+            'first_rank': row['first_rank'],
+            'last_rank': row['last_rank'],
+            'rank_change': row['rank_change'],
+            'rank_change_percent': row['rank_change_percent'],
             'all_years_data': data
-        }
\ No newline at end of file
+        }
+    
+    def _resolve_series_branch(self, college_code: str, branch: str, category: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Exact branch name of a college's series in a category
+        
+        Returns:
+            (branch_name, []) for an exact (case-insensitive) name or a group
+            with one branch, else (None, branch names in the group)
+        """
+        df = self.get_college_rows(college_code)
+        df = df[df['category'] == category]
+        names = pd.unique(df['branch_name'].astype(str))
+        wanted = str(branch or '').strip().lower()
+        for name in names:
+            if name.lower() == wanted:
+                return name, []
+        in_group = sorted(set(df.loc[df['branch_normalized'] == self.normalize_branch(branch), 'branch_name'].astype(str)))
+        if len(in_group) == 1:
+            return in_group[0], []
+        return None, in_group
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+In-memory college directory (Colleges_URL.xlsx)
+
+The sheet is parsed once and kept as ready-to-serve records with city, code
+and college type indexes (types come from the comparator's catalog). It is
+reloaded only when the file's mtime changes; the mtime is checked at most
+every CHECK_INTERVAL_SECONDS, so browsing the directory does not touch the
+disk. A repository reload also starts a new snapshot.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.data_repository import data_repository
+from utils.search_index import search_index
+
+
+class DirectorySnapshot:
+    """One loaded version of the directory (never mutated after construction)"""
+
+    FIELDS = ['Sr. No', 'College Code', 'College Name', 'City', 'URL']
+
+    def __init__(self, records: List[Dict], mtime: Optional[float], version: int, generation: int,
+                 college_types: Optional[Dict[str, str]] = None):
+        self.records = records
+        self.mtime = mtime
+        self.version = version
+        self.generation = generation
+        self.loaded_at = datetime.now().isoformat()
+
+        self.code_index: Dict[str, int] = {}
+        self.city_index: Dict[str, List[int]] = {}
+        self.type_index: Dict[str, List[int]] = {}
+        college_types = college_types or {}
+        for position, record in enumerate(records):
+            # Later rows win for duplicate codes
+            self.code_index[record['College Code']] = position
+            if record['City']:
+                self.city_index.setdefault(record['City'], []).append(position)
+            college_type = college_types.get(record['College Code'])
+            if college_type:
+                self.type_index.setdefault(college_type, []).append(position)
+        self.cities = sorted(self.city_index)
+
+        with_website = sum(1 for record in records if record['URL'])
+        self.statistics = {
+            'total_colleges': len(records),
+            'total_cities': len(self.cities),
+            'colleges_with_website': with_website,
+            'website_coverage': f'{(with_website / len(records) * 100):.1f}%' if records else '0%'
+        }
+
+
+class CollegeDirectoryStore:
+    """Directory records with mtime-based reloads and city/code lookups"""
+
+    CHECK_INTERVAL_SECONDS = 5.0
+
+    # Directory keys cached by the repository that derive from the sheet
+    REPOSITORY_KEYS = ('college_directory', 'directory_frame', 'college_url_table', 'college_urls')
+
+    def __init__(self, repository=None):
+        self.repository = repository or data_repository
+        self.path = self.repository.paths['college_directory']
+        self._lock = threading.Lock()
+        self._snapshot: Optional[DirectorySnapshot] = None
+        self._checked_at = 0.0
+
+    # ============================================================================
+    # LOADING
+    # ============================================================================
+
+    def get_snapshot(self) -> DirectorySnapshot:
+        """Current directory, reloading it first if the file changed"""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked_at < self.CHECK_INTERVAL_SECONDS:
+            return snapshot
+
+        with self._lock:
+            self._checked_at = now
+            mtime = self._file_mtime()
+            if (self._snapshot is None or mtime != self._snapshot.mtime
+                    or self._snapshot.generation != self.repository.generation):
+                if self._snapshot is not None:
+                    print(f"🔄 College directory changed on disk, reloading")
+                    self.repository.invalidate(*self.REPOSITORY_KEYS)
+                self._snapshot = self._load(mtime)
+            return self._snapshot
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _load(self, mtime: Optional[float]) -> DirectorySnapshot:
+        version = (self._snapshot.version + 1) if self._snapshot is not None else 1
+        records = self.repository.get_directory_frame().to_dict('records')
+        snapshot = DirectorySnapshot(records, mtime, version, self.repository.generation,
+                                     self._college_types())
+
+        # Keep the shared typeahead index in sync with the directory
+        search_index.register('directory', (
+            [('college', r['College Name'], r['College Code']) for r in records] +
+            [('code', r['College Code'], r['College Code']) for r in records] +
+            [('city', r['City'], r['College Code']) for r in records]
+        ))
+        print(f"✅ College directory: {len(records)} colleges, {len(snapshot.cities)} cities")
+        return snapshot
+
+    def _college_types(self) -> Dict[str, str]:
+        """college_code -> normalized type from the comparator's catalog"""
+        try:
+            catalog = self.repository.get_comparator().college_catalog
+        except Exception as e:
+            print(f"⚠️ College types unavailable for the directory: {e}")
+            return {}
+        if catalog.empty:
+            return {}
+        return dict(zip(catalog['college_code'], catalog['type_normalized'].astype(str)))
+
+    # ============================================================================
+    # QUERIES
+    # ============================================================================
+
+    def get_college(self, college_code) -> Optional[Dict]:
+        snapshot = self.get_snapshot()
+        position = snapshot.code_index.get(self.repository.canonical_code(college_code))
+        return None if position is None else snapshot.records[position]
+
+    def filter(self, city: Optional[str] = None, search: Optional[str] = None,
+               limit: Optional[int] = None) -> List[Dict]:
+        """
+        Directory records for a city and/or search query
+
+        Args:
+            city: Exact city name ('ALL' or empty for every city)
+            search: Name or code query (ranked, typo-tolerant)
+            limit: Maximum number of records
+
+        Returns:
+            Records in search rank order, or file order without a search
+        """
+        snapshot = self.get_snapshot()
+        positions = self._positions(snapshot, city, search)
+        if limit:
+            positions = positions[:limit]
+        return [snapshot.records[p] for p in positions]
+
+    def query(self, city: Optional[str] = None, search: Optional[str] = None,
+              college_type: Optional[str] = None, offset: int = 0,
+              limit: Optional[int] = None) -> Tuple[List[Dict], int, DirectorySnapshot]:
+        """
+        One page of directory records for city/name/type filters
+
+        Returns:
+            (records, total, snapshot) where total counts every match and
+            snapshot is the directory version the page was cut from
+        """
+        snapshot = self.get_snapshot()
+        positions = self._positions(snapshot, city, search, college_type)
+        page = positions[offset:offset + limit] if limit else positions[offset:]
+        return [snapshot.records[p] for p in page], len(positions), snapshot
+
+    @staticmethod
+    def _positions(snapshot: DirectorySnapshot, city: Optional[str], search: Optional[str],
+                   college_type: Optional[str] = None) -> Sequence[int]:
+        """Matching record positions: search rank order, or file order without a search"""
+        city = None if not city or city == 'ALL' else city
+
+        if search:
+            positions = [
+                snapshot.code_index[code] for code in search_index.search_codes(search)
+                if code in snapshot.code_index
+            ]
+            if city:
+                positions = [p for p in positions if snapshot.records[p]['City'] == city]
+        elif city:
+            positions = snapshot.city_index.get(city, [])
+        else:
+            positions = range(len(snapshot.records))
+
+        if college_type:
+            allowed = set(snapshot.type_index.get(college_type, []))
+            positions = [p for p in positions if p in allowed]
+        return positions
+
+
+# Process-wide instance
+college_directory_store = CollegeDirectoryStore()
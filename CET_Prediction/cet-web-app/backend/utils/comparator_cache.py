@@ -0,0 +1,181 @@
+"""
+Memoized reads over the shared CollegeComparator (Flask-Caching)
+
+The compare UI repeats the same few lookups for popular colleges, so the
+per-college reads behind /colleges/compare, /colleges/branches,
+/colleges/categories and the trend endpoints are memoized:
+- Keys are built from normalized arguments (canonical college code, stripped
+  branch, upper-case category), so '01002' and '1002 ' share an entry
+- Multi-college requests are answered from per-college entries, so comparing
+  A+B and A+C both reuse A
+- Every key carries the repository's data generation; a reload bumps it and
+  the cache is cleared, so results from old data are never served
+- SimpleCache holds at most CACHE_THRESHOLD entries
+
+Outside an app context (scripts, the predictor warmup) reads go straight to
+the comparator.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from flask import has_app_context
+from flask_caching import Cache
+
+from utils.data_repository import data_repository
+
+
+CACHE_CONFIG = {
+    'CACHE_TYPE': 'SimpleCache',
+    # Entries only go stale on a data reload, which clears the cache
+    'CACHE_DEFAULT_TIMEOUT': 3600,
+    'CACHE_THRESHOLD': 4096,
+}
+
+cache = Cache(config=CACHE_CONFIG)
+
+CACHED_READS = ['college_data', 'trend_analysis', 'branches', 'categories']
+
+_stats_lock = threading.Lock()
+_stats = {name: {'calls': 0, 'misses': 0} for name in CACHED_READS}
+_generation = {'current': None}
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def canonical_code(code) -> str:
+    """Store form of a college code (no '.0' suffix, no leading zeros)"""
+    return data_repository.canonical_code(code)
+
+
+def _normalize_branch(branch) -> Optional[str]:
+    return str(branch).strip() if branch else None
+
+
+def _normalize_category(category) -> str:
+    return str(category).strip().upper()
+
+
+# ============================================================================
+# MEMOIZED READS (one entry per normalized argument tuple and generation)
+# ============================================================================
+
+def _record(name: str, field: str):
+    with _stats_lock:
+        _stats[name][field] += 1
+
+
+@cache.memoize()
+def _college_data(generation: int, college_code: str, branch: str, category: str) -> List[Dict]:
+    _record('college_data', 'misses')
+    return data_repository.get_comparator().get_college_data(college_code, branch, category)
+
+
+@cache.memoize()
+def _trend_analysis(generation: int, college_code: str, branch: str, category: str) -> Dict:
+    _record('trend_analysis', 'misses')
+    return data_repository.get_comparator().get_trend_analysis(college_code, branch, category)
+
+
+@cache.memoize()
+def _branches(generation: int, college_code: Optional[str]) -> List[str]:
+    _record('branches', 'misses')
+    codes = [college_code] if college_code else None
+    return data_repository.get_comparator().get_available_branches(codes)
+
+
+@cache.memoize()
+def _categories(generation: int, college_code: Optional[str], branch: Optional[str]) -> List[str]:
+    _record('categories', 'misses')
+    codes = [college_code] if college_code else None
+    return data_repository.get_comparator().get_available_categories(codes, branch)
+
+
+def _call(name: str, func, *args):
+    """Run a memoized read for the current data generation"""
+    _record(name, 'calls')
+    generation = _sync_generation()
+    if not has_app_context():
+        return func.uncached(generation, *args)
+    return func(generation, *args)
+
+
+def _sync_generation() -> int:
+    """Clear the cache once when the repository reports a new data generation"""
+    generation = data_repository.generation
+    if _generation['current'] != generation:
+        with _stats_lock:
+            if _generation['current'] != generation:
+                if _generation['current'] is not None and has_app_context():
+                    cache.clear()
+                    print(f"🔄 Comparator cache cleared for data generation {generation}")
+                _generation['current'] = generation
+    return generation
+
+
+# ============================================================================
+# PUBLIC API (same results as the CollegeComparator methods)
+# ============================================================================
+
+def get_college_data(college_code, branch: str, category: str) -> List[Dict]:
+    """Year records for one college/branch/category"""
+    return _call('college_data', _college_data,
+                 canonical_code(college_code), _normalize_branch(branch), _normalize_category(category))
+
+
+def get_trend_analysis(college_code, branch: str, category: str) -> Dict:
+    """Trend analysis for one college/branch/category"""
+    return _call('trend_analysis', _trend_analysis,
+                 canonical_code(college_code), _normalize_branch(branch), _normalize_category(category))
+
+
+def compare_colleges(college_codes: List, branch: str, category: str) -> Dict[str, List[Dict]]:
+    """
+    Compare colleges from per-college entries
+
+    Returns:
+        Dictionary mapping each requested college_code to its list of year data
+    """
+    return {
+        str(code).strip(): get_college_data(code, branch, category)
+        for code in college_codes
+    }
+
+
+def get_available_branches(college_code=None) -> List[str]:
+    """Branches of one college, or of every college when no code is given"""
+    code = canonical_code(college_code) if college_code else None
+    return _call('branches', _branches, code)
+
+
+def get_available_categories(college_code=None, branch: Optional[str] = None) -> List[str]:
+    """Categories of one college (optionally one branch), or of every college"""
+    code = canonical_code(college_code) if college_code else None
+    return _call('categories', _categories, code, _normalize_branch(branch))
+
+
+# ============================================================================
+# STATS
+# ============================================================================
+
+def get_cache_stats() -> Dict:
+    """Hit/miss counters per memoized read plus the current cache size"""
+    with _stats_lock:
+        reads = {}
+        for name, counts in _stats.items():
+            hits = counts['calls'] - counts['misses']
+            reads[name] = {
+                'calls': counts['calls'],
+                'hits': hits,
+                'misses': counts['misses'],
+                'hit_rate': round(hits / counts['calls'], 4) if counts['calls'] else None,
+            }
+    backend = cache.cache if has_app_context() else None
+    return {
+        'backend': CACHE_CONFIG['CACHE_TYPE'],
+        'generation': _generation['current'],
+        'entries': len(getattr(backend, '_cache', {})) if backend is not None else None,
+        'max_entries': CACHE_CONFIG['CACHE_THRESHOLD'],
+        'reads': reads,
+    }
@@ -0,0 +1,224 @@
+"""
+Next-year cutoff forecasts for every (college, branch, category) series
+
+The cutoff history is pivoted into a series x year cube and every series is
+fitted at once with array math:
+- Year weights decay geometrically (the latest year counts most)
+- Forecast = EWMA level + TREND_DAMPING x weighted linear trend, i.e. a blend
+  of the exponentially weighted mean and the weighted least-squares line
+- Uncertainty band from the weighted residual spread, with a relative floor
+  so one- or two-point series still get a sensible band
+
+Blocks of series are fitted on a thread pool (numpy releases the GIL).
+
+Usage (from backend/), writes data/cutoff_forecast_<year>.csv:
+    python -m utils.cutoff_forecaster
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.data_repository import DataRepository
+
+
+class CutoffForecaster:
+    """Vectorized per-series forecaster with O(1) lookups"""
+
+    SERIES_KEY = ['college_code', 'branch_code', 'category']
+
+    # Weight of a year relative to the year after it
+    DECAY = 0.6
+    # Share of the trend slope carried into the forecast (0 = pure EWMA)
+    TREND_DAMPING = 0.5
+    # ~80% two-sided band
+    BAND_Z = 1.28
+    # Band is never narrower than this share of the forecast
+    MIN_RELATIVE_BAND = 0.10
+
+    BLOCK_SIZE = 4096
+    WORKERS = 4
+
+    def __init__(self):
+        self.table = pd.DataFrame()
+        self.forecast_year = None
+        self._records: List[Dict] = []
+        self._positions: Dict[tuple, int] = {}
+        self._college_positions: Dict[str, List[int]] = {}
+
+    # ============================================================================
+    # FITTING
+    # ============================================================================
+
+    def fit(self, df: pd.DataFrame, workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Fit every series in df and build the lookup table
+
+        Args:
+            df: Cutoff rows with college_code, branch_code, category, year,
+                closing_rank and closing_percentile (college_name/branch_name kept if present)
+            workers: Thread pool size for the block fits
+
+        Returns:
+            Forecast table, one row per series
+        """
+        start_time = time.time()
+        df = df.dropna(subset=['closing_rank']).copy()
+        if df.empty:
+            return self.table
+
+        for col in ('college_code', 'branch_code'):
+            df[col] = DataRepository.canonical_codes(df[col])
+        df['category'] = df['category'].astype(str).str.strip().str.upper()
+        df['year'] = pd.to_numeric(df['year'], errors='coerce')
+        df = df.dropna(subset=['year'])
+        df['year'] = df['year'].astype(int)
+
+        series_id = df.groupby(self.SERIES_KEY, sort=False, observed=True).ngroup().to_numpy()
+        years = np.sort(df['year'].unique())
+        year_id = np.searchsorted(years, df['year'].to_numpy())
+        n_series = int(series_id.max()) + 1
+
+        ranks = np.full((n_series, len(years)), np.nan)
+        percentiles = np.full((n_series, len(years)), np.nan)
+        ranks[series_id, year_id] = df['closing_rank'].to_numpy(dtype=float)
+        if 'closing_percentile' in df.columns:
+            percentiles[series_id, year_id] = df['closing_percentile'].to_numpy(dtype=float)
+
+        x = (years - years[-1]).astype(float)  # latest year at 0
+        blocks = [slice(i, min(i + self.BLOCK_SIZE, n_series)) for i in range(0, n_series, self.BLOCK_SIZE)]
+        workers = max(1, min(workers or self.WORKERS, len(blocks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='forecast') as pool:
+            rank_parts = list(pool.map(lambda b: self._fit_block(ranks[b], x), blocks))
+            # Percentiles are fitted as 100 - p, which scales like rank, so the
+            # relative band floor means the same thing for both
+            pct_parts = list(pool.map(lambda b: self._fit_block(100.0 - percentiles[b], x), blocks))
+        rank_fit = {k: np.concatenate([p[k] for p in rank_parts]) for k in rank_parts[0]}
+        pct_fit = {k: np.concatenate([p[k] for p in pct_parts]) for k in pct_parts[0]}
+
+        # Identity columns from each series' latest row (last row of each series run)
+        order = np.lexsort((df['year'].to_numpy(), series_id))
+        run_ends = np.r_[np.flatnonzero(np.diff(series_id[order])), len(order) - 1]
+        info_cols = self.SERIES_KEY + [c for c in ('college_name', 'branch_name') if c in df.columns]
+        table = df.iloc[order[run_ends]][info_cols].reset_index(drop=True)
+
+        observed = ~np.isnan(ranks)
+        last_idx = len(years) - 1 - np.argmax(observed[:, ::-1], axis=1)
+        rows = np.arange(n_series)
+        self.forecast_year = int(years[-1]) + 1
+
+        table['years_observed'] = observed.sum(axis=1)
+        table['last_year'] = years[last_idx]
+        table['last_rank'] = ranks[rows, last_idx].astype(np.int64)
+        table['last_percentile'] = np.round(percentiles[rows, last_idx], 4)
+        table['forecast_year'] = self.forecast_year
+        table['forecast_rank'] = np.maximum(1, np.rint(rank_fit['forecast'])).astype(np.int64)
+        table['rank_lower'] = np.maximum(1, np.rint(rank_fit['lower'])).astype(np.int64)
+        table['rank_upper'] = np.maximum(1, np.rint(rank_fit['upper'])).astype(np.int64)
+        table['rank_slope_per_year'] = np.round(rank_fit['slope'], 1)
+        table['forecast_percentile'] = np.round(np.clip(100.0 - pct_fit['forecast'], 0, 100), 4)
+        table['percentile_lower'] = np.round(np.clip(100.0 - pct_fit['upper'], 0, 100), 4)
+        table['percentile_upper'] = np.round(np.clip(100.0 - pct_fit['lower'], 0, 100), 4)
+
+        self.table = table
+        self._records = [
+            {k: (v if not (isinstance(v, float) and np.isnan(v)) else None) for k, v in record.items()}
+            for record in table.to_dict('records')
+        ]
+        self._positions = {
+            key: position for position, key in
+            enumerate(zip(table['college_code'], table['branch_code'], table['category']))
+        }
+        self._college_positions = {
+            code: rows.tolist() for code, rows in table.groupby('college_code', sort=False).indices.items()
+        }
+
+        print(f"✅ Forecast {self.forecast_year} cutoffs: {len(table)} series "
+              f"from {years[0]}-{years[-1]} ({time.time() - start_time:.2f}s, {workers} workers)")
+        return table
+
+    def _fit_block(self, values: np.ndarray, x: np.ndarray) -> Dict[str, np.ndarray]:
+        """Weighted trend + EWMA fit for a block of series (rows) over years (columns)"""
+        mask = ~np.isnan(values)
+        y = np.where(mask, values, 0.0)
+        w = np.where(mask, self.DECAY ** (-x), 0.0)
+
+        sw = w.sum(axis=1)
+        safe_sw = np.where(sw > 0, sw, 1.0)
+        x_mean = (w * x).sum(axis=1) / safe_sw
+        level = (w * y).sum(axis=1) / safe_sw  # EWMA level (at x_mean)
+
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        sxx = (w * dx ** 2).sum(axis=1)
+        sxy = (w * dx * (y - level[:, None])).sum(axis=1)
+        slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+
+        horizon = 1.0 - x_mean  # next year is x = 1
+        forecast = level + self.TREND_DAMPING * slope * horizon
+
+        residuals = np.where(mask, y - (level[:, None] + slope[:, None] * dx), 0.0)
+        sigma = np.sqrt((w * residuals ** 2).sum(axis=1) / safe_sw)
+        n = mask.sum(axis=1)
+        sigma = sigma * np.sqrt(1.0 + 1.0 / np.maximum(n, 1))
+        half_width = np.maximum(self.BAND_Z * sigma, self.MIN_RELATIVE_BAND * np.abs(forecast))
+
+        forecast = np.where(n > 0, forecast, np.nan)
+        return {
+            'forecast': forecast,
+            'lower': forecast - half_width,
+            'upper': forecast + half_width,
+            'slope': slope,
+        }
+
+    # ============================================================================
+    # LOOKUPS
+    # ============================================================================
+
+    def get(self, college_code, branch_code, category) -> Optional[Dict]:
+        """Forecast for one series (None if the series has no history)"""
+        position = self._positions.get((
+            DataRepository.canonical_code(college_code), DataRepository.canonical_code(branch_code),
+            str(category).strip().upper()
+        ))
+        return None if position is None else dict(self._records[position])
+
+    def get_for_college(self, college_code, category: Optional[str] = None) -> List[Dict]:
+        """Forecasts for every branch of a college, optionally for one category"""
+        category = str(category).strip().upper() if category else None
+        return [
+            dict(self._records[position])
+            for position in self._college_positions.get(DataRepository.canonical_code(college_code), [])
+            if category is None or self._records[position]['category'] == category
+        ]
+
+    # ============================================================================
+    # EXPORT
+    # ============================================================================
+
+    def save(self, path: str):
+        """Write the forecast table atomically (temp file + os.replace)"""
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp',
+                                        dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            self.table.to_csv(tmp_path, index=False)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        print(f"✅ Wrote {len(self.table)} forecasts to {path}")
+
+
+def main():
+    from utils.data_repository import data_repository
+    forecaster = data_repository.get_forecaster()
+    forecaster.save(os.path.join(data_repository.data_dir, f'cutoff_forecast_{forecaster.forecast_year}.csv'))
+
+
+if __name__ == '__main__':
+    main()
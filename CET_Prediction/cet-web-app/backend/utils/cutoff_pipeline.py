@@ -0,0 +1,223 @@
+"""
+Build data/merged_cutoff_2021_2025.csv from data/cutoff_trends/<year>.csv
+
+The merged snapshot is maintained incrementally:
+- New year files are appended as new partitions (existing rows are not re-parsed)
+- Changed or removed year files rewrite only the affected partitions
+- Unchanged inputs are a no-op
+
+A manifest (merged_cutoff_2021_2025.manifest.json) records the fingerprint,
+row range and college count of every year partition. The CSV and the manifest
+are each written to a temp file and moved into place with os.replace, so a
+worker reading the snapshot never sees a partial file.
+
+Usage (from backend/):
+    python -m utils.cutoff_pipeline            # incremental update
+    python -m utils.cutoff_pipeline --full     # rebuild from scratch
+    python -m utils.cutoff_pipeline --dry-run  # show what would change
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from utils.data_repository import DataRepository, data_repository
+
+
+MANIFEST_VERSION = 1
+
+# Column order of the snapshot (extra columns found in the year files are kept after these)
+MERGED_COLUMNS = [
+    'year', 'college_code', 'college_name', 'college_type', 'branch_code', 'branch_name',
+    'cap_round', 'category', 'closing_rank', 'closing_percentile'
+]
+
+
+class CutoffPipeline:
+    """Incremental builder for the merged cutoff snapshot"""
+
+    def __init__(self, repository: Optional[DataRepository] = None):
+        self.repository = repository or data_repository
+        self.output_path = self.repository.paths['merged_cutoffs']
+        self.manifest_path = self.repository.paths['merged_manifest']
+
+    # ============================================================================
+    # PLANNING
+    # ============================================================================
+
+    def plan(self, full: bool = False) -> Dict:
+        """
+        Compare the year files with the manifest
+
+        Returns:
+            Dict with 'mode' ('full', 'append', 'rewrite' or 'noop') and the
+            years to 'add', 'update', 'remove' and keep ('unchanged')
+        """
+        manifest = self.repository.get_merged_manifest()
+        partitions = manifest.get('partitions', {})
+        files = self.repository.get_yearly_cutoff_files()
+        fingerprints = {year: self.repository.file_fingerprint(path) for year, path in files.items()}
+
+        if full or not partitions or manifest.get('version') != MANIFEST_VERSION:
+            return {
+                'mode': 'full', 'add': sorted(files), 'update': [], 'remove': [], 'unchanged': [],
+                'fingerprints': fingerprints
+            }
+
+        add = sorted(year for year in files if year not in partitions)
+        update = sorted(
+            year for year in files
+            if year in partitions and partitions[year].get('sha1') != fingerprints[year]
+        )
+        remove = sorted(year for year in partitions if year not in files)
+        unchanged = sorted(year for year in files if year not in add and year not in update)
+
+        if update or remove:
+            mode = 'rewrite'
+        elif add:
+            mode = 'append'
+        else:
+            mode = 'noop'
+        return {
+            'mode': mode, 'add': add, 'update': update, 'remove': remove, 'unchanged': unchanged,
+            'fingerprints': fingerprints
+        }
+
+    # ============================================================================
+    # BUILDING
+    # ============================================================================
+
+    def run(self, full: bool = False, dry_run: bool = False) -> Dict:
+        """Bring the merged snapshot up to date and return the plan that was applied"""
+        start_time = time.time()
+        plan = self.plan(full=full)
+        mode = plan['mode']
+        print(f"🔧 Merged cutoff pipeline: {mode} "
+              f"(add: {plan['add'] or '-'}, update: {plan['update'] or '-'}, "
+              f"remove: {plan['remove'] or '-'}, unchanged: {plan['unchanged'] or '-'})")
+
+        if dry_run or mode == 'noop':
+            return plan
+
+        manifest = self.repository.get_merged_manifest()
+        changed_years = plan['add'] + plan['update']
+        new_rows = self.repository.load_yearly_cutoffs(years=changed_years) if changed_years else pd.DataFrame()
+
+        if mode == 'append':
+            columns = manifest['columns']
+            self._append_snapshot(self._layout(new_rows, columns))
+            partitions = dict(manifest['partitions'])
+        else:
+            if mode == 'full':
+                snapshot = new_rows
+                partitions = {}
+            else:
+                # Keep unchanged partitions from the current snapshot, replace the rest
+                current, _ = self.repository._read_cutoff_csv(self.output_path)
+                current = current[current['year'].isin(plan['unchanged'])]
+                snapshot = self.repository._concat_cutoff_frames([current, new_rows])
+                partitions = {year: dict(manifest['partitions'][year]) for year in plan['unchanged']}
+            columns = [c for c in MERGED_COLUMNS if c in snapshot.columns] + \
+                      [c for c in snapshot.columns if c not in MERGED_COLUMNS]
+            snapshot = self._layout(snapshot, columns).sort_values('year', kind='stable')
+            self._write_snapshot(snapshot)
+            new_rows = snapshot[snapshot['year'].isin(changed_years)]
+
+        files = self.repository.get_yearly_cutoff_files()
+        for year in changed_years:
+            rows = new_rows[new_rows['year'] == year]
+            partitions[year] = {
+                'source': os.path.relpath(files[year], self.repository.data_dir),
+                'sha1': plan['fingerprints'][year],
+                'rows': len(rows),
+                'colleges': int(rows['college_code'].nunique()),
+            }
+
+        # Row ranges: appended partitions follow the existing file, rewrites are year-ordered
+        if mode == 'append':
+            offset = manifest['rows']
+            order = changed_years
+        else:
+            offset = 0
+            order = sorted(partitions)
+        for year in order:
+            partitions[year]['start'] = offset
+            offset += partitions[year]['rows']
+        total_rows = sum(info['rows'] for info in partitions.values())
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'generation': manifest.get('generation', 0) + 1,
+            'built_at': datetime.now().isoformat(timespec='seconds'),
+            'columns': columns,
+            'rows': total_rows,
+            'partitions': dict(sorted(partitions.items())),
+        }
+        self._write_manifest(manifest)
+
+        print(f"✅ Merged snapshot generation {manifest['generation']}: {manifest['rows']} records, "
+              f"years {', '.join(manifest['partitions'])} ({time.time() - start_time:.2f}s)")
+        return plan
+
+    @staticmethod
+    def _layout(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        """Order columns to match the snapshot (missing ones are left empty)"""
+        return df.reindex(columns=columns)
+
+    def _write_snapshot(self, df: pd.DataFrame):
+        """Write the full snapshot atomically"""
+        tmp_path = self._temp_path(self.output_path)
+        try:
+            df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, self.output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _append_snapshot(self, df: pd.DataFrame):
+        """Append partitions to a copy of the snapshot, then swap it in atomically"""
+        tmp_path = self._temp_path(self.output_path)
+        try:
+            shutil.copyfile(self.output_path, tmp_path)
+            df.to_csv(tmp_path, mode='a', header=False, index=False)
+            os.replace(tmp_path, self.output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _write_manifest(self, manifest: Dict):
+        tmp_path = self._temp_path(self.manifest_path)
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _temp_path(path: str) -> str:
+        """Temp file in the target's directory (os.replace must not cross filesystems)"""
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp',
+                                        dir=os.path.dirname(path))
+        os.close(fd)
+        os.chmod(tmp_path, 0o644)
+        return tmp_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the merged cutoff snapshot from the per-year files')
+    parser.add_argument('--full', action='store_true', help='rebuild every partition')
+    parser.add_argument('--dry-run', action='store_true', help='only print what would change')
+    args = parser.parse_args()
+    CutoffPipeline().run(full=args.full, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
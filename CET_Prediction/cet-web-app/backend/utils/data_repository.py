@@ -0,0 +1,543 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class DataRepository:
+    """
+    Process-wide owner of every dataset the backend reads
+
+    - Each file is parsed at most once per process (lazy, thread-safe)
+    - Typed accessors for the predictor, comparator, directory and app routes
+    - The cutoff store lives in the shared CollegeComparator; the raw cutoff
+      files are read once to build it and are not retained here
+    """
+
+    YEARS = ['2021', '2022', '2023', '2024', '2025']
+
+    # Cutoff CSV ingestion: explicit dtypes, chunked reads, one thread per file
+    CUTOFF_CHUNK_ROWS = 50000
+    CUTOFF_INGEST_WORKERS = 4
+    CUTOFF_DTYPES = {
+        'college_code': str,
+        'college_name': str,
+        'college_type': str,
+        'branch_code': str,
+        'branch_name': str,
+        'cap_round': str,
+        'category': str,
+        'year': str,
+        'closing_rank': 'float64',
+        'closing_percentile': 'float64',
+    }
+    CUTOFF_CATEGORICAL_COLUMNS = ['category', 'branch_name', 'college_type']
+    CAP_ROUNDS = {'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5}
+
+    # Minimum seconds between two checks of the input files for changes
+    UPDATE_CHECK_SECONDS = float(os.getenv('DATA_UPDATE_CHECK_SECONDS', 5))
+
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = data_dir or os.path.join(BACKEND_DIR, 'data')
+        self.paths = {
+            'cap_data': os.path.join(self.data_dir, 'flattened_CAP_data done.xlsx'),
+            'college_list': os.path.join(self.data_dir, 'unique_colleges_with_city_CAP1_2025.xlsx'),
+            'college_directory': os.path.join(self.data_dir, 'Colleges_URL.xlsx'),
+            'merged_cutoffs': os.path.join(self.data_dir, 'merged_cutoff_2021_2025.csv'),
+            'merged_manifest': os.path.join(self.data_dir, 'merged_cutoff_2021_2025.manifest.json'),
+            'cutoff_trends_dir': os.path.join(self.data_dir, 'cutoff_trends'),
+            'model': os.path.join(BACKEND_DIR, 'model', 'xgb_cap_model.pkl'),
+        }
+        self._lock = threading.RLock()
+        self._datasets: Dict[str, object] = {}
+        self._load_times: Dict[str, float] = {}
+        self.ingest_report: Dict = {}
+        # Bumped by reload(); caches built on top of the datasets key on it
+        self.generation = 1
+        # (path, size, mtime, inode) of every input file when this generation started
+        self._input_signature = self._stat_input_files()
+        self._last_update_check = time.monotonic()
+
+    def _get(self, key: str, loader: Callable[[], object]):
+        """Return a cached dataset, loading it on first use"""
+        if key in self._datasets:
+            return self._datasets[key]
+        with self._lock:
+            if key not in self._datasets:
+                start_time = time.time()
+                self._datasets[key] = loader()
+                self._load_times[key] = time.time() - start_time
+            return self._datasets[key]
+
+    def reload(self):
+        """Drop every loaded dataset (re-read on next access) and start a new generation"""
+        with self._lock:
+            self._datasets.clear()
+            self._load_times.clear()
+            self.generation += 1
+            self._input_signature = self._stat_input_files()
+        print(f"🔄 Data repository reset, generation {self.generation}")
+
+    def check_for_updates(self, force: bool = False) -> bool:
+        """
+        Reload if an input file changed since this generation started
+
+        The pipeline replaces the merged snapshot and its manifest atomically,
+        which changes their mtime and inode. Checks are throttled to one per
+        UPDATE_CHECK_SECONDS (a few stat calls each).
+
+        Returns:
+            True if the data was reloaded
+        """
+        now = time.monotonic()
+        if not force and now - self._last_update_check < self.UPDATE_CHECK_SECONDS:
+            return False
+        self._last_update_check = now
+        if self._stat_input_files() == self._input_signature:
+            return False
+        with self._lock:
+            if self._stat_input_files() == self._input_signature:
+                return False
+            print("🔄 Input data changed on disk, reloading")
+            self.reload()
+        return True
+
+    def invalidate(self, *keys: str):
+        """Drop specific cached datasets so they are re-read on next access"""
+        with self._lock:
+            for key in keys:
+                self._datasets.pop(key, None)
+                self._load_times.pop(key, None)
+
+    # ============================================================================
+    # RAW DATASETS (cached)
+    # ============================================================================
+
+    def get_cap_data(self) -> pd.DataFrame:
+        """Flattened CAP data used by the predictor (flattened_CAP_data done.xlsx)"""
+        return self._get('cap_data', lambda: self._read_excel(self.paths['cap_data'], required=True))
+
+    def get_college_list(self) -> pd.DataFrame:
+        """Unique colleges with city (CAP1 2025)"""
+        return self._get('college_list', lambda: self._read_excel(self.paths['college_list']))
+
+    def get_college_directory(self) -> pd.DataFrame:
+        """College directory sheet (Colleges_URL.xlsx)"""
+        return self._get('college_directory', lambda: self._read_excel(self.paths['college_directory']))
+
+    # ============================================================================
+    # DERIVED LOOKUPS (cached)
+    # ============================================================================
+
+    def get_directory_frame(self) -> pd.DataFrame:
+        """
+        Directory sheet with resolved columns, string values and normalized URLs
+
+        Columns: Sr. No, College Code, College Name, City, URL ('' when missing)
+        """
+        return self._get('directory_frame', self._build_directory_frame)
+
+    def get_college_url_table(self) -> pd.Series:
+        """college_code -> normalized website URL as a Series indexed by code"""
+        return self._get('college_url_table', self._build_college_url_table)
+
+    def get_college_urls(self) -> Dict[str, str]:
+        """college_code -> normalized website URL"""
+        return self._get('college_urls', lambda: self.get_college_url_table().to_dict())
+
+    def get_college_city_map(self) -> Dict[str, str]:
+        """college_code -> city from the flattened CAP data"""
+        return self._get('college_city_map', self._build_college_city_map)
+
+    def get_comparator(self):
+        """Shared CollegeComparator (owns the unified cutoff store)"""
+        from utils.college_comparator import CollegeComparator
+        return self._get('comparator', lambda: CollegeComparator(repository=self))
+
+    def get_predictor(self):
+        """CollegePredictor over the current CAP data, model and forecaster"""
+        from services.predictor import CollegePredictor
+        return self._get('predictor', lambda: CollegePredictor(repository=self))
+
+    def get_forecaster(self):
+        """Next-year cutoff forecasts fitted on the 2021-2025 CAP history"""
+        from utils.cutoff_forecaster import CutoffForecaster
+
+        def fit():
+            forecaster = CutoffForecaster()
+            try:
+                forecaster.fit(self.get_cap_data())
+            except FileNotFoundError:
+                print("⚠️ CAP data not found, forecasts unavailable")
+            return forecaster
+        return self._get('forecaster', fit)
+
+    def get_rank_converter(self):
+        """Percentile <-> rank interpolation tables built from the CAP history"""
+        from utils.rank_percentile import RankPercentileConverter
+
+        def build():
+            try:
+                return RankPercentileConverter().build(self.get_cap_data())
+            except FileNotFoundError:
+                print("⚠️ CAP data not found, rank/percentile conversion unavailable")
+                return RankPercentileConverter()
+        return self._get('rank_converter', build)
+
+    def get_allotment_simulator(self):
+        """Closing-cutoff cube (series x year x CAP round) for option form simulations"""
+        from utils.allotment_simulator import AllotmentSimulator
+        return self._get('allotment_simulator', lambda: AllotmentSimulator().build(self.get_cutoff_data()))
+
+    def get_cutoff_data(self) -> pd.DataFrame:
+        """Unified multi-year cutoff store"""
+        return self.get_comparator().cutoff_data
+
+    # ============================================================================
+    # SINGLE-USE READERS (not cached; consumed once by the comparator)
+    # ============================================================================
+
+    def load_merged_cutoffs(self) -> pd.DataFrame:
+        """Load merged cutoff data (2021-2025)"""
+        path = self.paths['merged_cutoffs']
+        try:
+            if os.path.exists(path):
+                df, _ = self._read_cutoff_csv(path)
+                print(f"✅ Loaded merged data: {len(df)} records")
+                return df
+            else:
+                print(f"⚠️ Merged data file not found: {path} "
+                      f"(build it with: python -m utils.cutoff_pipeline)")
+                return pd.DataFrame()
+        except Exception as e:
+            print(f"❌ Error loading merged data: {e}")
+            import traceback
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    def load_yearly_cutoffs(self, workers: Optional[int] = None,
+                            years: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Load individual year files (2021-2025)
+
+        Files are read concurrently, each one streamed in chunks of
+        CUTOFF_CHUNK_ROWS rows. Throughput is recorded in self.ingest_report.
+
+        Args:
+            workers: Thread pool size (defaults to one thread per file, capped)
+            years: Only read these years (defaults to every year in YEARS)
+        """
+        dir_path = self.paths['cutoff_trends_dir']
+        try:
+            if not os.path.exists(dir_path):
+                print(f"⚠️ Individual data directory not found: {dir_path}")
+                return pd.DataFrame()
+
+            files = [
+                (year, path) for year, path in self.get_yearly_cutoff_files().items()
+                if years is None or year in years
+            ]
+            if not files:
+                if years is not None and self.get_yearly_cutoff_files():
+                    print("✅ Every per-year file is already in the merged snapshot")
+                else:
+                    print("⚠️ No individual year files found")
+                return pd.DataFrame()
+
+            workers = max(1, min(workers or self.CUTOFF_INGEST_WORKERS, len(files)))
+            start_time = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cutoff-ingest') as pool:
+                results = list(pool.map(lambda item: self._read_cutoff_csv(item[1], year=item[0]), files))
+            elapsed = time.perf_counter() - start_time
+
+            all_data = []
+            file_reports = []
+            for (year, _), (df_year, file_report) in zip(files, results):
+                all_data.append(df_year)
+                file_reports.append({'year': year, **file_report})
+                print(f"   ✓ Loaded {year}: {len(df_year)} records "
+                      f"({file_report['rows_per_sec']:,.0f} rows/sec)")
+
+            df_combined = self._concat_cutoff_frames(all_data)
+            self.ingest_report = {
+                'files': file_reports,
+                'workers': workers,
+                'rows': len(df_combined),
+                'seconds': round(elapsed, 4),
+                'rows_per_sec': round(len(df_combined) / elapsed, 1) if elapsed > 0 else None,
+            }
+            print(f"✅ Combined individual data: {len(df_combined)} records "
+                  f"({self.ingest_report['rows_per_sec']:,.0f} rows/sec, {workers} workers)")
+            return df_combined
+
+        except Exception as e:
+            print(f"❌ Error loading individual data: {e}")
+            import traceback
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    def get_yearly_cutoff_files(self) -> Dict[str, str]:
+        """year -> path of each per-year cutoff CSV that exists"""
+        dir_path = self.paths['cutoff_trends_dir']
+        return {
+            year: os.path.join(dir_path, f"{year}.csv")
+            for year in self.YEARS
+            if os.path.exists(os.path.join(dir_path, f"{year}.csv"))
+        }
+
+    def get_merged_manifest(self) -> Dict:
+        """Manifest written by utils.cutoff_pipeline next to the merged snapshot ({} if none)"""
+        path = self.paths['merged_manifest']
+        if not (os.path.exists(path) and os.path.exists(self.paths['merged_cutoffs'])):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable merged manifest: {e}")
+            return {}
+
+    def get_cutoff_partition_status(self) -> Dict[str, str]:
+        """
+        year -> 'merged' (snapshot is current), 'changed' (file differs from the
+        copy in the snapshot) or 'missing' (not in the snapshot) per per-year file
+        """
+        partitions = self.get_merged_manifest().get('partitions', {})
+        status = {}
+        for year, path in self.get_yearly_cutoff_files().items():
+            sha1 = partitions.get(year, {}).get('sha1')
+            if sha1 is None:
+                status[year] = 'missing'
+            else:
+                status[year] = 'merged' if sha1 == self.file_fingerprint(path) else 'changed'
+        return status
+
+    def get_unmerged_cutoff_years(self) -> List[str]:
+        """Per-year files that are missing from, or changed since, the merged snapshot"""
+        return [year for year, state in self.get_cutoff_partition_status().items() if state != 'merged']
+
+    def get_dataset_version(self) -> str:
+        """
+        Fingerprint of every input file (path, size, mtime) taken once per generation
+
+        Results cached outside this process (the shared response cache) are
+        tagged with it, so they are only reused by processes on the same data.
+        """
+        def build():
+            digest = hashlib.sha1()
+            for path, size, mtime_ns, _ in self._stat_input_files():
+                digest.update(f"{os.path.relpath(path, BACKEND_DIR)}:{size}:{mtime_ns};".encode())
+            return digest.hexdigest()[:16]
+        return self._get('dataset_version', build)
+
+    def _stat_input_files(self) -> Tuple[tuple, ...]:
+        """(path, size, mtime_ns, inode) of every input file that exists, sorted by path"""
+        files = [path for path in self.paths.values() if os.path.isfile(path)]
+        files += list(self.get_yearly_cutoff_files().values())
+        signature = []
+        for path in sorted(set(files)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_size, stat.st_mtime_ns, stat.st_ino))
+        return tuple(signature)
+
+    @staticmethod
+    def file_fingerprint(path: str) -> str:
+        """SHA-1 of a file's contents"""
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    # ============================================================================
+    # STATUS
+    # ============================================================================
+
+    def get_status(self) -> Dict:
+        """Which datasets are loaded, their sizes and load times"""
+        datasets = {}
+        for key, value in list(self._datasets.items()):
+            if isinstance(value, (pd.DataFrame, pd.Series)):
+                size = len(value)
+            elif isinstance(value, dict):
+                size = len(value)
+            else:
+                size = None
+            datasets[key] = {
+                'records': size,
+                'load_seconds': round(self._load_times.get(key, 0.0), 3)
+            }
+        return {
+            'data_dir': self.data_dir,
+            'generation': self.generation,
+            'loaded': datasets,
+            'cutoff_ingest': self.ingest_report,
+            'files': {key: os.path.exists(path) for key, path in self.paths.items()}
+        }
+
+    # ============================================================================
+    # HELPERS
+    # ============================================================================
+
+    def _read_excel(self, path: str, required: bool = False) -> pd.DataFrame:
+        if os.path.exists(path):
+            df = pd.read_excel(path)
+            print(f"✅ Loaded {os.path.basename(path)}: {len(df)} records")
+            return df
+        if required:
+            raise FileNotFoundError(f"Data file not found: {path}")
+        print(f"⚠️ Data file not found: {path}")
+        return pd.DataFrame()
+
+    def _read_cutoff_csv(self, path: str, year: Optional[str] = None) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Stream one cutoff CSV in chunks and return (frame, throughput report)
+
+        Codes stay strings (leading zeros stripped so 2024's "01002" matches
+        "1002" elsewhere), cap_round becomes int8 and the repetitive text
+        columns become categoricals, so peak memory is one raw chunk.
+        """
+        start_time = time.perf_counter()
+        chunks = [
+            self._clean_cutoff_chunk(chunk, year)
+            for chunk in pd.read_csv(path, dtype=self.CUTOFF_DTYPES, chunksize=self.CUTOFF_CHUNK_ROWS)
+        ]
+        df = self._concat_cutoff_frames(chunks)
+        if 'closing_rank' in df.columns and not df['closing_rank'].isna().any():
+            df['closing_rank'] = df['closing_rank'].astype('int32')
+        elapsed = time.perf_counter() - start_time
+        return df, {
+            'rows': len(df),
+            'chunks': len(chunks),
+            'seconds': round(elapsed, 4),
+            'rows_per_sec': round(len(df) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def _clean_cutoff_chunk(self, chunk: pd.DataFrame, year: Optional[str]) -> pd.DataFrame:
+        if year is not None:
+            chunk['year'] = year
+        elif 'year' in chunk.columns:
+            chunk['year'] = chunk['year'].str.strip()
+        for col in ('college_code', 'branch_code'):
+            if col in chunk.columns:
+                chunk[col] = chunk[col].str.strip().str.replace(r'^0+(?=\d)', '', regex=True)
+        if 'category' in chunk.columns:
+            chunk['category'] = chunk['category'].str.strip().str.upper()
+        if 'branch_name' in chunk.columns:
+            chunk['branch_name'] = chunk['branch_name'].str.strip()
+        if 'cap_round' in chunk.columns:
+            chunk['cap_round'] = self._parse_cap_round(chunk['cap_round'])
+        for col in self.CUTOFF_CATEGORICAL_COLUMNS:
+            if col in chunk.columns:
+                chunk[col] = chunk[col].astype('category')
+        return chunk
+
+    @classmethod
+    def _parse_cap_round(cls, values: pd.Series) -> pd.Series:
+        """Roman (I, II, ...) or numeric CAP round labels -> int8 (0 = unknown)"""
+        labels = values.str.strip().str.upper()
+        rounds = labels.map(cls.CAP_ROUNDS)
+        rounds = rounds.fillna(pd.to_numeric(labels, errors='coerce'))
+        return rounds.fillna(0).astype('int8')
+
+    def _concat_cutoff_frames(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenate frames without losing categorical dtypes (categories are unioned first)"""
+        if len(frames) == 1:
+            return frames[0]
+        for col in self.CUTOFF_CATEGORICAL_COLUMNS:
+            if all(col in f.columns and isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+                categories = frames[0][col].cat.categories
+                for f in frames[1:]:
+                    categories = categories.union(f[col].cat.categories)
+                for f in frames:
+                    f[col] = f[col].cat.set_categories(categories)
+        return pd.concat(frames, ignore_index=True)
+
+    DIRECTORY_COLUMNS = {
+        'Sr. No': ['Sr. No', 'sr_no'],
+        'College Code': ['College Code', 'college_code'],
+        'College Name': ['College Name', 'college_name'],
+        'City': ['City', 'city'],
+        'URL': ['URL', 'url'],
+    }
+
+    def _build_directory_frame(self) -> pd.DataFrame:
+        """Resolve the directory columns once and normalize them as whole columns"""
+        df = self.get_college_directory()
+        frame = pd.DataFrame(index=df.index)
+        for name, candidates in self.DIRECTORY_COLUMNS.items():
+            column = next((c for c in candidates if c in df.columns), None)
+            if column is None:
+                frame[name] = ''
+                continue
+            values = df[column]
+            frame[name] = values.where(values.notna(), '').astype(str).str.strip()
+
+        frame['College Code'] = self.canonical_codes(frame['College Code'])
+        frame['URL'] = self.normalize_urls(frame['URL'])
+        return frame.reset_index(drop=True)
+
+    def _build_college_url_table(self) -> pd.Series:
+        """Load college URLs from the directory sheet"""
+        try:
+            frame = self.get_directory_frame()
+            rows = frame[(frame['URL'] != '') & (frame['College Code'] != '')]
+            table = pd.Series(rows['URL'].to_numpy(), index=pd.Index(rows['College Code'].to_numpy()))
+            # Later rows win, as with a dict built row by row
+            table = table[~table.index.duplicated(keep='last')]
+            print(f"✅ Loaded {len(table)} college URLs")
+            return table
+        except Exception as e:
+            print(f"❌ Error loading college URLs: {e}")
+            import traceback
+            traceback.print_exc()
+            return pd.Series(dtype=object)
+
+    @staticmethod
+    def canonical_code(code) -> str:
+        """Scalar form of canonical_codes ("01002.0" -> "1002")"""
+        code = str(code).strip()
+        if code.endswith('.0'):
+            code = code[:-2]
+        return code.lstrip('0') or code
+
+    @staticmethod
+    def canonical_codes(codes: pd.Series) -> pd.Series:
+        """College codes as strings without float suffixes or leading zeros ("01002.0" -> "1002")"""
+        return (codes.astype(str).str.strip()
+                .str.replace(r'\.0$', '', regex=True)
+                .str.replace(r'^0+(?=\d)', '', regex=True)
+                .replace({'nan': '', 'None': ''}))
+
+    @staticmethod
+    def normalize_urls(urls: pd.Series) -> pd.Series:
+        """Blank out missing URLs and add https:// where the scheme is missing"""
+        urls = urls.astype(str).str.strip()
+        missing = (urls == '') | (urls.str.lower() == 'nan')
+        has_scheme = urls.str.startswith(('http://', 'https://'))
+        return urls.where(has_scheme, 'https://' + urls).where(~missing, '')
+
+    def _build_college_city_map(self) -> Dict[str, str]:
+        try:
+            meta = self.get_cap_data()
+        except FileNotFoundError:
+            return {}
+        if meta.empty or 'college_code' not in meta.columns or 'city' not in meta.columns:
+            return {}
+        meta = meta.dropna(subset=['city']).drop_duplicates(subset=['college_code'])
+        return dict(zip(meta['college_code'].astype(str).str.strip(), meta['city']))
+
+
+# Singleton instance shared by every module in the process
+data_repository = DataRepository()
@@ -0,0 +1,116 @@
+"""
+Pre-encoded JSON responses for endpoints whose data only changes on reload
+
+Each response is serialized once per data version and kept as byte blobs:
+identity, gzip and (when the brotli package is installed) brotli. Every
+blob has a strong ETag derived from the body, so a repeat visit that sends
+If-None-Match is answered with 304 after a header comparison, and other
+visits only copy pre-compressed bytes.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from typing import Callable, Dict, Hashable
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class EncodedBlob:
+    """One JSON body in every supported content encoding"""
+
+    MIN_COMPRESS_BYTES = 512
+
+    def __init__(self, payload, version: Hashable):
+        self.version = version
+        # Same key order as jsonify
+        self.body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+        digest = hashlib.sha1(self.body).hexdigest()[:24]
+
+        # Strong ETags differ per encoding; the digest identifies the content
+        self.digest = digest
+        self.encodings: Dict[str, bytes] = {'identity': self.body}
+        self.etags: Dict[str, str] = {'identity': f'"{digest}"'}
+        if len(self.body) >= self.MIN_COMPRESS_BYTES:
+            self.encodings['gzip'] = gzip.compress(self.body, compresslevel=9, mtime=0)
+            self.etags['gzip'] = f'"{digest}-gz"'
+            if brotli is not None:
+                self.encodings['br'] = brotli.compress(self.body)
+                self.etags['br'] = f'"{digest}-br"'
+
+    def sizes(self) -> Dict[str, int]:
+        return {encoding: len(data) for encoding, data in self.encodings.items()}
+
+
+class EncodedResponseCache:
+    """Named blobs rebuilt when their data version changes"""
+
+    CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blobs: Dict[str, EncodedBlob] = {}
+        self._stats = {'not_modified': 0, 'served': 0, 'builds': 0}
+
+    def get_blob(self, name: str, version: Hashable, build: Callable[[], object]) -> EncodedBlob:
+        """Blob for name at version, serializing build() only when the version changed"""
+        blob = self._blobs.get(name)
+        if blob is not None and blob.version == version:
+            return blob
+        with self._lock:
+            blob = self._blobs.get(name)
+            if blob is None or blob.version != version:
+                blob = EncodedBlob(build(), version)
+                self._blobs[name] = blob
+                self._stats['builds'] += 1
+            return blob
+
+    def respond(self, name: str, version: Hashable, build: Callable[[], object]) -> Response:
+        """304 when If-None-Match matches, otherwise the best encoding the client accepts"""
+        blob = self.get_blob(name, version, build)
+
+        if request.if_none_match and any(
+                etag in request.if_none_match for etag in self._etag_values(blob)):
+            self._stats['not_modified'] += 1
+            response = Response(status=304)
+            response.headers['ETag'] = blob.etags[self._pick_encoding(blob)]
+        else:
+            self._stats['served'] += 1
+            encoding = self._pick_encoding(blob)
+            response = Response(blob.encodings[encoding], status=200, mimetype='application/json')
+            response.headers['ETag'] = blob.etags[encoding]
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.headers['Cache-Control'] = self.CACHE_CONTROL
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    @staticmethod
+    def _etag_values(blob: EncodedBlob):
+        # request.if_none_match holds unquoted values
+        return [etag.strip('"') for etag in blob.etags.values()]
+
+    @staticmethod
+    def _pick_encoding(blob: EncodedBlob) -> str:
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in blob.encodings and accepted[encoding]:
+                return encoding
+        return 'identity'
+
+    def get_stats(self) -> Dict:
+        return {
+            **self._stats,
+            'blobs': {name: {'version': str(blob.version), 'bytes': blob.sizes()}
+                      for name, blob in list(self._blobs.items())},
+        }
+
+
+# Process-wide instance
+encoded_responses = EncodedResponseCache()
@@ -0,0 +1,131 @@
+"""
+Offset/cursor pagination and field projection for list endpoints
+
+Query params understood by parse_page_request:
+    limit   page size (default DEFAULT_LIMIT, at most MAX_LIMIT)
+    offset  rows to skip
+    cursor  opaque token from a previous page's next_cursor (wins over offset)
+    fields  comma-separated field names to return
+
+A cursor records the offset, limit, fields, filters and data version it was
+issued for. Following it continues the same query; using it after a data
+reload is rejected, so pages are never stitched across versions.
+"""
+import base64
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+PAGE_PARAMS = ('limit', 'offset', 'cursor', 'fields')
+
+
+class PaginationError(ValueError):
+    """Invalid limit/offset/cursor/fields (reported as HTTP 400)"""
+
+
+def wants_page(args) -> bool:
+    """True when the request asks for a page instead of the full list"""
+    return any(args.get(param) not in (None, '') for param in PAGE_PARAMS)
+
+
+def parse_page_request(args, version, allowed_fields: Sequence[str],
+                       filters: Optional[Dict] = None) -> Dict:
+    """
+    Read limit/offset/cursor/fields from request args
+
+    A cursor carries the query it was issued for (limit, fields and filters),
+    so following next_cursor alone continues the same list. Passing a cursor
+    together with a different limit, fields or filters is rejected.
+
+    Args:
+        args: request.args
+        version: Current data version (compared with the cursor's)
+        allowed_fields: Field names that may be projected
+        filters: The endpoint's filters from the request args
+
+    Returns:
+        Dict with offset, limit, fields (None = every field) and filters
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+        offset = int(args.get('offset', 0))
+    except ValueError:
+        raise PaginationError('limit and offset must be integers')
+    if limit < 1 or offset < 0:
+        raise PaginationError('limit must be positive and offset non-negative')
+    limit = min(limit, MAX_LIMIT)
+
+    fields = None
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in allowed_fields]
+        if unknown:
+            raise PaginationError(
+                f"Unknown fields: {', '.join(unknown)} (available: {', '.join(allowed_fields)})"
+            )
+
+    page = {'offset': offset, 'limit': limit, 'fields': fields,
+            'filters': {key: value for key, value in (filters or {}).items() if value}}
+
+    cursor = args.get('cursor')
+    if cursor:
+        token = decode_cursor(cursor, version)
+        given = {
+            'limit': page['limit'] if args.get('limit') not in (None, '') else token['limit'],
+            'fields': page['fields'] if args.get('fields') else token['fields'],
+            'filters': page['filters'] or token['filters'],
+        }
+        mismatched = [name for name, value in given.items() if value != token[name]]
+        if mismatched:
+            raise PaginationError(
+                f"Cursor was issued for a different {', '.join(mismatched)}; "
+                f"drop the cursor or repeat the original query"
+            )
+        page.update(token)
+    return page
+
+
+def encode_cursor(page: Dict, offset: int, version) -> str:
+    token = json.dumps({'o': offset, 'v': str(version), 'l': page['limit'],
+                        'f': page['fields'], 'q': page['filters']},
+                       separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, version) -> Dict:
+    """offset, limit, fields and filters recorded in a cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        token = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        decoded = {
+            'offset': max(int(token['o']), 0),
+            'limit': min(max(int(token['l']), 1), MAX_LIMIT),
+            'fields': [str(f) for f in token['f']] if token['f'] else None,
+            'filters': {str(k): str(v) for k, v in (token['q'] or {}).items()},
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise PaginationError('Invalid cursor')
+    if token.get('v') != str(version):
+        raise PaginationError('Cursor is from an older dataset; restart from the first page')
+    return decoded
+
+
+def project(records: Iterable[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Keep only the requested fields of each record"""
+    if not fields:
+        return list(records)
+    return [{field: record.get(field) for field in fields} for record in records]
+
+
+def page_metadata(total: int, page: Dict, version) -> Dict:
+    """total/offset/limit plus next_cursor (None on the last page)"""
+    next_offset = page['offset'] + page['limit']
+    return {
+        'total': total,
+        'offset': page['offset'],
+        'limit': page['limit'],
+        'next_cursor': encode_cursor(page, next_offset, version) if next_offset < total else None,
+    }
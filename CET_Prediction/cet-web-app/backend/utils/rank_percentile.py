@@ -0,0 +1,165 @@
+"""
+Percentile <-> rank conversion from observed (closing_rank, closing_percentile) pairs
+
+One monotone table per year and one per (year, category). Each table is the
+rank-sorted pairs with percentiles fitted non-increasing (isotonic regression,
+pool-adjacent-violators), so np.interp can be used in both directions.
+Percentiles of 0 are placeholders in the source data and are ignored. Values
+outside the observed range are clamped.
+"""
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+ArrayLike = Union[float, int, list, np.ndarray]
+
+
+class RankPercentileConverter:
+    """Per-year / per-category monotone interpolation tables"""
+
+    # Category tables with fewer points fall back to the year table
+    MIN_POINTS = 20
+
+    def __init__(self):
+        self._year_tables: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._category_tables: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+        self.latest_year: Optional[str] = None
+
+    # ============================================================================
+    # BUILDING
+    # ============================================================================
+
+    def build(self, df: pd.DataFrame) -> 'RankPercentileConverter':
+        """Build every table from rows with year, category, closing_rank and closing_percentile"""
+        df = df.dropna(subset=['year', 'closing_rank', 'closing_percentile'])
+        df = df[(df['closing_percentile'] > 0) & (df['closing_rank'] > 0)]
+        if df.empty:
+            return self
+
+        years = df['year'].astype(str).str.replace(r'\.0$', '', regex=True).to_numpy()
+        categories = df['category'].astype(str).str.strip().str.upper().to_numpy()
+        ranks = df['closing_rank'].to_numpy(dtype=float)
+        percentiles = df['closing_percentile'].to_numpy(dtype=float)
+
+        # One sort orders rows by (year, category, rank); year tables re-sort their slice
+        order = np.lexsort((ranks, categories, years))
+        years, categories = years[order], categories[order]
+        ranks, percentiles = ranks[order], percentiles[order]
+
+        year_bounds = self._runs(years)
+        for start, end in year_bounds:
+            year_order = np.argsort(ranks[start:end], kind='stable')
+            self._year_tables[years[start]] = self._monotone_table(
+                ranks[start:end][year_order], percentiles[start:end][year_order]
+            )
+
+        group_keys = np.char.add(np.char.add(years.astype(str), '|'), categories.astype(str))
+        for start, end in self._runs(group_keys):
+            if end - start >= self.MIN_POINTS:
+                self._category_tables[(years[start], categories[start])] = self._monotone_table(
+                    ranks[start:end], percentiles[start:end]
+                )
+
+        self.latest_year = max(self._year_tables)
+        print(f"✅ Built rank/percentile tables: {len(self._year_tables)} years, "
+              f"{len(self._category_tables)} (year, category) tables")
+        return self
+
+    @staticmethod
+    def _runs(keys: np.ndarray):
+        """(start, end) of each run of equal consecutive keys"""
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        return list(zip(starts, ends))
+
+    @staticmethod
+    def _monotone_table(ranks: np.ndarray, percentiles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Rank-ascending table with non-increasing percentiles and unique ranks"""
+        monotone = RankPercentileConverter._isotonic_non_increasing(percentiles)
+        unique_ranks, first = np.unique(ranks, return_index=True)
+        return unique_ranks, monotone[first]
+
+    @staticmethod
+    def _isotonic_non_increasing(values: np.ndarray) -> np.ndarray:
+        """Least-squares non-increasing fit (pool adjacent violators)"""
+        means, sizes = [], []
+        for value in values:
+            mean, size = float(value), 1
+            while means and means[-1] < mean:
+                previous_mean, previous_size = means.pop(), sizes.pop()
+                mean = (previous_mean * previous_size + mean * size) / (previous_size + size)
+                size += previous_size
+            means.append(mean)
+            sizes.append(size)
+        return np.repeat(means, sizes)
+
+    # ============================================================================
+    # CONVERSION
+    # ============================================================================
+
+    # General-quota suffixes tried for a group name: state level, home university, other than home university
+    QUOTA_SUFFIXES = ('S', 'H', 'O')
+
+    def resolve_category(self, category: Optional[str], year: Optional[str] = None) -> Optional[str]:
+        """
+        Seat code whose table a category query uses (None: the year table)
+
+        A seat code (GOPENS, TFWS, ...) is used as given. A group name (OPEN,
+        OBC) uses its first general-quota seat with a table (GOPENS, GOPENH,
+        GOPENO).
+        """
+        if not category:
+            return None
+        year = str(year) if year else self.latest_year
+        category = str(category).strip().upper()
+        candidates = [category] + [f'G{category}{suffix}' for suffix in self.QUOTA_SUFFIXES]
+        for code in candidates:
+            if (year, code) in self._category_tables:
+                return code
+        return None
+
+    def _table(self, year: Optional[str], category: Optional[str]):
+        year = str(year) if year else self.latest_year
+        category = self.resolve_category(category, year)
+        if category:
+            table = self._category_tables.get((year, category))
+            if table is not None:
+                return table, year, 'category'
+        table = self._year_tables.get(year)
+        if table is None:
+            raise KeyError(f"No rank/percentile data for year {year}")
+        return table, year, 'year'
+
+    def percentile_for_rank(self, ranks: ArrayLike, year: Optional[str] = None,
+                            category: Optional[str] = None) -> Union[float, np.ndarray]:
+        """Estimated percentile for one rank or an array of ranks"""
+        (table_ranks, table_percentiles), _, _ = self._table(year, category)
+        result = np.interp(np.asarray(ranks, dtype=float), table_ranks, table_percentiles)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def rank_for_percentile(self, percentiles: ArrayLike, year: Optional[str] = None,
+                            category: Optional[str] = None) -> Union[int, np.ndarray]:
+        """Estimated rank for one percentile or an array of percentiles"""
+        (table_ranks, table_percentiles), _, _ = self._table(year, category)
+        # np.interp needs increasing x: walk the table from the high-rank end
+        result = np.rint(np.interp(
+            np.asarray(percentiles, dtype=float), table_percentiles[::-1], table_ranks[::-1]
+        )).astype(np.int64)
+        return int(result) if np.ndim(result) == 0 else result
+
+    def describe(self, year: Optional[str] = None, category: Optional[str] = None) -> Dict:
+        """Which table a (year, category) query resolves to and its range"""
+        (table_ranks, table_percentiles), year, source = self._table(year, category)
+        return {
+            'year': year,
+            'table': source,
+            'category': self.resolve_category(category, year),
+            'points': len(table_ranks),
+            'rank_range': [int(table_ranks[0]), int(table_ranks[-1])],
+            'percentile_range': [round(float(table_percentiles[-1]), 4), round(float(table_percentiles[0]), 4)],
+        }
+
+    def get_years(self):
+        return sorted(self._year_tables)
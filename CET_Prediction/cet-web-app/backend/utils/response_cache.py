@@ -0,0 +1,333 @@
+"""
+Two-tier cache for JSON responses shared by every worker on a host
+
+1. In-process LRU (bytes, bounded by entry count and total size)
+2. SQLite file on local disk (WAL), consulted after a memory miss, shared by
+   all gunicorn workers and kept across restarts; bounded by total size with
+   least-recently-used eviction
+
+Every entry is tagged with the cache schema version and the dataset version
+(a fingerprint of the data and model files the process loaded). Entries from
+another version are ignored on read and purged on startup, so a worker never
+serves results computed from different data or in an older response shape.
+
+If the disk store cannot be opened, the cache keeps working with the memory
+tier only. A read or write that fails once (e.g. the database stayed locked
+past the busy timeout) is skipped and counted. Responses that had to be computed are appended to the
+warmup request log (utils.cache_warmup).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import Response, request
+
+from utils.cache_warmup import WARMUP_HEADER, cache_warmer
+from utils.data_repository import BACKEND_DIR, data_repository
+
+
+class ResponseCache:
+    """In-process LRU in front of a shared on-disk LRU"""
+
+    MEMORY_MAX_ENTRIES = 512
+    MEMORY_MAX_BYTES = 32 * 1024 * 1024
+    DISK_MAX_BYTES = 256 * 1024 * 1024
+    # Responses larger than this are not cached
+    MAX_ENTRY_BYTES = 4 * 1024 * 1024
+    # A disk hit refreshes the entry's access time at most this often
+    TOUCH_INTERVAL_SECONDS = 60
+    # Eviction trims the disk store to this share of DISK_MAX_BYTES
+    EVICT_TO_RATIO = 0.9
+    # Bump whenever a cached endpoint's response shape changes (part of every entry's version)
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path: Optional[str] = None, repository=None):
+        self.path = path or os.getenv(
+            'RESPONSE_CACHE_PATH', os.path.join(BACKEND_DIR, 'cache', 'responses.sqlite3')
+        )
+        self.repository = repository or data_repository
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, Tuple[str, bytes]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._local = threading.local()
+        self._disk_enabled = True
+        self._disk_ready = False
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0,
+                       'evictions': 0, 'disk_errors': 0, 'disk_busy': 0}
+
+    # ============================================================================
+    # KEYS & VERSIONS
+    # ============================================================================
+
+    @staticmethod
+    def make_key(namespace: str, params: Dict) -> str:
+        """Stable key for a namespace and its (already normalized) parameters"""
+        payload = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+        return f"{namespace}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+    def current_version(self) -> str:
+        return f"v{self.SCHEMA_VERSION}-{self.repository.get_dataset_version()}"
+
+    # ============================================================================
+    # LOOKUP / STORE
+    # ============================================================================
+
+    def get(self, key: str, version: Optional[str] = None) -> Tuple[Optional[bytes], str]:
+        """
+        Cached body for key at a dataset version (default: the current one)
+
+        Returns:
+            (body, source) where source is 'memory', 'disk' or 'miss'
+        """
+        version = version or self.current_version()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] == version:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[1], 'memory'
+
+        body = self._disk_get(key, version)
+        if body is not None:
+            self._memory_put(key, version, body)
+            with self._lock:
+                self._stats['disk_hits'] += 1
+            return body, 'disk'
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None, 'miss'
+
+    def set(self, key: str, body: bytes, version: Optional[str] = None):
+        """Store a body in both tiers at a dataset version (default: the current one)"""
+        if len(body) > self.MAX_ENTRY_BYTES:
+            return
+        version = version or self.current_version()
+        self._memory_put(key, version, body)
+        self._disk_put(key, version, body)
+        with self._lock:
+            self._stats['stores'] += 1
+
+    def json_response(self, namespace: str, params: Dict,
+                      build: Callable[[], Tuple[Response, int]],
+                      replay_fields: Tuple[str, ...] = ()) -> Tuple[Response, int]:
+        """
+        Serve a JSON response from the cache, building and storing it on a miss
+
+        Args:
+            namespace: Endpoint name (part of the key)
+            params: Normalized request parameters
+            build: Returns (response, status); only 200 responses are stored
+            replay_fields: Body fields the warmup needs to replay the request;
+                nothing else from the body is logged
+        """
+        key = self.make_key(namespace, params)
+        generation = self.repository.generation
+        version = self.current_version()
+        body, source = self.get(key, version)
+        if body is not None:
+            response = Response(body, status=200, mimetype='application/json')
+            response.headers['X-Cache'] = f'HIT-{source.upper()}'
+            return response, 200
+
+        response, status = build()
+        if status == 200:
+            # Built across a data reload: it may mix old and new data, so it is not stored
+            if self.repository.generation == generation:
+                self.set(key, response.get_data(), version)
+            # Computed responses feed the next deploy's warmup
+            if not request.headers.get(WARMUP_HEADER):
+                data = request.get_json(silent=True) if replay_fields else None
+                body = {field: data[field] for field in replay_fields if field in data} \
+                    if isinstance(data, dict) else None
+                cache_warmer.record(request.method, request.full_path.rstrip('?'), body)
+        response.headers['X-Cache'] = 'MISS'
+        return response, status
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        conn = self._connection()
+        if conn is not None:
+            try:
+                with conn:
+                    conn.execute('DELETE FROM responses')
+            except sqlite3.Error as e:
+                self._disk_skipped(e)
+
+    # ============================================================================
+    # MEMORY TIER
+    # ============================================================================
+
+    def _memory_put(self, key: str, version: str, body: bytes):
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous[1])
+            self._memory[key] = (version, body)
+            self._memory_bytes += len(body)
+            while self._memory and (len(self._memory) > self.MEMORY_MAX_ENTRIES
+                                    or self._memory_bytes > self.MEMORY_MAX_BYTES):
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    # ============================================================================
+    # DISK TIER
+    # ============================================================================
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """One connection per thread; the schema is created on first use"""
+        if not self._disk_enabled:
+            return None
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self._lock:
+                first = not self._disk_ready
+                self._disk_ready = True
+            if first:
+                try:
+                    self._init_schema(conn)
+                except sqlite3.Error as e:
+                    if not self._is_busy(e):
+                        raise
+                    # Another worker holds the lock: retry the schema on the next call
+                    with self._lock:
+                        self._disk_ready = False
+                    conn.close()
+                    self._disk_skipped(e)
+                    return None
+            self._local.conn = conn
+            return conn
+        except sqlite3.Error as e:
+            self._disk_failed(e)
+            return None
+
+    def _init_schema(self, conn: sqlite3.Connection):
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+            # Entries from other dataset versions can never be served again
+            purged = conn.execute('DELETE FROM responses WHERE version != ?',
+                                  (self.current_version(),)).rowcount
+        if purged:
+            print(f"🧹 Response cache: purged {purged} entries from older datasets")
+
+    def _disk_get(self, key: str, version: str) -> Optional[bytes]:
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute('SELECT version, body, accessed FROM responses WHERE key = ?',
+                               (key,)).fetchone()
+            if row is None or row[0] != version:
+                return None
+            now = time.time()
+            if now - row[2] > self.TOUCH_INTERVAL_SECONDS:
+                conn.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            return bytes(row[1])
+        except sqlite3.Error as e:
+            self._disk_skipped(e)
+            return None
+
+    def _disk_put(self, key: str, version: str, body: bytes):
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses (key, version, body, size, accessed) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (key, version, sqlite3.Binary(body), len(body), time.time())
+                )
+                total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+                if total > self.DISK_MAX_BYTES:
+                    self._evict(conn, total)
+        except sqlite3.Error as e:
+            self._disk_skipped(e)
+
+    def _evict(self, conn: sqlite3.Connection, total: int):
+        """Delete least recently used entries until the store is under the target size"""
+        target = int(self.DISK_MAX_BYTES * self.EVICT_TO_RATIO)
+        doomed = []
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY accessed'):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM responses WHERE key = ?', doomed)
+        with self._lock:
+            self._stats['evictions'] += len(doomed)
+
+    @staticmethod
+    def _is_busy(error: Exception) -> bool:
+        """Lock contention between workers (transient) rather than a broken store"""
+        message = str(error).lower()
+        return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+    def _disk_skipped(self, error: Exception):
+        """A single read or write failed: skip it and keep the disk tier enabled"""
+        busy = self._is_busy(error)
+        with self._lock:
+            self._stats['disk_busy' if busy else 'disk_errors'] += 1
+        if not busy:
+            print(f"⚠️ Response cache disk operation skipped ({error})")
+
+    def _disk_failed(self, error: Exception):
+        """The disk store cannot be opened: use the memory tier from now on"""
+        with self._lock:
+            self._stats['disk_errors'] += 1
+            was_enabled = self._disk_enabled
+            self._disk_enabled = False
+        if was_enabled:
+            print(f"⚠️ Response cache disk tier disabled ({error}); using memory only")
+
+    # ============================================================================
+    # STATS
+    # ============================================================================
+
+    def get_stats(self) -> Dict:
+        """Hit counters per tier and the size of each tier"""
+        with self._lock:
+            stats = dict(self._stats)
+            memory = {'entries': len(self._memory), 'bytes': self._memory_bytes,
+                      'max_entries': self.MEMORY_MAX_ENTRIES, 'max_bytes': self.MEMORY_MAX_BYTES}
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 4) if lookups else None
+
+        disk = {'path': self.path, 'enabled': self._disk_enabled, 'max_bytes': self.DISK_MAX_BYTES}
+        conn = self._connection()
+        if conn is not None:
+            try:
+                entries, size = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+                disk.update(entries=entries, bytes=size)
+            except sqlite3.Error as e:
+                self._disk_skipped(e)
+        return {'dataset_version': self.current_version(), 'memory': memory, 'disk': disk, **stats}
+
+
+# Process-wide instance (the disk file is shared between processes)
+response_cache = ResponseCache()
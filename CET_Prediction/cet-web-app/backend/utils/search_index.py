@@ -0,0 +1,225 @@
+import re
+import threading
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class SearchIndex:
+    """
+    In-memory typeahead index over college names, college codes, branches and cities
+
+    - Token prefix lookup (sorted vocabulary + bisect)
+    - Trigram postings for substring and typo-tolerant matches
+    - Entries are registered per data source and merged on (kind, text)
+    """
+
+    KINDS = ('college', 'code', 'branch', 'city')
+
+    # Share of query trigrams an entry must contain to count as a fuzzy match
+    MIN_TRIGRAM_CONTAINMENT = 0.5
+
+    _NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources: Dict[str, List[Tuple[str, str, Optional[str]]]] = {}
+        self._signatures: Dict[str, int] = {}
+        self._dirty = False
+
+        self._entries: List[Dict] = []
+        self._vocab: List[str] = []
+        self._token_entries: Dict[str, List[int]] = {}
+        self._trigram_entries: Dict[str, List[int]] = {}
+
+    # ============================================================================
+    # BUILDING
+    # ============================================================================
+
+    def register(self, source: str, entries: Iterable[Tuple[str, str, Optional[str]]]):
+        """
+        Register (or replace) the entries contributed by a data source
+
+        Args:
+            source: Name of the contributing source (e.g. 'predictor')
+            entries: Iterable of (kind, text, college_code) tuples
+        """
+        cleaned = [
+            (kind, str(text).strip(), str(code).strip() if code is not None else None)
+            for kind, text, code in entries
+            if kind in self.KINDS and text is not None and str(text).strip()
+            and str(text).strip().lower() != 'nan'
+        ]
+        signature = hash(tuple(cleaned))
+
+        with self._lock:
+            if self._signatures.get(source) == signature:
+                return
+            self._sources[source] = cleaned
+            self._signatures[source] = signature
+            self._dirty = True
+
+    def _ensure_built(self):
+        if not self._dirty:
+            return
+        with self._lock:
+            if self._dirty:
+                self._build()
+                self._dirty = False
+
+    def _build(self):
+        merged: Dict[Tuple[str, str], Dict] = {}
+        for entries in self._sources.values():
+            for kind, text, code in entries:
+                norm = self.normalize(text)
+                if not norm:
+                    continue
+                entry = merged.get((kind, norm))
+                if entry is None:
+                    entry = {'kind': kind, 'value': text, 'norm': norm, 'codes': []}
+                    merged[(kind, norm)] = entry
+                if code and code not in entry['codes']:
+                    entry['codes'].append(code)
+
+        entries = list(merged.values())
+        token_entries = defaultdict(list)
+        trigram_entries = defaultdict(list)
+        for entry_id, entry in enumerate(entries):
+            for token in set(entry['norm'].split()):
+                token_entries[token].append(entry_id)
+            for gram in self._trigrams(entry['norm']):
+                trigram_entries[gram].append(entry_id)
+
+        self._entries = entries
+        self._token_entries = dict(token_entries)
+        self._trigram_entries = dict(trigram_entries)
+        self._vocab = sorted(self._token_entries)
+
+    # ============================================================================
+    # QUERYING
+    # ============================================================================
+
+    def search(self, query: str, kinds: Optional[Sequence[str]] = None,
+               limit: Optional[int] = 10) -> List[Dict]:
+        """
+        Ranked, typo-tolerant search
+
+        Ranking: exact > prefix of the whole text > every query token is a word
+        prefix > substring > trigram (fuzzy) match; ties prefer shorter text.
+
+        Returns:
+            List of {'kind', 'value', 'codes', 'score'} dicts, best first
+        """
+        q = self.normalize(query)
+        if not q:
+            return []
+
+        self._ensure_built()
+        entries = self._entries
+        kinds = set(kinds) if kinds else None
+
+        # Entries where every query token prefixes one of the entry's tokens
+        word_hits = None
+        for token in q.split():
+            lo = bisect_left(self._vocab, token)
+            hi = bisect_left(self._vocab, token + '\uffff', lo)
+            ids = set()
+            for vocab_token in self._vocab[lo:hi]:
+                ids.update(self._token_entries[vocab_token])
+            word_hits = ids if word_hits is None else word_hits & ids
+            if not word_hits:
+                break
+        word_hits = word_hits or set()
+
+        # Trigram overlap catches mid-word substrings and typos
+        gram_counts: Dict[int, int] = defaultdict(int)
+        query_grams = self._trigrams(q)
+        if len(q) >= 3:
+            for gram in query_grams:
+                for entry_id in self._trigram_entries.get(gram, ()):
+                    gram_counts[entry_id] += 1
+
+        scored = []
+        for entry_id in word_hits.union(gram_counts):
+            entry = entries[entry_id]
+            if kinds and entry['kind'] not in kinds:
+                continue
+            norm = entry['norm']
+            if norm == q:
+                score = 100.0
+            elif norm.startswith(q):
+                score = 90.0
+            elif entry_id in word_hits:
+                score = 80.0
+            elif q in norm:
+                score = 70.0
+            else:
+                containment = gram_counts[entry_id] / len(query_grams)
+                if containment < self.MIN_TRIGRAM_CONTAINMENT:
+                    continue
+                score = round(60.0 * containment, 2)
+            scored.append((-score, len(norm), entry['value'], entry_id))
+
+        if limit is not None and limit > 0:
+            best = heapq.nsmallest(limit, scored)
+        else:
+            best = sorted(scored)
+
+        return [
+            {
+                'kind': entries[entry_id]['kind'],
+                'value': value,
+                'codes': list(entries[entry_id]['codes']),
+                'score': -neg_score
+            }
+            for neg_score, _, value, entry_id in best
+        ]
+
+    def search_codes(self, query: str, kinds: Sequence[str] = ('college', 'code'),
+                     limit: Optional[int] = None) -> List[str]:
+        """Ranked, de-duplicated college codes for a query"""
+        codes = []
+        seen = set()
+        for hit in self.search(query, kinds=kinds, limit=None):
+            for code in hit['codes']:
+                if code not in seen:
+                    seen.add(code)
+                    codes.append(code)
+            if limit and len(codes) >= limit:
+                return codes[:limit]
+        return codes
+
+    def get_stats(self) -> Dict:
+        """Index size information"""
+        self._ensure_built()
+        by_kind = defaultdict(int)
+        for entry in self._entries:
+            by_kind[entry['kind']] += 1
+        return {
+            'sources': sorted(self._sources),
+            'entries': len(self._entries),
+            'entries_by_kind': dict(by_kind),
+            'tokens': len(self._vocab),
+            'trigrams': len(self._trigram_entries)
+        }
+
+    # ============================================================================
+    # HELPERS
+    # ============================================================================
+
+    @classmethod
+    def normalize(cls, text) -> str:
+        """Lowercase and collapse punctuation/whitespace to single spaces"""
+        if text is None:
+            return ''
+        return cls._NON_ALNUM.sub(' ', str(text).lower()).strip()
+
+    @staticmethod
+    def _trigrams(norm: str) -> set:
+        padded = f' {norm} '
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Shared instance used by the predictor, comparator and directory endpoints
+search_index = SearchIndex()
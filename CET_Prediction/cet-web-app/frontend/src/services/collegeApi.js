@@ -249,6 +249,18 @@ export const collegeApi = {
     }
   },
 
+  // Get statistics for several colleges in one call
+  getCollegesStats: async (collegeCodes = []) => {
+    try {
+      const params = new URLSearchParams({ codes: collegeCodes.join(',') });
+      const response = await api.get(`/colleges/stats?${params.toString()}`);
+      return response.data;
+    } catch (error) {
+      console.error('Error fetching colleges stats:', error);
+      throw error;
+    }
+  },
+
   // Get trend analysis
   getTrendAnalysis: async (collegeCode, branch, category) => {
     try {